@@ -0,0 +1,26 @@
+"""
+性能基准测试，不依赖streamlit页面，直接在命令行运行，例如：
+python -m benchmarks.bench_electropolymerization
+"""
+import time
+
+
+def timeit(func, *args, repeat=3, **kwargs):
+    """
+    多次运行取最短用时
+    :return: (最短用时[s], 最后一次的返回值)
+    """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(rows, title):
+    """打印对比表格，rows 为 [(名称, 原实现用时, 新实现用时), ...]"""
+    print(title)
+    print(f'{"stage":<28}{"loop[s]":>12}{"array[s]":>12}{"speedup":>10}')
+    for name, before, after in rows:
+        print(f'{name:<28}{before:>12.4f}{after:>12.4f}{before / after:>9.1f}x')
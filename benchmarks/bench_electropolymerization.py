@@ -0,0 +1,70 @@
+"""电聚合I-t分析：峰值查找与电荷积分的循环实现与数组实现对比"""
+import argparse
+
+import numpy as np
+
+from benchmarks import report, timeit
+from utils import nucleation
+
+
+def synthetic_transient(n_points=1_000_000, tm=5.0, Im=1e-3, noise=0.0, seed=0):
+    """
+    按3D瞬时成核模型生成恒电位I-t曲线
+    :param n_points: 数据点数
+    :param tm: 峰值时间[s]
+    :param Im: 峰值电流[A]
+    :param noise: 相对噪声的标准差（相对Im）
+    :return: (时间数组, 电流数组)
+    """
+    time = np.linspace(1e-3, 10 * tm, n_points)
+    t_normalized = time / tm
+    current = Im * ((1.954 / t_normalized) ** 0.5) * (1 - np.exp(-1.2564 * t_normalized)) / 0.9999
+    if noise:
+        current = current + np.random.default_rng(seed).normal(0, noise * Im, n_points)
+    return time, current
+
+
+def loop_find_peak(current, time):
+    """原实现：逐点比较找局部极大值"""
+    potential_peaks = []
+    for i in range(1, len(current) - 1):
+        if (current[i] - current[i - 1]) > 0 and (current[i + 1] - current[i]) < 0:
+            potential_peaks.append(i)
+    peak_index = max(potential_peaks, key=lambda i: current[i]) if potential_peaks else np.argmax(current)
+    return current[peak_index], time[peak_index]
+
+
+def loop_charge(time, current):
+    """原实现：逐点累加（左矩形积分）"""
+    charge = np.zeros(len(time))
+    for i in range(1, len(time)):
+        charge[i] = charge[i - 1] + current[i - 1] * (time[i] - time[i - 1])
+    return charge
+
+
+def main(n_points=1_000_000, noise=1e-3, repeat=3):
+    time, current = synthetic_transient(n_points, noise=noise)
+
+    loop_peak_time, (Im_loop, tm_loop) = timeit(loop_find_peak, current, time, repeat=repeat)
+    array_peak_time, (Im, tm, _) = timeit(nucleation.find_peak, current, time, repeat=repeat)
+    prominence_time, (Im_p, tm_p, _) = timeit(nucleation.find_peak, current, time, prominence=0.05 * current.max(),
+                                               repeat=repeat)
+    loop_charge_time, charge_loop = timeit(loop_charge, time, current, repeat=repeat)
+    array_charge_time, charge = timeit(nucleation.cumulative_charge, time, current, repeat=repeat)
+
+    report([('find_peak', loop_peak_time, array_peak_time),
+            ('find_peak (prominence)', loop_peak_time, prominence_time),
+            ('calculate_charge', loop_charge_time, array_charge_time)],
+           f'synthetic 3DI transient, {n_points} points, noise {noise:g} Im')
+    print(f'peak: loop Im={Im_loop:.6e} tm={tm_loop:.4f}s | array Im={Im:.6e} tm={tm:.4f}s | '
+          f'prominence Im={Im_p:.6e} tm={tm_p:.4f}s')
+    print(f'total charge: left-rectangle {charge_loop[-1]:.6e} C | trapezoid {charge[-1]:.6e} C')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--points', type=int, default=1_000_000)
+    parser.add_argument('--noise', type=float, default=1e-3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.points, args.noise, args.repeat)
@@ -0,0 +1,119 @@
+"""
+整个数据流程的基准测试：按多种数据量生成各仪器的合成原始文件，测量每个转换函数、曲线合并、分段与I-t分析的
+用时、吞吐量（数据点/s、MB/s）与峰值内存（tracemalloc），不启动streamlit页面，例如：
+python -m benchmarks.bench_pipeline --sizes 1000 100000 1000000 --csv bench_pipeline.csv
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from benchmarks import synthetic, timeit  # noqa: E402
+from core.analysis import It_summary  # noqa: E402
+from core.ingest import DEFAULT_OPTIONS, get_converter  # noqa: E402
+from core.merge import merge_curves  # noqa: E402
+from core.render import render  # noqa: E402
+from core.segmentation import CV_segment, GCD_segment  # noqa: E402
+from core.storage import load_record  # noqa: E402
+
+SIZES = (1_000, 100_000)
+
+
+def measure(func, *args, repeat=3, **kwargs):
+    """
+    多次运行取最短用时，再单独运行一次用tracemalloc记录峰值内存（tracemalloc会拖慢运行，不计入用时）
+    :return: (最短用时[s], 峰值内存[B], 返回值)
+    """
+    best, result = timeit(func, *args, repeat=repeat, **kwargs)
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def _row(stage, name, n_points, input_bytes, elapsed, peak):
+    return {'Stage': stage, 'Case': name, 'Points': n_points, 'Input[MB]': input_bytes / 1e6, 'Time[s]': elapsed,
+            'Points/s': n_points / elapsed, 'MB/s': input_bytes / 1e6 / elapsed, 'Peak[MB]': peak / 1e6}
+
+
+def bench_converters(folder, n_points, storage_format, repeat):
+    """每种仪器的转换函数，返回 (结果行, {用例名: 输出文件})"""
+    cases = {instrument: (instrument, func) for instrument, func in synthetic.GENERATORS.items()}
+    # I-t 曲线用于后面的成核分析
+    cases['keithley I-t'] = ('keithley', lambda folder, n, seed=0: synthetic.keithley_txt(folder, n, seed, 'I-t'))
+    rows, outputs = [], {}
+    for name, (instrument, generate) in cases.items():
+        source = generate(folder, n_points)
+        converter = get_converter(instrument)
+        elapsed, peak, output = measure(converter, source, **DEFAULT_OPTIONS.get(instrument, {}),
+                                        storage_format=storage_format, repeat=repeat)
+        rows.append(_row('convert', name, n_points, os.path.getsize(source), elapsed, peak))
+        outputs[name] = output
+    return rows, outputs
+
+
+def bench_analysis(folder, n_points, outputs, repeat):
+    """合并、分段、I-t分析与画图，输入为转换得到的数据文件"""
+    rows = []
+    # 20条x网格略有错位的曲线合并为一张表
+    rng = np.random.default_rng(0)
+    curves = [(f'curve{i}', np.sort(np.linspace(-1, 1, n_points) + rng.uniform(-1e-4, 1e-4, n_points)),
+               rng.standard_normal(n_points)) for i in range(20)]
+    elapsed, peak, _ = measure(merge_curves, curves, 'Potential[V]', 1e-4, repeat=repeat)
+    rows.append(_row('merge', 'merge_curves x20', 20 * n_points, 0, elapsed, peak))
+
+    cv_df = load_record(outputs['CHI'])[0]
+    elapsed, peak, _ = measure(CV_segment, cv_df, 1e-3, repeat=repeat)
+    rows.append(_row('segment', 'CV_segment', n_points, 0, elapsed, peak))
+    gcd_df = load_record(outputs['LANHE'])[0]
+    elapsed, peak, _ = measure(GCD_segment, gcd_df, 1e-6, repeat=repeat)
+    rows.append(_row('segment', 'GCD_segment', n_points, 0, elapsed, peak))
+
+    it_path = outputs['keithley I-t']
+    elapsed, peak, _ = measure(It_summary, it_path, repeat=repeat)
+    rows.append(_row('analysis', 'It_summary', n_points, os.path.getsize(it_path), elapsed, peak))
+
+    save_path = os.path.join(folder, f'render_{n_points}.png')
+    elapsed, peak, _ = measure(render, 'CV', cv_df, 'bench', save_path, dpi=100, repeat=repeat)
+    rows.append(_row('plot', 'render CV', n_points, 0, elapsed, peak))
+    return rows
+
+
+def main(sizes=SIZES, storage_format='parquet', repeat=3, folder=None, csv_path=None):
+    rows = []
+    with tempfile.TemporaryDirectory() as temp_folder:
+        folder = folder or temp_folder
+        for n_points in sizes:
+            size_folder = os.path.join(folder, str(n_points))
+            os.makedirs(size_folder, exist_ok=True)
+            convert_rows, outputs = bench_converters(size_folder, n_points, storage_format, repeat)
+            rows += convert_rows + bench_analysis(size_folder, n_points, outputs, repeat)
+            print(f'{n_points} points done')
+    table = pd.DataFrame(rows)
+    with pd.option_context('display.width', 160, 'display.max_rows', None, 'display.float_format', '{:.4g}'.format):
+        print(table.to_string(index=False))
+    if csv_path:
+        table.insert(0, 'Timestamp', pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'))
+        table.insert(1, 'Storage Format', storage_format)
+        # 追加写入，便于跟踪多次运行的变化
+        table.to_csv(csv_path, mode='a', header=not os.path.exists(csv_path), index=False)
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='每个文件的数据点数')
+    parser.add_argument('--format', default='parquet', choices=['excel', 'parquet', 'feather'], help='输出格式')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--folder', help='保留合成文件与输出文件的文件夹，默认使用临时文件夹')
+    parser.add_argument('--csv', help='把结果追加到该CSV文件')
+    args = parser.parse_args()
+    main(args.sizes, args.format, args.repeat, args.folder, args.csv)
@@ -0,0 +1,70 @@
+"""批量导出曲线图的速度：每张图新建pyplot图形（旧的做法）与复用Agg模板只替换数据的对比，单位为张/s"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from core.render import render  # noqa: E402
+
+
+def synthetic_cv(n_points, seed):
+    """一圈循环伏安曲线"""
+    rng = np.random.default_rng(seed)
+    potential = np.concatenate([np.linspace(-0.5, 0.5, n_points // 2), np.linspace(0.5, -0.5, n_points // 2)])
+    current = 1e-4 * potential + 2e-5 * np.sin(6 * potential) + 1e-6 * rng.standard_normal(potential.size)
+    return pd.DataFrame({'Potential[V]': potential, 'Current[A]': current})
+
+
+def pyplot_cv(df, curve_label, save_path, dpi):
+    """与原来的CV_plot相同：每张图新建图形、重新计算布局"""
+    import matplotlib.pyplot as plt
+
+    plt.rcParams['font.sans-serif'] = ['simhei']
+    plt.rcParams['axes.unicode_minus'] = False
+    plt.figure()
+    plt.plot(df['Potential[V]'], df['Current[A]'], label=curve_label)
+    plt.xlabel('Potential[V]')
+    plt.ylabel('Current[A]')
+    plt.ticklabel_format(style='sci', axis='y', scilimits=(0, 0))
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=dpi)
+    plt.close()
+    return save_path
+
+
+def main(n_figures=30, n_points=2000, dpi=150, fig_format='png'):
+    frames = [synthetic_cv(n_points, seed) for seed in range(n_figures)]
+    with tempfile.TemporaryDirectory() as folder:
+        rows = {}
+        for name, plot in (('pyplot per figure', lambda df, label, path: pyplot_cv(df, label, path, dpi)),
+                           ('reused Agg template', lambda df, label, path: render('CV', df, label, path, dpi,
+                                                                                  fig_format))):
+            # 第一张图包含模板构建与字体加载，单独计时
+            start = time.perf_counter()
+            plot(frames[0], 'curve 0', os.path.join(folder, f'{name}_0.{fig_format}'))
+            first = time.perf_counter() - start
+            start = time.perf_counter()
+            for i, df in enumerate(frames[1:], 1):
+                plot(df, f'curve {i}', os.path.join(folder, f'{name}_{i}.{fig_format}'))
+            rows[name] = (first, (n_figures - 1) / (time.perf_counter() - start))
+
+    print(f'{n_figures} figures, {n_points} points, dpi={dpi}, format={fig_format}')
+    print(f'{"method":<24}{"first[s]":>10}{"figs/s":>10}')
+    for name, (first, rate) in rows.items():
+        print(f'{name:<24}{first:>10.3f}{rate:>10.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--figures', type=int, default=30)
+    parser.add_argument('--points', type=int, default=2000)
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--format', default='png', choices=('png', 'jpg', 'svg', 'pdf'))
+    args = parser.parse_args()
+    main(args.figures, args.points, args.dpi, args.format)
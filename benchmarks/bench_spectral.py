@@ -0,0 +1,84 @@
+"""avantes光谱计算的速度：原来逐列/逐元素的pandas实现与二维数组矩阵运算（有无重采样矩阵缓存）的对比，并检查两者结果一致"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import interp1d
+
+from benchmarks import timeit
+from core.converters.avantes import absorbance_calculation, dataframe_interpolation
+from utils import spectral
+
+
+def synthetic_avantes(n_pixels=2048, n_scans=1000, seed=0):
+    """与AvaSoft导出格式相同的数据：波长（非整数）、dark、reference、n_scans条光谱"""
+    rng = np.random.default_rng(seed)
+    wavelength = np.linspace(187.3, 1100.7, n_pixels) + rng.uniform(-0.05, 0.05, n_pixels)
+    dark = 1000 + rng.normal(0, 5, n_pixels)
+    reference = dark + 30000 * np.exp(-((wavelength - 600) / 250) ** 2) + 10
+    data = {'Wavelength[nm]': np.sort(wavelength), 'dark': dark, 'reference': reference}
+    for i in range(n_scans):
+        data[f'{i * 0.5}s'] = dark + (reference - dark) * (0.5 + 0.4 * np.sin(wavelength / 40 + i / 50))
+    return pd.DataFrame(data)
+
+
+# ---原来的实现---
+def legacy_interpolation(df, interpolation_parameters):
+    start, end, interval, kind = interpolation_parameters
+    x_column = df.columns[0]
+    new_x = np.arange(start, end + interval, interval)
+    interpolated_data = {x_column: new_x}
+    f_objects = {column: interp1d(df[x_column], df[column], kind=kind) for column in df.columns[1:]}
+    for column, f in f_objects.items():
+        interpolated_data[column] = f(new_x)
+    return pd.DataFrame(interpolated_data)
+
+
+def legacy_absorbance(df):
+    wavelength_column = df.iloc[:, 0]
+    background = df.iloc[:, 1]
+    reference = df.iloc[:, 2]
+    transmittance_df = df.iloc[:, 3:].sub(background, axis=0)
+    reference = reference - background
+    transmittance_df = transmittance_df.div(reference, axis=0)
+    result_df = pd.concat([wavelength_column, transmittance_df], axis=1)
+    result_df.iloc[:, 1:] = result_df.iloc[:, 1:].apply(
+        lambda x: -np.log10(x.apply(lambda value: value if value > 0 else 1e-10)))
+    return result_df
+
+
+def uncached_interpolation(df, interpolation_parameters):
+    """每次先清空重采样矩阵缓存，相当于每个文件都是第一个文件"""
+    spectral._matrix_cache.clear()
+    return dataframe_interpolation(df, interpolation_parameters)
+
+
+def main(n_pixels=2048, n_scans=1000, kinds=('linear', 'cubic'), repeat=3):
+    df = synthetic_avantes(n_pixels, n_scans)
+    print(f'{n_pixels} pixels x {n_scans} scans')
+    print(f'{"step":<30}{"legacy[s]":>11}{"vectorized[s]":>15}{"speedup":>9}{"max abs diff":>14}')
+    for kind in kinds:
+        parameters = [300.0, 1100.0, 1.0, kind]
+        legacy_time, expected = timeit(legacy_interpolation, df, parameters, repeat=repeat)
+        # 清空重采样矩阵缓存为第一个文件的用时，不清空为同一探测器后续文件的用时
+        for label, func in (('', uncached_interpolation), (' cached', dataframe_interpolation)):
+            new_time, result = timeit(func, df, parameters, repeat=repeat)
+            diff = np.nanmax(np.abs(result.to_numpy() - expected.to_numpy()))
+            print(f'{"interpolation " + kind + label:<30}{legacy_time:>11.3f}{new_time:>15.3f}'
+                  f'{legacy_time / new_time:>8.1f}x{diff:>14.2e}')
+
+    interpolated = dataframe_interpolation(df, [300.0, 1100.0, 1.0, 'linear'])
+    legacy_time, expected = timeit(legacy_absorbance, interpolated, repeat=repeat)
+    new_time, result = timeit(absorbance_calculation, interpolated, repeat=repeat)
+    diff = np.nanmax(np.abs(result.to_numpy(dtype=float) - expected.to_numpy(dtype=float)))
+    print(f'{"absorbance":<30}{legacy_time:>11.3f}{new_time:>15.3f}{legacy_time / new_time:>8.1f}x{diff:>14.2e}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pixels', type=int, default=2048)
+    parser.add_argument('--scans', type=int, default=1000)
+    parser.add_argument('--kind', action='append', help="插值方法，默认测试 linear 与 cubic")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.pixels, args.scans, tuple(args.kind or ('linear', 'cubic')), args.repeat)
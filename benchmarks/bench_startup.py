@@ -0,0 +1,117 @@
+"""页面启动耗时：一次性导入所有工具模块与按需导入单个工具模块的对比，以及页面冷启动与重跑的延迟"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = {'preprocess': os.path.join('pages', '0_data_preprocess.py'),
+         'process': os.path.join('pages', '1_data_process.py')}
+
+# 在新的python进程中导入模块，排除解释器本身的启动时间
+IMPORT_SCRIPT = '''
+import importlib, json, sys, time
+failed = []
+start = time.perf_counter()
+for module_path in sys.argv[1:]:
+    try:
+        importlib.import_module(module_path)
+    except Exception as e:
+        failed.append(f'{module_path}: {type(e).__name__}: {e}')
+print(json.dumps({'time': time.perf_counter() - start, 'failed': failed}))
+'''
+
+# 用streamlit的AppTest运行页面：第一次运行为冷启动，切换到某个工具后的第一次运行包含该模块的导入，再次运行为重跑
+APP_SCRIPT = '''
+import json, sys, time
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+page, options = sys.argv[1], json.loads(sys.argv[2])
+start = time.perf_counter()
+AppTest.from_file(page, default_timeout=120).run()
+rows = {'cold start': time.perf_counter() - start}
+for option in options:
+    # 每个工具用新的会话并清空缓存，避免上一个会话遗留的控件状态
+    st.cache_data.clear()
+    at = AppTest.from_file(page, default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+    try:
+        if option != options[0]:
+            at.sidebar.selectbox[0].set_value(option)
+            start = time.perf_counter()
+            at.run()
+            first = time.perf_counter() - start
+        start = time.perf_counter()
+        at.run()
+        # 缓存函数中使用控件的提示是警告，不算页面出错
+        rows[option] = (first, time.perf_counter() - start, any(not e.is_warning for e in at.exception))
+    except Exception as e:
+        print(f'{option}: {type(e).__name__}: {e}', file=sys.stderr)
+        rows[option] = (None, None, True)
+print(json.dumps(rows))
+'''
+
+
+def read_tools(page_path):
+    """从页面文件中解析工具注册表，不执行页面本身"""
+    with open(os.path.join(ROOT, page_path), encoding='utf-8') as file:
+        tree = ast.parse(file.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(target, 'id', None) == 'TOOLS' for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f'{page_path} 中没有TOOLS注册表')
+
+
+def _run(script, *args):
+    output = subprocess.run([sys.executable, '-c', script, *args], cwd=ROOT, capture_output=True, text=True,
+                            env={**os.environ, 'MPLBACKEND': 'Agg'})
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def import_time(module_paths, repeat=3):
+    """在新进程中导入模块的用时[s]（多次取最短）与导入失败的模块"""
+    results = [_run(IMPORT_SCRIPT, *module_paths) for _ in range(repeat)]
+    return min(result['time'] for result in results), results[0]['failed']
+
+
+def main(pages=tuple(PAGES), app=True, repeat=3):
+    for page in pages:
+        tools = read_tools(PAGES[page])
+        module_paths = [module_path for module_path, _ in tools.values()]
+
+        eager_time, failed = import_time(module_paths, repeat)
+        print(f'[{page}] {PAGES[page]}')
+        print(f'eager import of all {len(module_paths)} tools: {eager_time:.3f}s')
+        for message in failed:
+            print(f'  import failed (missing optional dependency?): {message}')
+
+        print(f'{"tool":<36}{"lazy import[s]":>16}{"vs eager":>10}')
+        for option, (module_path, _) in tools.items():
+            lazy_time, _ = import_time([module_path], repeat)
+            print(f'{option:<36}{lazy_time:>16.3f}{eager_time / max(lazy_time, 1e-9):>9.1f}x')
+
+        if app:
+            rows = _run(APP_SCRIPT, PAGES[page], json.dumps(list(tools), ensure_ascii=False))
+            print(f'page cold start (default tool): {rows.pop("cold start"):.3f}s')
+            print(f'{"tool":<36}{"first run[s]":>14}{"rerun[s]":>10}')
+            for option, (first, rerun, error) in rows.items():
+                if first is None:
+                    print(f'{option:<36}{"-":>14}{"-":>10}  (page raised)')
+                else:
+                    print(f'{option:<36}{first:>14.3f}{rerun:>10.3f}{"  (page raised)" if error else ""}')
+        print()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page', choices=list(PAGES), action='append', help='默认测试所有页面')
+    parser.add_argument('--no-app', action='store_true', help='只测试模块导入，不用AppTest运行页面')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.page or tuple(PAGES), not args.no_app, args.repeat)
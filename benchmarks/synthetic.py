@@ -0,0 +1,256 @@
+"""
+各仪器原始数据的合成文件：格式与仪器软件导出的文件一致（表头行、分隔符、编码），数值按物理模型加噪声生成，
+可以被 core.ingest.sniff 识别并被对应的转换函数处理
+
+命令行生成一个测试目录：python -m benchmarks.synthetic D:/bench_data --size 100000
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# 生成函数的注册表：仪器名（与 core.ingest.CONVERTERS 一致）→ 生成函数
+GENERATORS = {}
+
+
+def generator(instrument):
+    def register(func):
+        GENERATORS[instrument] = func
+        return func
+    return register
+
+
+def _triangle(n_points, low=-0.5, high=0.5, cycles=1):
+    """循环伏安的三角波电位"""
+    phase = np.linspace(0, cycles, n_points, endpoint=False)
+    return low + (high - low) * (1 - np.abs(2 * (phase % 1) - 1))
+
+
+def _cv_current(potential, rng):
+    """电容电流 + 一对氧化还原峰 + 噪声"""
+    direction = np.sign(np.gradient(potential))
+    peak = 2e-5 * np.exp(-((potential - 0.1 * direction) / 0.05) ** 2) * direction
+    return 1e-5 * direction + 1e-4 * potential + peak + 1e-7 * rng.standard_normal(potential.size)
+
+
+def _transient(n_points, tm=5.0, Im=1e-3, rng=None):
+    """3D瞬时成核的恒电位I-t曲线"""
+    time = np.linspace(1e-3, 10 * tm, n_points)
+    t_normalized = time / tm
+    current = Im * ((1.954 / t_normalized) ** 0.5) * (1 - np.exp(-1.2564 * t_normalized)) / 0.9999
+    return time, current + 1e-3 * Im * rng.standard_normal(n_points)
+
+
+@generator('keithley')
+def keithley_txt(folder, n_points, seed=0, mode='I-V'):
+    """
+    keithley 测试软件导出的txt：制表符分隔，第一行数据后面跟着测试模式（'I-V测试数据' 或 'I-t测试数据'）
+    :param mode: 'I-V' 或 'I-t'
+    """
+    rng = np.random.default_rng(seed)
+    if mode == 'I-V':
+        potential = np.linspace(-1, 1, n_points)
+        data = np.column_stack([potential, 1e3 * (potential / 1e4 + 1e-7 * rng.standard_normal(n_points))])
+    else:
+        time, current = _transient(n_points, rng=rng)
+        data = np.column_stack([time, np.full(n_points, 0.8), 1e3 * current])
+    path = os.path.join(folder, f'keithley_{mode}_{n_points}.txt')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('\t'.join(f'{value:.6e}' for value in data[0]) + f'\t{mode}测试数据\n')
+        np.savetxt(file, data[1:], fmt='%.6e', delimiter='\t')
+    return path
+
+
+CHI_HEADERS = {
+    'CV': ('循环伏安法', ['Init E (V) = -0.5', 'High E (V) = 0.5', 'Low E (V) = -0.5', 'Scan Rate (V/s) = 0.1',
+                          'Segment = 2', 'Sample Interval (V) = 0.001', 'Quiet Time (sec) = 2',
+                          'Sensitivity (A/V) = 1e-4'], 'Potential/V, Current/A'),
+    'LSV': ('线性扫描伏安法', ['Init E (V) = -0.5', 'Final E (V) = 0.5', 'Scan Rate (V/s) = 0.05',
+                               'Sample Interval (V) = 0.001', 'Quiet Time (sec) = 2'], 'Potential/V, Current/A'),
+    'OCP': ('开路电位-时间', ['Run Time (sec) = 3600', 'Sample Interval (s) = 0.1', 'High E Limit (V) = 1',
+                              'Low E Limit (V) = -1'], 'Time/sec, Potential/V'),
+}
+
+
+@generator('CHI')
+def chi_txt(folder, n_points, seed=0, mode='CV'):
+    """
+    CHI 电化学工作站导出的txt：第二行为中文的测试方法，之后是参数行，数据标题行下空一行开始为逗号分隔的数据
+    :param mode: 'CV' / 'LSV' / 'OCP'
+    """
+    rng = np.random.default_rng(seed)
+    method, parameters, title = CHI_HEADERS[mode]
+    if mode == 'CV':
+        potential = _triangle(n_points, cycles=max(n_points // 2000, 1))
+        data = np.column_stack([potential, _cv_current(potential, rng)])
+    elif mode == 'LSV':
+        potential = np.linspace(-0.5, 0.5, n_points)
+        data = np.column_stack([potential, 1e-4 * np.exp(potential * 5) * 1e-2 + 1e-8 * rng.standard_normal(n_points)])
+    else:
+        time = np.arange(n_points) * 0.1
+        data = np.column_stack([time, 0.2 + 0.01 * np.exp(-time / 100) + 1e-4 * rng.standard_normal(n_points)])
+    path = os.path.join(folder, f'CHI_{mode}_{n_points}.txt')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('Mar. 1, 2024   10:00:00\n')
+        file.write(f'{method}\n')
+        file.write(f'File: {os.path.basename(path)}\nData Source: Experiment\nInstrument Model:  CHI760E\n')
+        file.write('\n'.join(parameters) + '\n\n')
+        file.write(f'{title}\n\n')
+        np.savetxt(file, data, fmt='%.6e', delimiter=', ')
+    return path
+
+
+@generator('ichy')
+def ichy_csv(folder, n_points, seed=0):
+    """ichy 电化学工作站导出的CV csv：11行固定的参数行（第二行为测试方法），之后为电位、电流两列"""
+    rng = np.random.default_rng(seed)
+    potential = _triangle(n_points, cycles=max(n_points // 2000, 1))
+    header = [('Instrument', 'ichy'), ('Technique', 'CV - Cyclic Voltammetry'), ('Init E (mV)', '-500'),
+              ('High E (mV)', '500'), ('Low E (mV)', '-500'), ('Final E (mV)', '-500'),
+              ('Scan Rate (uV/s)', '100000'), ('Segments', '2'), ('Sample Interval (mV)', '1'),
+              ('Quiet Time (s)', '2'), ('Potential (V)', 'Current (A)')]
+    path = os.path.join(folder, f'ichy_CV_{n_points}.csv')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(','.join(row) for row in header) + '\n')
+        np.savetxt(file, np.column_stack([potential, _cv_current(potential, rng)]), fmt='%.6e', delimiter=',')
+    return path
+
+
+@generator('LANHE')
+def lanhe_csv(folder, n_points, seed=0):
+    """蓝电测试系统导出的恒流充放电csv：GB2312编码，中文列名"""
+    rng = np.random.default_rng(seed)
+    time = np.arange(n_points, dtype=float)
+    period = max(n_points // 10, 2)
+    charging = (np.arange(n_points) // period) % 2 == 0
+    current = np.where(charging, 100.0, -100.0)
+    potential = np.where(charging, (np.arange(n_points) % period) / period, 1 - (np.arange(n_points) % period) / period)
+    df = pd.DataFrame({'测试时间/Sec': time, '电流/uA': current,
+                       '电压/V': potential + 1e-4 * rng.standard_normal(n_points)})
+    path = os.path.join(folder, f'LANHE_{n_points}.csv')
+    df.to_csv(path, index=False, encoding='GB2312')
+    return path
+
+
+@generator('uv')
+def uv_sca(folder, n_points, seed=0):
+    """岛津紫外分光光度计的sca文件：'Filter:10' 行之后为空格分隔的波长与吸光度，以 '[Extended]' 结束"""
+    rng = np.random.default_rng(seed)
+    wavelength = np.linspace(1100, 190, n_points)
+    absorbance = 0.5 * np.exp(-((wavelength - 600) / 80) ** 2) + 0.05 + 1e-3 * rng.standard_normal(n_points)
+    path = os.path.join(folder, f'uv_{n_points}.sca')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('[Header]\nInstrument:UV-2600\nMeasuring Mode:Abs.\nSlit Width:2.0\nFilter:10\n')
+        np.savetxt(file, np.column_stack([wavelength, absorbance]), fmt='%.4f', delimiter=' ')
+        file.write('[Extended]\nOperator:bench\n')
+    return path
+
+
+@generator('avantes')
+def avantes_excel(folder, n_points, seed=0, n_pixels=2048):
+    """
+    AvaSoft导出的excel：第一行为 .Raw8 文件名，之后5行说明，数据为 波长、dark、reference 与每次扫描的光谱
+    :param n_points: 总数据点数，扫描次数 = n_points // n_pixels（至少1次）
+    """
+    rng = np.random.default_rng(seed)
+    n_scans = max(n_points // n_pixels, 1)
+    wavelength = np.sort(np.linspace(187.3, 1100.7, n_pixels) + rng.uniform(-0.05, 0.05, n_pixels))
+    dark = 1000 + rng.normal(0, 5, n_pixels)
+    reference = dark + 30000 * np.exp(-((wavelength - 600) / 250) ** 2) + 10
+    scans = dark[:, None] + (reference - dark)[:, None] * (
+        0.5 + 0.4 * np.sin(wavelength[:, None] / 40 + np.arange(n_scans)[None, :] / 50))
+    values = np.column_stack([wavelength, dark, reference, scans])
+    columns = ['Wavelength', 'dark.Raw8', 'reference.Raw8'] + [f'scan{i:04d}.Raw8' for i in range(n_scans)]
+    notes = pd.DataFrame([['Integration time [ms]'] + [''] * (len(columns) - 1),
+                          ['Averaging Nr. [scans]'] + [''] * (len(columns) - 1),
+                          ['Smoothing Nr. [pixels]'] + [''] * (len(columns) - 1),
+                          ['Data measured with spectrometer name'] + [''] * (len(columns) - 1),
+                          ['Wave'] + ['Scope'] * (len(columns) - 1)], columns=columns)
+    df = pd.concat([notes, pd.DataFrame(values, columns=columns)], ignore_index=True)
+    path = os.path.join(folder, f'avantes_scan0.5s_{n_pixels}x{n_scans}.xlsx')
+    df.to_excel(path, index=False)
+    return path
+
+
+@generator('olympus')
+def olympus_csv(folder, n_points, seed=0, data_type='Height'):
+    """
+    奥林巴斯激光共聚焦导出的csv：前18行为测量信息（包含 .poir 文件名、数据类型与分辨率），
+    第19行为列号，之后每行以行号开头、以逗号结尾
+    :param n_points: 总数据点数，图像为 边长×边长 的方阵
+    """
+    rng = np.random.default_rng(seed)
+    side = max(int(np.sqrt(n_points)), 2)
+    y, x = np.mgrid[0:side, 0:side] / side
+    height = 5 * np.exp(-((x - 0.5) ** 2 + (y - 0.5) ** 2) / 0.05) + 0.05 * rng.standard_normal((side, side))
+    path = os.path.join(folder, f'olympus_{side}x{side}.csv')
+    info = [('Item', 'Value'), ('File Name', f'C:\\Data\\olympus_{side}x{side}.poir'), ('Data Type', data_type),
+            ('XY Resolution', '0.625'), ('Z Resolution', '0.01'), ('Objective', 'MPLAPON50X')]
+    info += [(f'Reserved{i}', '') for i in range(18 - len(info))]
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(','.join(row) for row in info) + '\n')
+        file.write(',' + ','.join(str(i) for i in range(side)) + ',\n')
+        for i, row in enumerate(height):
+            file.write(f'{i},' + ','.join(f'{value:.4f}' for value in row) + ',\n')
+    return path
+
+
+@generator('XRD')
+def xrd_txt(folder, n_points, seed=0):
+    """XRD导出的txt：若干说明行，数据为空格分隔的 2θ 与强度"""
+    rng = np.random.default_rng(seed)
+    two_theta = np.linspace(10, 80, n_points)
+    intensity = 100 + sum(2000 * np.exp(-((two_theta - center) / 0.2) ** 2) for center in (25.3, 37.8, 48.0, 55.1))
+    intensity = intensity + 10 * rng.standard_normal(n_points)
+    path = os.path.join(folder, f'XRD_{n_points}.txt')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('Sample: bench\nScan axis: 2Theta/Theta\n')
+        np.savetxt(file, np.column_stack([two_theta, intensity]), fmt='%.4f', delimiter=' ')
+    return path
+
+
+@generator('FTIR')
+def ftir_csv(folder, n_points, seed=0):
+    """FTIR导出的csv：没有表头，波数与透过率两列"""
+    rng = np.random.default_rng(seed)
+    wavenumber = np.linspace(4000, 400, n_points)
+    transmittance = 90 - sum(40 * np.exp(-((wavenumber - center) / 15) ** 2) for center in (2920, 1730, 1100))
+    transmittance = transmittance + 0.1 * rng.standard_normal(n_points)
+    path = os.path.join(folder, f'FTIR_{n_points}.csv')
+    np.savetxt(path, np.column_stack([wavenumber, transmittance]), fmt='%.4f', delimiter=',')
+    return path
+
+
+@generator('Step')
+def step_xml(folder, n_points, seed=0):
+    """台阶仪导出的xml：XUnits/ZUnits 为单位，DataBlock 中每个点有 X 与 Z"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 2000, n_points)
+    z = np.where((x > 800) & (x < 1200), 150.0, 0.0) + rng.standard_normal(n_points)
+    path = os.path.join(folder, f'Step_{n_points}.xml')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('<?xml version="1.0" encoding="utf-8"?>\n<Profile>\n<XUnits>um</XUnits>\n<ZUnits>nm</ZUnits>\n')
+        file.write('<DataBlock>\n')
+        file.writelines(f'<Point><X>{xi:.4f}</X><Z>{zi:.4f}</Z></Point>\n' for xi, zi in zip(x, z))
+        file.write('</DataBlock>\n</Profile>\n')
+    return path
+
+
+def generate_all(folder, n_points, seed=0):
+    """
+    为每种仪器生成一个文件
+    :return: {仪器名: 文件路径}
+    """
+    os.makedirs(folder, exist_ok=True)
+    return {instrument: func(folder, n_points, seed) for instrument, func in GENERATORS.items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='生成各仪器格式的合成原始数据')
+    parser.add_argument('folder', help='输出文件夹')
+    parser.add_argument('--size', type=int, default=10_000, help='每个文件的数据点数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    for instrument, path in generate_all(args.folder, args.size, args.seed).items():
+        print(f'{instrument:<10}{path}')
@@ -0,0 +1,5 @@
+"""
+不依赖streamlit的数据处理库：转换（converters、ingest）、合并（merge）、分段（segmentation）、归一化（normalize）
+与I-t分析（analysis）的函数只返回结构化结果（输出文件路径、DataFrame、字典），出错时抛出异常；
+streamlit页面只负责收集参数与显示结果，命令行入口见 core.cli（python -m core）
+"""
@@ -0,0 +1,187 @@
+"""电化学聚合I-t曲线的成核分析：读取数据、成核模型拟合与Avrami拟合，保存分析结果与汇总表"""
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from core.storage import collect_records, load_record, save_record
+from utils import nucleation
+from utils.nucleation import model_2DI, model_2DP, model_3DI, model_3DP
+
+
+def transient_files(folder_path, recursive=False):
+    """文件夹内文件名包含 'It' 的数据文件（xlsx/parquet/feather），跳过分析结果"""
+    return [file for file in collect_records(folder_path, recursive)
+            if 'It' in os.path.basename(file) and '_analysis' not in file]
+
+
+def load_transient(file_path):
+    """
+    读取数据文件（excel/parquet/feather）中的It数据
+    :return: (数据表, 时间数组, 电流数组)
+    """
+    data, _, _ = load_record(file_path)
+    if 'Time[s]' not in data.columns or 'Current[A]' not in data.columns:
+        raise ValueError(f'{os.path.basename(file_path)} 中没有 Time[s] 与 Current[A] 列')
+    return data, data['Time[s]'].values, data['Current[A]'].values
+
+
+# 保存数据到 Excel
+def save_to_excel(output_file_path, Im, tm, t_normalized, I_normalized, charge, charge_normalized, ln_term, t_linear,
+                  ln_term_linear, slope, intercept, time_valid, time):
+    with pd.ExcelWriter(output_file_path, engine='xlsxwriter') as writer:
+        # 保存峰值电流和时间
+        df_peak = pd.DataFrame({'Im (A)': [Im], 'tm (s)': [tm]})
+        df_peak.to_excel(writer, sheet_name='Im_value', index=False)
+
+        # 保存图2的数据
+        df2 = pd.DataFrame({'t/tm': t_normalized, 'I/Im': I_normalized})
+        df2.to_excel(writer, sheet_name='Im_curve', index=False)
+
+        # 保存图3的数据
+        df3 = pd.DataFrame({'Time(s)': time, 'Charge(C)': charge})
+        df3.to_excel(writer, sheet_name='Ct', index=False)
+
+        # 保存图4的数据
+        df4_all = pd.DataFrame({
+            'ln(t)': np.log(time_valid),
+            'ln(-ln(1 - y(t)))': ln_term
+        })
+        df4_all.to_excel(writer, sheet_name='Avrami', startrow=0, index=False)
+
+        # 然后在 Sheet4 中的不同列保存拟合曲线数据
+        df4_fit = pd.DataFrame({
+            'ln(t)_fitted': t_linear,
+            'Fitted ln(-ln(1 - y(t)))': slope * t_linear + intercept
+        })
+        # 在 Sheet4 中的不同列存储拟合数据
+        df4_fit.to_excel(writer, sheet_name='Avrami', startrow=0, startcol=2, index=False)  # startcol=2 表示从第3列开始
+    return output_file_path
+
+
+# 绘图并保存图片
+def plot_and_save(time, current, t_normalized, I_normalized, Im, tm,
+                  charge, ln_term, t_linear, ln_term_linear, slope, intercept, I_3DI, I_3DP,
+                  I_2DI, I_2DP, t_fit, save_path, time_valid):
+    plt.figure(figsize=(12, 10))
+
+    # 图1: 电流随时间变化
+    plt.subplot(2, 2, 1)
+    plt.plot(time, current, label=f'tm{tm:.4f}s,Im{Im:.4f}A', color='blue')
+    plt.xlabel('时间 (s)', fontsize=12)
+    plt.ylabel('电流 (A)', fontsize=12)
+    plt.title('电流随时间变化', fontsize=14)
+    plt.legend()
+    plt.grid(True)
+
+    # 图2: 归一化电流与时间及模型拟合
+    plt.subplot(2, 2, 2)
+    plt.scatter(t_normalized, I_normalized, label='实验数据', color='black', s=2)
+    plt.plot(t_fit, I_3DI, label='3DI 模型', linestyle='-', color='blue')
+    plt.plot(t_fit, I_3DP, label='3DP 模型', linestyle='--', color='cyan')
+    plt.plot(t_fit, I_2DI, label='2DI 模型', linestyle='-.', color='green')
+    plt.plot(t_fit, I_2DP, label='2DP 模型', linestyle=':', color='red')
+    plt.xlabel('无量纲时间 (t/tm)', fontsize=12)
+    plt.ylabel('无量纲电流 (I/Im)', fontsize=12)
+    plt.xlim(0, 5)
+    plt.ylim(0, 1.3)
+    plt.title('归一化电流与时间及模型拟合', fontsize=14)
+    plt.legend()
+    plt.grid(True)
+
+    # 图3: 电荷量随时间变化
+    plt.subplot(2, 2, 3)
+    plt.plot(time, charge, label='电荷随时间变化', color='blue')
+    plt.xlabel('时间 (s)', fontsize=12)
+    plt.ylabel('电荷量 (C)', fontsize=12)
+    plt.title('电荷量随时间变化', fontsize=14)
+    plt.legend()
+    plt.grid(True)
+
+    # 图4: ln(-ln(1 - y(t))) vs ln(t) 及线性拟合
+    plt.subplot(2, 2, 4)
+
+    # 绘制所有有效数据点
+    plt.scatter(np.log(time_valid), ln_term, label='所有数据点', color='lightgray', s=2)
+
+    # 绘制拟合区域的数据点
+    plt.scatter(t_linear, ln_term_linear, label='拟合数据点', color='purple', s=2)
+
+    # 绘制拟合线
+    plt.plot(t_linear, slope * t_linear + intercept, label=f'线性拟合: y={slope:.4f}x + {intercept:.4f}',
+             linestyle='--', color='red')
+
+    plt.xlabel('ln(t)', fontsize=12)
+    plt.ylabel('ln(-ln(1 - y(t)))', fontsize=12)
+    plt.title('ln(-ln(1 - y(t))) vs ln(t)及线性拟合', fontsize=14)
+    plt.legend()
+    plt.grid(True)
+
+    # 设置支持中文的字体
+    plt.rcParams['font.family'] = 'SimHei'  # 设置字体为黑体
+    plt.rcParams['axes.unicode_minus'] = False  # 解决负号 '-' 显示问题
+    plt.tight_layout()
+
+    # 保存图像
+    plt.savefig(save_path)
+    plt.close()
+    return save_path
+
+
+def It_summary(file_path, prominence=None, width=None, save_excel=False, save_plot=False):
+    """
+    分析单个I-t数据文件（批处理的工作函数）
+    :param save_excel: 是否保存该文件的 _analysis.xlsx
+    :param save_plot: 是否绘制该文件的 _analysis_plot.png，绘图最耗时，默认推迟到需要时再画
+    :return: 汇总表的一行；保存了分析excel/图片时包含 Analysis Excel/Analysis Plot 列
+    """
+    _, time, current = load_transient(file_path)
+    result = nucleation.analyze_transient(time, current, prominence, width)
+    output_path = os.path.splitext(file_path)[0]
+    saved = {}
+
+    if save_excel:
+        excel_path = save_to_excel(output_path + '_analysis.xlsx', result['Im'], result['tm'], result['t_normalized'],
+                                   result['I_normalized'], result['charge'], result['charge_normalized'],
+                                   result['ln_term'], result['t_linear'], result['ln_term_linear'], result['slope'],
+                                   result['intercept'], result['time_valid'], result['time'])
+        saved['Analysis Excel'] = excel_path
+    if save_plot:
+        t_fit = np.linspace(0.01, 5, 500)
+        plot_path = plot_and_save(time=result['time'], current=result['current'], t_normalized=result['t_normalized'],
+                                  I_normalized=result['I_normalized'], Im=result['Im'], tm=result['tm'],
+                                  charge=result['charge'], ln_term=result['ln_term'], t_linear=result['t_linear'],
+                                  ln_term_linear=result['ln_term_linear'], slope=result['slope'],
+                                  intercept=result['intercept'], I_3DI=model_3DI(t_fit), I_3DP=model_3DP(t_fit),
+                                  I_2DI=model_2DI(t_fit), I_2DP=model_2DP(t_fit), t_fit=t_fit,
+                                  save_path=output_path + '_analysis_plot.png', time_valid=result['time_valid'])
+        saved['Analysis Plot'] = plot_path
+
+    residuals = result['residuals']
+    row = {'File Name': os.path.basename(file_path), 'Im (A)': result['Im'], 'tm (s)': result['tm'],
+           'Peak found': result['found'], 'Avrami slope': result['slope'],
+           'Avrami intercept': result['intercept'], 'Avrami R2': result['r_squared']}
+    row.update({f'RMSE {name}': value for name, value in residuals.items()})
+    row['Best model'] = min(residuals, key=lambda name: np.nan_to_num(residuals[name], nan=np.inf))
+    row.update(saved)
+    return row
+
+
+def summary_table(results):
+    """
+    把批处理中 It_summary 的结果整理为汇总表
+    :param results: run_batch 返回的逐文件结果
+    :return: 汇总表 DataFrame，按文件名排序；没有成功的文件时为空表
+    """
+    rows = [result['Output'] for result in results if result['Status'] == 'success']
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).sort_values('File Name', ignore_index=True)
+
+
+def save_summary(summary_df, output_folder, prominence=None, width=None, storage_format='excel', excel_copy=False):
+    """保存汇总表，返回文件路径"""
+    return save_record(
+        summary_df, os.path.join(output_folder, f'It_analysis_summary_{os.path.basename(output_folder)}.xlsx'),
+        'It_summary', {'prominence': prominence, 'width': width}, storage_format, excel_copy)
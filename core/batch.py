@@ -0,0 +1,101 @@
+"""批量处理引擎：将逐文件的处理函数分发到进程池中并行执行，按完成顺序返回结构化结果（页面与命令行共用）"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from core import manifest, profiling
+
+
+def default_workers():
+    """默认并行进程数：保留一个核心给streamlit服务或其他任务"""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def collect_files(folder, suffixes, recursive=False, ignore_case=False):
+    """
+    收集文件夹内指定后缀的文件路径
+    :param folder: 文件夹路径
+    :param suffixes: 后缀字符串或后缀元组，例如 '.txt' 或 ('.xlsx', '.parquet')
+    :param recursive: 是否遍历所有子文件夹（模式一）
+    :param ignore_case: 后缀是否忽略大小写
+    :return: 文件路径列表
+    """
+    if isinstance(suffixes, str):
+        suffixes = (suffixes,)
+    if ignore_case:
+        suffixes = tuple(suffix.lower() for suffix in suffixes)
+
+    def match(file):
+        return (file.lower() if ignore_case else file).endswith(suffixes)
+
+    if recursive:
+        return [os.path.join(root, file) for root, _, files in os.walk(folder) for file in files if match(file)]
+    return [os.path.join(folder, file) for file in os.listdir(folder) if match(file)]
+
+
+def _init_worker():
+    """工作进程初始化：画图统一使用非交互的Agg后端"""
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+
+
+def _run_one(func, file_path, kwargs, with_fingerprint=False):
+    """在工作进程中处理单个文件，只返回可序列化的结构化结果"""
+    start = time.perf_counter()
+    result = {'File': file_path}
+    profiling.begin_file()
+    try:
+        output = func(file_path, **kwargs)
+        status, message = 'success', ''
+        # 增量模式下在工作进程中顺便计算原始文件的哈希，减轻页面进程的负担
+        if with_fingerprint:
+            result['Fingerprint'] = manifest.fingerprint(file_path)
+    except Exception as e:
+        output = None
+        status, message = 'failed', f'{type(e).__name__}: {e}'
+    elapsed = time.perf_counter() - start
+    # 分阶段用时与读写字节数（原始文件与输出文件也计入）
+    result['Profile'] = profiling.end_file(elapsed, [file_path], [output] if isinstance(output, str) else [])
+    result.update({'Status': status, 'Output': output, 'Message': message, 'Time[s]': elapsed})
+    return result
+
+
+def run_batch(func, file_paths, max_workers=None, with_fingerprint=False, **kwargs):
+    """
+    将 func(file_path, **kwargs) 分发到进程池中执行，按完成顺序逐个返回结果
+    :param func: 模块顶层定义的逐文件处理函数（需要可以被pickle）
+    :param file_paths: 文件路径列表
+    :param max_workers: 并行进程数，为1时在当前进程中顺序执行
+    :param with_fingerprint: 是否同时返回原始文件的指纹（用于增量转换清单）
+    :return: 生成器，每个元素为包含 File/Status/Output/Message/Time[s] 的字典
+    """
+    max_workers = max_workers or default_workers()
+    # 只有一个文件或只用一个进程时，直接在当前进程中执行，避免进程池的启动开销
+    if max_workers == 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield _run_one(func, file_path, kwargs, with_fingerprint)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(file_paths)), initializer=_init_worker) as executor:
+        futures = {executor.submit(_run_one, func, file_path, kwargs, with_fingerprint): file_path
+                   for file_path in file_paths}
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # 工作进程崩溃或返回值无法序列化
+                    yield {'File': futures[future], 'Status': 'failed', 'Output': None,
+                           'Message': f'{type(e).__name__}: {e}', 'Time[s]': None}
+        finally:
+            # 提前停止（任务被取消或页面重新运行）时不再执行尚未开始的文件
+            executor.shutdown(cancel_futures=True)
+
+
+def summarize(results):
+    """将逐文件结果整理为汇总表"""
+    columns = ['File', 'Status', 'Output', 'Message', 'Time[s]']
+    summary = pd.DataFrame(results, columns=columns)
+    summary['Output'] = summary['Output'].apply(lambda x: x if isinstance(x, str) else '')
+    return summary
@@ -0,0 +1,166 @@
+"""
+命令行入口：不启动streamlit，在目录树上并行运行转换、分段、合并、归一化与I-t分析，适合定时任务或计算节点，例如：
+python -m core convert D:\\data --workers 8 --format parquet --incremental
+python -m core segment D:\\data --cv-hysteresis 0.001
+python -m core merge D:\\data --kind Transmittance
+python -m core normalize D:\\data --type max --global
+python -m core analyze D:\\data --save-excel
+逐个文件输出处理结果，结束后输出汇总；有文件处理失败时退出码为1
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import pandas as pd  # noqa: E402
+
+from core import analysis, ingest, manifest, merge, normalize, profiling, segmentation  # noqa: E402
+from core.batch import default_workers, run_batch, summarize  # noqa: E402
+from core.storage import STORAGE_FORMATS  # noqa: E402
+
+# 命令行中的归一化类型 → core.normalize 中的归一化类型
+NORMALIZATION_CHOICES = {'maxmin': '最大最小值归一化', 'max': '最大值归一化'}
+
+
+def storage_options(args):
+    return {'storage_format': args.format, 'excel_copy': args.excel_copy}
+
+
+# ---各命令：返回 (逐文件处理函数, 文件路径列表, 处理函数的参数)---
+def convert_tasks(args):
+    detected, unknown = ingest.sniff_tree(args.root)
+    if unknown:
+        print(f'{len(unknown)}个文件无法识别仪器格式，已跳过')
+    return ingest.convert_file, sorted(detected), storage_options(args)
+
+
+def segment_tasks(args):
+    return segmentation.segment_record, segmentation.segment_files(args.root, recursive=True), {
+        'cv_hysteresis': args.cv_hysteresis, 'gcd_hysteresis': args.gcd_hysteresis, **storage_options(args)}
+
+
+def merge_tasks(args):
+    return merge.merge_folder, merge.merge_folders(args.root, args.kind), {
+        'kind': args.kind, 'tolerance': args.tolerance, 'fit_check': args.fit, 'w_l_value': args.w_l,
+        **storage_options(args)}
+
+
+def normalize_tasks(args):
+    return normalize.excel_normalize, normalize.normalize_files(args.root, recursive=True), {
+        'row_normalize_select': not args.global_only, 'global_normalize_select': args.global_only or args.both,
+        'normalization_type': NORMALIZATION_CHOICES[args.type], **storage_options(args)}
+
+
+def analyze_tasks(args):
+    return analysis.It_summary, analysis.transient_files(args.root, recursive=True), {
+        'prominence': args.prominence or None, 'width': args.width or None, 'save_excel': args.save_excel,
+        'save_plot': args.save_plot}
+
+
+def run(func, file_paths, max_workers=None, incremental=False, **kwargs):
+    """
+    并行处理所有文件，逐个输出结果
+    :return: (逐文件结果列表, 因未变化而跳过的结果列表)
+    """
+    skipped = []
+    if incremental:
+        file_paths, skipped = manifest.split_changed(func, file_paths, kwargs)
+        if skipped:
+            print(f'{len(skipped)}个文件未变化，已跳过')
+
+    results = []
+    for i, result in enumerate(run_batch(func, file_paths, max_workers, with_fingerprint=incremental, **kwargs),
+                               start=1):
+        results.append(result)
+        if result['Status'] == 'success' and result['Output'] is None:
+            print(f"[{i}/{len(file_paths)}] skip    {result['File']} 无需处理")
+        elif result['Status'] == 'success':
+            output = f" -> {result['Output']}" if isinstance(result['Output'], (str, list)) else ''
+            print(f"[{i}/{len(file_paths)}] ok      {result['File']}{output} ({result['Time[s]']:.2f}s)")
+        else:
+            print(f"[{i}/{len(file_paths)}] failed  {result['File']}: {result['Message']}", file=sys.stderr)
+
+    if incremental:
+        manifest.record_results(func, results, kwargs)
+    return results, skipped
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m core', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('root', help='数据所在的目录，遍历所有子文件夹')
+    common.add_argument('--workers', type=int, default=default_workers(), help='并行进程数，为1时顺序执行')
+    common.add_argument('--format', default='excel', choices=list(STORAGE_FORMATS), help='输出文件的存储格式')
+    common.add_argument('--excel-copy', action='store_true', help='使用列式格式时同时导出一份excel')
+    common.add_argument('--report', help='把逐文件结果写入该CSV文件')
+    common.add_argument('--profile', action='store_true', help='输出各阶段的用时汇总')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('convert', parents=[common], help='自动识别仪器格式并转换原始数据')
+    command.add_argument('--incremental', action='store_true', help='跳过内容与参数均未变化的文件')
+    command.set_defaults(tasks=convert_tasks)
+
+    command = commands.add_parser('segment', parents=[common], help='CV/GCD数据分段')
+    command.add_argument('--cv-hysteresis', type=float, default=0.0, help='CV电位噪声阈值[V]')
+    command.add_argument('--gcd-hysteresis', type=float, default=0.0, help='GCD电流噪声阈值[A]')
+    command.set_defaults(tasks=segment_tasks)
+
+    command = commands.add_parser('merge', parents=[common], help='把每个文件夹内的曲线合并为一个文件')
+    command.add_argument('--kind', default='Resistance', choices=['Resistance', *merge.SPECTRA], help='数据类型')
+    command.add_argument('--tolerance', type=float, default=0.0, help='x轴（电压/波长）对齐容差')
+    command.add_argument('--fit', action='store_true', help='电阻数据合并后进行直线拟合并保存参数')
+    command.add_argument('--w-l', type=float, default=merge.W_L_VALUE, help='方阻的截面宽度/长')
+    command.set_defaults(tasks=merge_tasks)
+
+    command = commands.add_parser('normalize', parents=[common], help='数据表归一化')
+    command.add_argument('--type', default='maxmin', choices=list(NORMALIZATION_CHOICES), help='归一化类型')
+    group = command.add_mutually_exclusive_group()
+    group.add_argument('--global', dest='global_only', action='store_true', help='只进行全局归一化（所有y列一起）')
+    group.add_argument('--both', action='store_true', help='同时进行列归一化与全局归一化')
+    command.set_defaults(tasks=normalize_tasks)
+
+    command = commands.add_parser('analyze', parents=[common], help='电聚合I-t曲线分析，生成汇总表')
+    command.add_argument('--prominence', type=float, default=0.0, help='峰的最小突出度[A]，0为不过滤')
+    command.add_argument('--width', type=int, default=0, help='峰的最小宽度（数据点数），0为不过滤')
+    command.add_argument('--save-excel', action='store_true', help='保存每个文件的分析excel')
+    command.add_argument('--save-plot', action='store_true', help='绘制每个文件的分析图')
+    command.set_defaults(tasks=analyze_tasks)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.root):
+        print(f'目录不存在：{args.root}', file=sys.stderr)
+        return 2
+
+    func, file_paths, kwargs = args.tasks(args)
+    if not file_paths:
+        print('未找到需要处理的文件')
+        return 0
+    start = time.perf_counter()
+    results, skipped = run(func, file_paths, args.workers, getattr(args, 'incremental', False), **kwargs)
+    elapsed = time.perf_counter() - start
+
+    # ---汇总---
+    if args.command == 'analyze':
+        summary_df = analysis.summary_table(results)
+        if not summary_df.empty:
+            summary_path = analysis.save_summary(summary_df, args.root, kwargs['prominence'], kwargs['width'],
+                                                 args.format, args.excel_copy)
+            print(f'汇总表已保存至 {summary_path}')
+    summary = summarize(skipped + results)
+    failed = int((summary['Status'] == 'failed').sum())
+    print(f'共处理{len(results)}个文件，成功{len(results) - failed}个，失败{failed}个，跳过{len(skipped)}个，'
+          f'用时{elapsed:.1f}s（{len(results) / max(elapsed, 1e-9):.1f} 个/s）')
+    if args.profile:
+        table = profiling.profile_table(results)
+        if not table.empty:
+            with pd.option_context('display.width', 160, 'display.float_format', '{:.4g}'.format):
+                print(profiling.breakdown(table, func.__name__).drop(columns=['Timestamp']).to_string(index=False))
+    if args.report:
+        summary.to_csv(args.report, index=False, encoding='utf-8-sig')
+    return 1 if failed else 0
@@ -0,0 +1 @@
+"""各仪器原始数据的转换函数：一个仪器一个模块，输入原始文件路径，返回输出文件路径；仪器识别与分发见 core.ingest"""
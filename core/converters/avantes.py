@@ -0,0 +1,117 @@
+"""将AvaSoft导出的avantes光谱Excel数据计算为透过率/吸光度/荧光，并插值后保存"""
+import pandas as pd
+import os
+import re
+
+from core.storage import save_record
+from utils import spectral
+
+
+def _spectra_frame(wavelength_column, values, columns):
+    """由波长列与二维数组一次性生成dataframe"""
+    result_df = pd.DataFrame(values, columns=columns, index=wavelength_column.index)
+    result_df.insert(0, wavelength_column.name, wavelength_column)
+    return result_df
+
+def transmittance_calculation(df):
+    """计算透过率"""
+    # 提取波长与背景、参考数据
+    wavelength_column = df.iloc[:, 0]
+    background = df.iloc[:, 1].to_numpy(dtype=float)
+    reference = df.iloc[:, 2].to_numpy(dtype=float)
+
+    # 扣除背景后除以参比，所有光谱一次计算
+    transmittance_values = spectral.transmittance(df.iloc[:, 3:].to_numpy(dtype=float), background, reference)
+
+    # 合并数据
+    return _spectra_frame(wavelength_column, transmittance_values, df.columns[3:])
+
+def transmittance_to_absorbance(transmittance_series):
+    # 将所有非正数值替换为一个非常小的正数，以避免取对数时出错，再计算吸光度
+    return pd.Series(spectral.absorbance(transmittance_series.to_numpy(dtype=float)),
+                     index=transmittance_series.index, name=transmittance_series.name)
+
+def absorbance_calculation(df):
+    """计算吸光度"""
+    result_df = transmittance_calculation(df)
+    # 对所有光谱列一次取对数
+    result_df.iloc[:, 1:] = spectral.absorbance(result_df.iloc[:, 1:].to_numpy())
+    return result_df
+
+def fluorescence_calculation(df):
+    """计算荧光强度"""
+    # 提取波长与背景数据
+    wavelength_column = df.iloc[:, 0]
+    background = df.iloc[:, 1].to_numpy(dtype=float)
+
+    # 扣除背景
+    fluorescence_values = spectral.subtract_dark(df.iloc[:, 2:].to_numpy(dtype=float), background)
+
+    # 合并数据
+    return _spectra_frame(wavelength_column, fluorescence_values, df.columns[2:])
+
+def dataframe_interpolation(df, interpolation_parameters, cache_dir=None):
+    """对dataframe进行插值，cache_dir不为None时重采样矩阵同时缓存到该文件夹"""
+    # 配置插值参数
+    start, end, interval, kind = interpolation_parameters
+    x_column = df.columns[0]
+
+    # 所有列共用一个重采样矩阵（按波长网格与插值参数缓存），一次矩阵乘法完成插值
+    new_x, matrix = spectral.cached_resampling_matrix(df[x_column].to_numpy(dtype=float), start, end, interval, kind,
+                                                      cache_dir)
+    interpolated_values = spectral.resample(matrix, df.iloc[:, 1:].to_numpy(dtype=float))
+
+    # 合并所有列转为dataframe
+    interpolated_df = pd.DataFrame(interpolated_values, columns=df.columns[1:])
+    interpolated_df.insert(0, x_column, new_x)
+    return interpolated_df
+
+def extract_time_interval(file_name):
+    """从文件名中提取时间间隔"""
+    match = re.search(r'scan(\d+\.?\d*)s', file_name)
+    if match:
+        return float(match.group(1))
+    else:
+        return None
+
+def excel2excel(file_path, spectrum_select, interpolation_parameters, column_names, storage_format='excel', excel_copy=False,
+                disk_cache=False):
+    # 读取原始数据，并修改格式
+    df = pd.read_excel(file_path)
+    df = df.iloc[5:]  # 删除前五行无数据行
+    df.reset_index(drop=True, inplace=True)  # 重设索引（原来的数据行为第零行）
+    df.columns.values[:3] = ['Wavelength[nm]', 'dark', 'reference']  # 修改前三列的列标签
+    df.columns = df.columns.str.replace(r'\.Raw8', '', regex=True, n=-1)  # 去除从第四列开始的'.RAW/Raw'
+    df.columns = df.columns.str.replace(r'\.RAW8', '', regex=True, n=-1)  # 去除从第四列开始的'.RAW/Raw'
+
+    # 自动提取时间间隔
+    time_interval = extract_time_interval(os.path.basename(file_path))
+    if time_interval and len(column_names) > 0:
+        column_start, _, column_unit = column_names
+        column_names = [f'{column_start + i * time_interval}{column_unit}' for i in range(df.shape[1] - 3)]
+        df.columns.values[3:] = column_names
+    elif len(column_names) > 0:
+        column_start, column_interval, column_unit = column_names
+        column_names = [f'{column_start + i * column_interval}{column_unit}' for i in range(df.shape[1] - 3)]
+        df.columns.values[3:] = column_names
+
+    df.astype('float64')  # 确保数据类型一致
+    # 如果interpolation_parameters不为空，则插值
+    if len(interpolation_parameters) > 0:
+        cache_dir = os.path.join(os.path.dirname(file_path), spectral.RESAMPLE_CACHE_DIR) if disk_cache else None
+        df = dataframe_interpolation(df, interpolation_parameters, cache_dir)
+
+    # 处理光谱类型
+    if spectrum_select == 'Transmittance':
+        df = transmittance_calculation(df)
+    elif spectrum_select == 'Absorbance':
+        df = absorbance_calculation(df)
+    elif spectrum_select == 'Fluorescence':
+        df = fluorescence_calculation(df)
+
+    # 将 DataFrame 保存为 Excel 文件
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    excel_output_path = file_path.replace(f'{file_name}.xlsx', f'{spectrum_select}_merged_{file_name}.xlsx')
+    # 保存数据与参数，可选excel/parquet/feather格式
+    parameters = {'File Name': file_name}
+    return save_record(df, excel_output_path, spectrum_select, parameters, storage_format, excel_copy)
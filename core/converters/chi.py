@@ -0,0 +1,107 @@
+"""将chi电化学工作站的txt测试数据转换为Excel文件"""
+import numpy as np
+import os
+import re
+
+from core.storage import save_record_chunks
+from utils.textparse import DEFAULT_CHUNKSIZE, read_head, read_numeric
+
+
+def find_data_start_line(content, keywords):
+    """
+    查找包含指定关键词的行号
+    :param content: 文件内容列表
+    :param keywords: 要查找的关键词列表
+    :return: 包含所有关键词的行号，如果未找到，返回None
+    """
+    for i, line in enumerate(content):
+        if all(keyword in line for keyword in keywords):
+            return i + 2  # 数据从关键词行的下2行开始
+    return None
+
+
+def extract_scan_rate(content):
+    """
+    提取扫描速率和其他参数
+    :param content: 文件内容
+    :return: 扫描速率
+    """
+    scan_rate = None
+    experiment_time = None
+    parameters = {}
+
+    # 使用正则表达式提取扫描速率和实验时间等参数
+    for line in content:
+        if 'Scan Rate (V/s)' in line:
+            scan_rate = re.search(r'Scan Rate \(V/s\) = ([\d.]+)', line)
+            if scan_rate:
+                parameters['Scan Rate (V/s)'] = scan_rate.group(1)
+    return parameters
+
+
+def insert_time(chunks, scan_rate):
+    """
+    为CV数据逐块添加时间列，时间间隔由前两个电位步长与扫描速率计算
+    :param chunks: DataFrame 迭代器
+    :return: 添加了 'Time[s]' 列的 DataFrame 生成器
+    """
+    offset, time_interval = 0, None
+    for df in chunks:
+        if time_interval is None:
+            time_interval = (float(df.iloc[2, 0]) - float(df.iloc[1, 0])) / float(scan_rate)
+        # 新增 'time[s]' 列，数据为全局行号乘以time_interval
+        df.insert(0, 'Time[s]', (offset + np.arange(len(df))) * time_interval)
+        offset += len(df)
+        yield df
+
+
+def chi_txt2excel(file_path, columns, storage_format='excel', excel_copy=False):
+    """处理CHI的txt文件，转换为Excel"""
+    # 只读取表头，数值部分之后交给C解析器分块读取
+    content = read_head(file_path)
+
+    # 匹配第二行的模式
+    scan_mode_line = content[1].strip()
+
+    # 定义不同扫描模式的关键词
+    if '开路电位-时间' in scan_mode_line:
+        scan_model = 'OCP'
+        columns = ['Time[s]', 'Potential[V]']
+        keywords = ['Time/sec, Potential/V']
+    elif '线性扫描伏安法' in scan_mode_line:
+        scan_model = 'LSV'
+        columns = ['Potential[V]', 'Current[A]']
+        keywords = ['Potential/V, Current/A']
+    elif '循环伏安法' in scan_mode_line:
+        scan_model = 'CV'
+        columns = ['Potential[V]', 'Current[A]']
+        keywords = ['Potential/V, Current/A']
+    else:
+        # 处理未匹配到已知模式的情况
+        scan_model = 'Unknown'
+        columns = ['Unknown']
+        keywords = []  # 空列表表示没有找到有效的关键词
+
+    # 如果没有找到有效的关键词，则返回错误信息
+    if not keywords:
+        raise ValueError("无法识别扫描模式或没有找到匹配的关键词，请检查文件内容。")
+
+    # 通过关键词查找数据的起始行
+    data_start_line = find_data_start_line(content, keywords)
+    if data_start_line is None:
+        raise ValueError(f"在文件开头未找到数据标题行{keywords}，请检查文件内容。")
+
+    # 分块读取数据，parquet/feather逐块写入，内存只占用一块
+    chunks = read_numeric(file_path, columns, skiprows=data_start_line, chunksize=DEFAULT_CHUNKSIZE)
+
+    if scan_model == 'CV':
+        scan_rate = extract_scan_rate(content).get('Scan Rate (V/s)', 'Unknown')  # 提取扫描速率
+        chunks = insert_time(chunks, scan_rate)
+
+    # 将数据保存为Excel文件，包含处理后的第一行，指定工作表名称为文件名
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    excel_output_path = file_path.replace(f'{file_name}.txt', f'{scan_model}_{file_name}.xlsx')
+    # 保存数据与参数，可选excel/parquet/feather格式
+    parameters = {'File Name': file_name}
+    return save_record_chunks(chunks, excel_output_path, scan_model, parameters, storage_format, excel_copy,
+                              excel_engine='xlsxwriter')
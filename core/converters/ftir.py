@@ -0,0 +1,32 @@
+"""将FTIR的csv测试数据转换为Excel文件"""
+import pandas as pd
+import os
+
+from core.profiling import stage
+from core.storage import save_record
+
+
+def FTIR_csv2excel(file_path, base_csv_path=None, storage_format='excel', excel_copy=False):
+    """将FTIR的csv测试数据转换为Excel文件"""
+    # 读取csv文件内容
+    with stage('parse', read=file_path):
+        df = pd.read_csv(file_path, delimiter=',', header=None)
+    scan_mode = 'Transmittance'
+    columns = ['Wavenumbers[cm-1]', scan_mode]
+    df = df.astype(float)
+    df.columns = columns
+
+    # 读取基础数据
+    if base_csv_path:
+        with stage('parse', read=base_csv_path):
+            base_df = pd.read_csv(base_csv_path, delimiter=',', header=None)
+        base_df = base_df.astype(float)
+        # 将原始数据除以基础数据并添加到 DataFrame 的第三列
+        df['Corrected Transmittance'] = df[scan_mode] / base_df.iloc[:, 1]
+
+    # 将 DataFrame 保存为 Excel 文件
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    excel_output_path = file_path.replace(f'{file_name}.csv', f'FTIR_{scan_mode}_{file_name}.xlsx')
+    # 保存数据与参数，可选excel/parquet/feather格式
+    parameters = {'File Name': file_name}
+    return save_record(df, excel_output_path, scan_mode, parameters, storage_format, excel_copy)
@@ -0,0 +1,80 @@
+"""将ichy的csv测试数据转换为Excel文件"""
+import pandas as pd
+import os
+import numpy as np
+
+from core.profiling import stage
+from core.storage import save_record
+
+
+def ichy_csv2excel(file_path, storage_format='excel', excel_copy=False):
+    """将ichy的csv测试数据转换为Excel文件"""
+    # 读取csv文件内容
+    with stage('parse', read=file_path):
+        df = pd.read_csv(file_path, delimiter=',', header=None)
+
+    # 通过测试模式判断数据起始行和其余的数据处理方式
+    scan_mode = df.iloc[1, 1]
+
+    if scan_mode == 'LSV - Linear Sweep Voltammetry':
+        scan_mode = 'LSV'
+        data_start_row = 9
+        columns = ['Potential[V]', 'Current[A]']
+        # 新的数据
+        df = df.iloc[data_start_row:].reset_index(drop=True)
+        df = df.astype(float)
+        df.columns = columns
+
+    if scan_mode == 'CV - Cyclic Voltammetry':
+        scan_mode = 'CV'
+        data_start_row = 11
+        columns = ['Potential[V]', 'Current[A]']
+        scan_rate = float(df.iloc[6, 1]) * 1e-6  # (uV/S) -> (V/S)
+        time_interval = (float(df.iloc[12, 0]) - float(df.iloc[11, 0]))/scan_rate
+        # 新的数据
+        df = df.iloc[data_start_row:].reset_index(drop=True)
+        df = df.astype(float)
+        df.columns = columns
+        # 新增 'time[s]' 列，数据为索引乘以time_interval
+        df.insert(0, 'Time[s]', df.index * time_interval)
+
+    if scan_mode == 'I-t - Amperometric i-t Curve':
+        scan_mode = 'It'
+        data_start_row = 9
+        columns = ['Time[s]', 'Current[A]']
+        potential = df.iloc[3, 1]
+        # 新的数据
+        df = df.iloc[data_start_row:].reset_index(drop=True)
+        df = df.astype(float)
+        df.columns = columns
+        # 在 'Time[s]'后面插入常数列'Potential[V]'
+        df.insert(1, 'Potential[V]', int(potential)*0.001)
+        # 删除完全相同的行（仪器It模式数据采集问题？？？）
+        df = df.drop_duplicates(subset=['Time[s]'])
+
+    if scan_mode == 'CA - Chronoamperometry':
+        scan_mode = 'CA'
+        data_start_row = 11
+        columns = ['Time[s]', 'Current[A]']
+        High_E = int(df.iloc[4, 1]) * 1e-3
+        Low_E = int(df.iloc[5, 1]) * 1e-3
+        Pulse_Width = int(df.iloc[7, 1]) * 1e-3
+        Sample_Int = int(df.iloc[9, 1]) * 1e-3
+        # 新的数据
+        df = df.iloc[data_start_row:].reset_index(drop=True)
+        df = df.astype(float)
+        df.columns = columns
+        # 重新计算 'time[s]' 列，原数据时间戳有问题？？？
+        df['Time[s]'] = (df.index + 1) * Sample_Int
+        # 在 'Time[s]'后面插入'Potential[V]'
+        pattern = np.repeat([High_E, Low_E], Pulse_Width / Sample_Int)  # 重复高低电压的基本模式
+        repeated_pattern = np.tile(pattern, len(df) // len(pattern))  # 重复整个模式以匹配 DataFrame 的长度
+        repeated_pattern = np.append(repeated_pattern, pattern[0:len(df) % len(pattern)])  # 添加不完整的部分
+        df.insert(1, 'Potential[V]', repeated_pattern)
+
+    # 将 DataFrame 保存为 Excel 文件
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    excel_output_path = file_path.replace(f'{file_name}.csv', f'{scan_mode}_{file_name}.xlsx')
+    # 保存数据与参数，可选excel/parquet/feather格式
+    parameters = {'File Name': file_name}
+    return save_record(df, excel_output_path, scan_mode, parameters, storage_format, excel_copy)
@@ -0,0 +1,66 @@
+"""将keithley的txt测试数据转换为Excel文件"""
+import pandas as pd
+import re
+import os
+
+from core.storage import save_record_chunks
+from utils.textparse import DEFAULT_CHUNKSIZE, read_head, read_numeric
+
+
+def kei_chunks(file_path, first_row, columns, current_unit):
+    """
+    分块读取keithley数据：第一行与测试模式写在同一行，单独解析后放在第一块的最前面
+    :return: DataFrame 生成器
+    """
+    first_df = pd.DataFrame([first_row], columns=columns)
+    try:
+        chunks = read_numeric(file_path, columns, skiprows=1, sep=r'\s+', chunksize=DEFAULT_CHUNKSIZE)
+    except pd.errors.EmptyDataError:
+        # 文件只有第一行数据
+        chunks = [first_df.iloc[:0]]
+    for df in chunks:
+        if first_df is not None:
+            df = pd.concat([first_df, df], ignore_index=True)
+            first_df = None
+        # 将电流单位转为A
+        if current_unit:
+            df['Current[mA]'] = df['Current[mA]'] / 1000
+            df.rename(columns={'Current[mA]': 'Current[A]'}, inplace=True)
+        yield df
+
+
+def kei_txt2excel(file_path, columns, current_unit, storage_format='excel', excel_copy=False):
+    """注意原始txt列数，起始行的处理"""
+    # 只读取第一行，其余数值部分交给C解析器分块读取
+    content = read_head(file_path, 1)
+
+    # 匹配一个或多个非 \t 字符，后面跟着 '测试数据' 字符串
+    pattern = r'([^\t]+测试数据)'
+    matches = re.findall(pattern, content[0])
+    # 根据文字信息匹配测试模式
+    if matches[0] == 'I-V测试数据':
+        scan_model = 'CV'
+        columns = ['Potential[V]', 'Current[mA]']
+    elif matches[0] == '方波信号测试数据':
+        scan_model = 'CA'
+        columns = ['Time[s]', 'Potential[V]', 'Current[mA]']
+    elif matches[0] == 'I-t测试数据':
+        scan_model = 'It'
+        columns = ['Time[s]', 'Potential[V]', 'Current[mA]']
+    else:
+        scan_model = 'Electricity'
+
+    # 处理第一行内容，只保留'I-V测试数据'之前的部分
+    content[0] = content[0].split(matches[0])[0].strip()
+
+    # 第一行的数据单独转换为浮点数，其余行分块读取
+    first_row = [float(value) for value in content[0].split()]
+    chunks = kei_chunks(file_path, first_row, columns, current_unit)
+
+    # 将数据保存为Excel文件，包含处理后的第一行，指定工作表名称为文件名
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    excel_output_path = file_path.replace(f'{file_name}.txt', f'{scan_model}_{file_name}.xlsx')
+    # 保存数据与参数，可选excel/parquet/feather格式
+    parameters = {'File Name': file_name}
+    return save_record_chunks(chunks, excel_output_path, scan_model, parameters, storage_format, excel_copy,
+                              excel_engine='xlsxwriter')
@@ -0,0 +1,38 @@
+"""将LANDHE的csv测试数据转换为Excel文件"""
+import pandas as pd
+import os
+
+from core.profiling import stage
+from core.storage import save_record
+
+
+def LANDHE_csv2excel(file_path, storage_format='excel', excel_copy=False):
+    """将LANDHE的csv测试数据转换为Excel文件"""
+    # 读取csv文件内容
+    with stage('parse', read=file_path):
+        df = pd.read_csv(file_path, delimiter=',', header=0,  encoding='GB2312')
+
+    # 根据电流单位自动进行转换
+    current_column = df.columns[df.columns.str.contains('电流')][0]
+    if 'uA' in current_column:
+        df['Current[A]'] = df[current_column] / 1e6  # 从 uA 转换为 A
+    elif 'mA' in current_column:
+        df['Current[A]'] = df[current_column] / 1e3  # 从 mA 转换为 A
+    elif 'A' in current_column:
+        df['Current[A]'] = df[current_column]  # 单位已经是 A，不需要转换
+
+    # 创建新的 DataFrame
+    new_df = pd.DataFrame({
+        "Time[s]": df["测试时间/Sec"],  # 提取测试时间
+        "Current[A]": df['Current[A]'],  # 使用自动转换后的电流
+        "Potential[V]": df["电压/V"]  # 提取电压
+    })
+
+    df = new_df.astype(float).dropna()  # 转换为浮点数类型，并去除空白行
+
+    # 将 DataFrame 保存为 Excel 文件
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    excel_output_path = file_path.replace(f'{file_name}.csv', f'GCD_{file_name}.xlsx')
+    # 保存数据与参数，可选excel/parquet/feather格式
+    parameters = {'File Name': file_name}
+    return save_record(df, excel_output_path, 'GCD', parameters, storage_format, excel_copy)
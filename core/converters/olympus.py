@@ -0,0 +1,47 @@
+"""将olympus的csv数据转换为Excel文件，并可绘制热图"""
+import pandas as pd
+import os
+import matplotlib.pyplot as plt
+
+from core.profiling import stage
+from core.storage import save_record
+
+
+def csv2excel(file_path, heatmap_fig, storage_format='excel', excel_copy=False):
+    # 读取csv文件注释信息
+    with stage('parse', read=file_path):
+        df_title = pd.read_csv(file_path, delimiter=',', nrows=10)
+    file_name = df_title.iloc[0, 1].split('.poir')[0].split('\\')[-1]  # 提取文件名
+    data_type = df_title.iloc[1, 1]  # 高度or强度
+    resolution = df_title.iloc[2, 1]  # 分辨率
+    # 提取2维图数据
+    with stage('parse', read=file_path):
+        df = pd.read_csv(file_path, delimiter=',', header=18, index_col=0)
+    df = df.iloc[:, :-1]  # 删除最后一列Nan
+    # 修改列标题
+    new_columns = [f'{data_type}{i}' for i in range(len(df.columns))]
+    df.columns = new_columns
+
+    # 将 DataFrame 保存为 Excel 文件
+    dir_name = os.path.dirname(file_path)
+    excel_output_path = os.path.join(dir_name, f'Confocal{data_type}_{file_name}.xlsx')
+    # 保存数据与参数，可选excel/parquet/feather格式
+    parameters = {'File Name': file_name}
+    record_path = save_record(df, excel_output_path, f'Confocal{data_type}', parameters, storage_format, excel_copy)
+
+    if heatmap_fig:
+        plt.figure()
+        plt.imshow(df, cmap='viridis', interpolation='nearest')
+        if data_type == 'Height':
+            plt.colorbar(label='µm')  # 添加颜色条并指定单位
+        elif data_type == 'Intensity':
+            plt.colorbar()
+        plt.title(f"{data_type} heatmap of {file_name} \n x,y resolution: {resolution}µm")
+        plt.tight_layout()
+        heatmap_path = excel_output_path.replace('.xlsx', '.png')
+        with stage('savefig') as stage_record:
+            plt.savefig(heatmap_path, dpi=300)
+            stage_record.written(heatmap_path)
+        plt.close()
+
+    return record_path
@@ -0,0 +1,34 @@
+"""将台阶仪的xml测试数据转换为Excel文件"""
+import pandas as pd
+import os
+import xml.etree.ElementTree as ET
+
+from core.storage import save_record
+
+
+def step_xml2excel(file_path, storage_format='excel', excel_copy=False):
+    # 读取并解析XML文件
+    tree = ET.parse(file_path)
+    root = tree.getroot()
+    data = []
+
+    # 提取X和Z的单位
+    x_units = root.find('.//XUnits').text
+    z_units = root.find('.//ZUnits').text
+
+    # 提取数据
+    for elem in root.find('.//DataBlock'):
+        x = float(elem.find('X').text)
+        z = float(elem.find('Z').text)
+        data.append({f'X ({x_units})': x, f'Z ({z_units})': z})
+
+    # 将数据转换为 DataFrame
+    df = pd.DataFrame(data)
+
+    # 将数据保存为Excel文件，包含处理后的第一行，指定工作表名称为文件名
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    excel_output_path = os.path.splitext(file_path)[0] + '.xlsx'
+    # 保存数据与参数，可选excel/parquet/feather格式
+    parameters = {'File Name': file_name}
+    return save_record(df, excel_output_path, 'Step_rawdata', parameters, storage_format, excel_copy,
+                       excel_engine='xlsxwriter')
@@ -0,0 +1,55 @@
+"""将双光束紫外分光光度计的sca数据转换为Excel文件"""
+import pandas as pd
+import os
+
+from core.profiling import stage
+from core.storage import save_record
+
+
+def absorbance_to_transmittance(absorbance):
+    return 10 ** (-absorbance)
+
+
+def normalize_data(series):
+    """归一化给定的Pandas Series到0-1之间。"""
+    min_value = series.min()
+    max_value = series.max()
+    return (series - min_value) / (max_value - min_value)
+
+
+def sca2excel(file_path, spectrum, storage_format='excel', excel_copy=False):
+    """注意起始行与结束行的处理"""
+    with stage('parse', read=file_path), open(file_path, 'r') as f:
+        lines = f.readlines()
+
+    # 获取数据开始的行数，即第一个以 'Filter:10' 开头的行
+    for i, line in enumerate(lines):
+        if line.startswith('Filter:10'):
+            start_row = i + 1
+            break
+
+    # 从数据开始的行数开始读取数据，直到 '[Extended]' 结束
+    data = []
+    for line in lines[start_row:]:
+        if line.startswith('[Extended]'):
+            break
+        data.append(line.strip().split(' '))  # 空格分列
+
+    # 将数据转换为DataFrame
+    df = pd.DataFrame(data, columns=['Wavelength[nm]', spectrum])
+    df = df.astype(float)
+
+    # 根据需要转变吸光度为透过率
+    if spectrum == 'Transmittance':
+        # 从第二列开始，转换为透过率
+        df.iloc[:, 1:] = df.iloc[:, 1:].apply(absorbance_to_transmittance)
+
+    # 归一化光谱数据到0-1之间
+    # df['Normalized'] = normalize_data(df[spectrum])
+
+    # 将 DataFrame 保存为 Excel 文件
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    excel_output_path = file_path.replace(f'{file_name}.sca', f'{spectrum}_{file_name}.xlsx')
+    # 保存数据与参数，可选excel/parquet/feather格式
+    parameters = {'File Name': file_name}
+    return save_record(df, excel_output_path, spectrum, parameters, storage_format, excel_copy)
@@ -0,0 +1,33 @@
+"""将XRD的txt测试数据转换为Excel文件"""
+import pandas as pd
+import re
+import os
+from scipy.signal import savgol_filter
+
+from core.profiling import stage
+from core.storage import save_record
+
+
+def kei_txt2excel(file_path, window_length, polyorder, storage_format='excel', excel_copy=False):
+    """注意原始txt列数，起始行的处理"""
+    data = []
+    with stage('parse', read=file_path), open(file_path, 'r') as file:
+        for line in file:
+            if re.match(r'^\d', line):  # 仅读取以数字开头的行
+                data.append([float(x) for x in line.strip().split()])  # 以空格分割，转换为浮点数
+
+    # 将数据转换为 DataFrame
+    df = pd.DataFrame(data, columns=['2Θ[degree]', 'Intensity[a.u.]'])  # 根据实际情况调整列名
+
+    # SG平滑处理
+    with stage('math'):
+        smoothed_intensity = savgol_filter(df['Intensity[a.u.]'], window_length=window_length, polyorder=polyorder)
+    df['Smoothed Intensity[a.u.]'] = smoothed_intensity
+
+    # 将数据保存为Excel文件，包含处理后的第一行，指定工作表名称为文件名
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    excel_output_path = file_path.replace(f'{file_name}.txt', f'{file_name}.xlsx')
+    # 保存数据与参数，可选excel/parquet/feather格式
+    parameters = {'File Name': file_name, 'SG Window Length': window_length, 'SG Poly-order': polyorder}
+    return save_record(df, excel_output_path, 'XRD_rawdata', parameters, storage_format, excel_copy,
+                       excel_engine='xlsxwriter')
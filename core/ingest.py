@@ -0,0 +1,163 @@
+"""仪器格式自动识别：遍历一次目录，按文件开头的特征识别仪器，再分发给对应的转换函数"""
+import os
+import re
+
+from utils.registry import load_tool
+
+# 仪器 → (转换函数所在模块, 转换函数名)
+CONVERTERS = {
+    'keithley': ('core.converters.keithley', 'kei_txt2excel'),
+    'CHI': ('core.converters.chi', 'chi_txt2excel'),
+    'ichy': ('core.converters.ichy', 'ichy_csv2excel'),
+    'LANHE': ('core.converters.lanhe', 'LANDHE_csv2excel'),
+    'uv': ('core.converters.uv', 'sca2excel'),
+    'avantes': ('core.converters.avantes', 'excel2excel'),
+    'olympus': ('core.converters.olympus', 'csv2excel'),
+    'XRD': ('core.converters.xrd', 'kei_txt2excel'),
+    'FTIR': ('core.converters.ftir', 'FTIR_csv2excel'),
+    'Step': ('core.converters.step', 'step_xml2excel'),
+}
+
+# 各转换函数的默认参数，与各转换页面的默认选项一致
+DEFAULT_OPTIONS = {
+    'keithley': {'columns': ['Potential[V]', 'Current[mA]'], 'current_unit': True},
+    'CHI': {'columns': ['Potential[V]', 'Current[mA]']},
+    'uv': {'spectrum': 'Transmittance'},
+    'avantes': {'spectrum_select': 'Transmittance', 'interpolation_parameters': [300.0, 1100.0, 1.0, 'linear'],
+                'column_names': [0, 0.5, 's']},
+    'olympus': {'heatmap_fig': True},
+    'XRD': {'window_length': 11, 'polyorder': 2},
+}
+
+# 可能是仪器原始数据的文件后缀
+SUFFIXES = ('.txt', '.csv', '.sca', '.xml', '.xlsx')
+# 识别时读取的文件开头字节数
+HEAD_BYTES = 64 * 1024
+
+CHI_MODES = ('开路电位-时间', '线性扫描伏安法', '循环伏安法')
+ICHY_MODES = ('LSV - Linear Sweep Voltammetry', 'CV - Cyclic Voltammetry', 'I-t - Amperometric i-t Curve',
+              'CA - Chronoamperometry')
+NUMERIC_LINE = re.compile(r'^\s*[-+]?\d')
+# XRD数据行：空白分隔的 2θ 与强度两个数
+NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+XRD_LINE = re.compile(rf'^\s*{NUMBER}\s+{NUMBER}\s*$')
+
+
+def scan_tree(folder, recursive=True):
+    """
+    遍历一次目录，收集可能是仪器原始数据的文件
+    :return: 文件路径列表
+    """
+    if recursive:
+        paths = [os.path.join(root, file) for root, _, files in os.walk(folder) for file in files]
+    else:
+        paths = [os.path.join(folder, file) for file in os.listdir(folder)]
+    return sorted(path for path in paths
+                  if path.lower().endswith(SUFFIXES) and not os.path.basename(path).startswith('~$'))
+
+
+def read_head_text(file_path, n_bytes=HEAD_BYTES):
+    """读取文件开头并解码为文本行；仪器软件导出的中文文件可能是utf-8或gbk编码"""
+    with open(file_path, 'rb') as file:
+        head = file.read(n_bytes)
+    if len(head) == n_bytes:
+        # 只保留完整的行，避免截断多字节字符
+        head = head[:head.rfind(b'\n') + 1] or head
+    try:
+        text = head.decode('utf-8')
+    except UnicodeDecodeError:
+        text = head.decode('gbk', errors='replace')
+    return text.splitlines()
+
+
+def _is_avantes_excel(file_path):
+    """AvaSoft导出的excel，第一行的列名以 .Raw8/.RAW8 结尾"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        first_row = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+    finally:
+        workbook.close()
+    return any(str(value).upper().endswith('.RAW8') for value in first_row if value is not None)
+
+
+def _is_xrd_body(lines):
+    """XRD导出的txt除少量说明行外都是两列数字；只有个别行以数字开头的普通文本不算"""
+    lines = [line for line in lines if line.strip()]
+    return sum(1 for line in lines if XRD_LINE.match(line)) > len(lines) / 2
+
+
+def sniff(file_path):
+    """
+    根据文件后缀与开头内容识别仪器，识别特征与各转换函数中的判断一致
+    :return: CONVERTERS 中的仪器名，无法识别时返回None
+    """
+    suffix = os.path.splitext(file_path)[1].lower()
+    if suffix == '.xlsx':
+        return 'avantes' if _is_avantes_excel(file_path) else None
+
+    lines = read_head_text(file_path)
+    if not lines:
+        return None
+    if suffix == '.txt':
+        if '测试数据' in lines[0]:
+            return 'keithley'
+        if len(lines) > 1 and any(mode in lines[1] for mode in CHI_MODES):
+            return 'CHI'
+        if _is_xrd_body(lines):
+            return 'XRD'
+    elif suffix == '.sca':
+        if any(line.startswith('Filter:10') for line in lines):
+            return 'uv'
+    elif suffix == '.xml':
+        if any('DataBlock' in line for line in lines):
+            return 'Step'
+    elif suffix == '.csv':
+        second_fields = lines[1].split(',') if len(lines) > 1 else []
+        if len(second_fields) > 1 and second_fields[1].strip() in ICHY_MODES:
+            return 'ichy'
+        if '测试时间/Sec' in lines[0]:
+            return 'LANHE'
+        if any('.poir' in line for line in lines[:10]):
+            return 'olympus'
+        if len(lines[0].split(',')) == 2 and NUMERIC_LINE.match(lines[0]):
+            return 'FTIR'
+    return None
+
+
+def sniff_tree(folder, recursive=True):
+    """
+    遍历一次目录并识别每个文件的仪器
+    :return: ({文件路径: 仪器名}, 无法识别的文件列表)
+    """
+    detected, unknown = {}, []
+    for file_path in scan_tree(folder, recursive):
+        try:
+            instrument = sniff(file_path)
+        except Exception:
+            instrument = None
+        if instrument:
+            detected[file_path] = instrument
+        else:
+            unknown.append(file_path)
+    return detected, unknown
+
+
+def get_converter(instrument):
+    """导入仪器对应的转换函数"""
+    return load_tool(CONVERTERS, instrument)
+
+
+def convert_file(file_path, options=None, storage_format='excel', excel_copy=False):
+    """
+    识别单个文件的仪器并调用对应的转换函数（批处理的工作函数，在子进程中运行）
+    :param options: {仪器名: 转换函数的参数}，未给出的仪器使用 DEFAULT_OPTIONS
+    :return: 转换函数的返回值（输出文件路径）
+    """
+    instrument = sniff(file_path)
+    if instrument is None:
+        raise ValueError('无法识别文件对应的仪器格式')
+    kwargs = {**DEFAULT_OPTIONS.get(instrument, {}), **(options or {}).get(instrument, {})}
+    converter = get_converter(instrument)
+    return converter(file_path, **kwargs, storage_format=storage_format, excel_copy=excel_copy)
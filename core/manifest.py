@@ -0,0 +1,124 @@
+"""增量转换清单：记录每个原始文件的指纹、转换参数与输出路径，重复运行时跳过未变化的文件"""
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = '.convert_manifest.json'
+
+
+def file_hash(file_path, chunk_size=1 << 20):
+    """分块计算文件内容的sha256，避免一次性读入大文件"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(file_path):
+    """原始文件的指纹：大小、修改时间与内容哈希"""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': file_hash(file_path)}
+
+
+def converter_name(func):
+    """用模块名+函数名区分不同的转换程序"""
+    return f'{func.__module__}.{func.__name__}'
+
+
+def normalize_params(params):
+    """将转换参数统一为可比较的json结构（元组转列表，无法序列化的值转字符串）"""
+    return json.loads(json.dumps(params, sort_keys=True, default=str))
+
+
+def load_manifest(folder):
+    """读取文件夹内的清单，不存在或损坏时返回空清单"""
+    manifest_path = os.path.join(folder, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(folder, manifest):
+    """先写临时文件再替换，避免中断时留下损坏的清单"""
+    manifest_path = os.path.join(folder, MANIFEST_NAME)
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, manifest_path)
+
+
+def _entry_key(func, file_path):
+    return f'{converter_name(func)}|{os.path.basename(file_path)}'
+
+
+def _is_unchanged(entry, file_path, params):
+    """判断文件是否可以跳过；内容未变但修改时间变化时顺便刷新清单中的修改时间"""
+    if entry is None or entry.get('params') != params:
+        return False
+    output = entry.get('output')
+    if not output or not os.path.exists(output):
+        return False
+    stat = os.stat(file_path)
+    if stat.st_size != entry.get('size'):
+        return False
+    if stat.st_mtime == entry.get('mtime'):
+        return True
+    # 修改时间变化（例如被复制或touch）时再比较内容哈希
+    if file_hash(file_path) == entry.get('hash'):
+        entry['mtime'] = stat.st_mtime
+        return True
+    return False
+
+
+def split_changed(func, file_paths, params):
+    """
+    将文件分为需要转换的与可以跳过的两部分
+    :param func: 转换函数
+    :param file_paths: 原始文件路径列表
+    :param params: 转换参数（关键字参数字典）
+    :return: (需要转换的文件列表, 跳过的结果列表)
+    """
+    params = normalize_params(params)
+    manifests = {}
+    refreshed = set()
+    changed, skipped = [], []
+    for file_path in file_paths:
+        folder = os.path.dirname(os.path.abspath(file_path))
+        manifest = manifests.setdefault(folder, load_manifest(folder))
+        entry = manifest.get(_entry_key(func, file_path))
+        mtime = entry.get('mtime') if entry else None
+        if _is_unchanged(entry, file_path, params):
+            skipped.append({'File': file_path, 'Status': 'skipped', 'Output': entry['output'],
+                            'Message': '文件与转换参数均未变化', 'Time[s]': 0.0})
+            if entry['mtime'] != mtime:
+                refreshed.add(folder)
+        else:
+            changed.append(file_path)
+
+    # 保存被刷新了修改时间的清单
+    for folder in refreshed:
+        save_manifest(folder, manifests[folder])
+    return changed, skipped
+
+
+def record_results(func, results, params):
+    """将转换成功的文件写入各自文件夹的清单"""
+    params = normalize_params(params)
+    manifests = {}
+    for result in results:
+        if result['Status'] != 'success' or not isinstance(result['Output'], str):
+            continue
+        file_path = result['File']
+        folder = os.path.dirname(os.path.abspath(file_path))
+        manifest = manifests.setdefault(folder, load_manifest(folder))
+        entry = result.get('Fingerprint') or fingerprint(file_path)
+        entry.update({'source': os.path.abspath(file_path), 'params': params,
+                      'output': os.path.abspath(result['Output'])})
+        manifest[_entry_key(func, file_path)] = entry
+
+    for folder, manifest in manifests.items():
+        save_manifest(folder, manifest)
+    return None
@@ -0,0 +1,174 @@
+"""同一文件夹内多个数据文件的曲线合并：电阻（IV）数据合并与直线拟合，透过率/吸光度光谱合并"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.storage import collect_records, load_record, save_record
+from utils.merge import merge_curves
+
+# 方阻的截面宽度/长度的默认值
+W_L_VALUE = 2.5 / 1.5
+# 可以合并的光谱类型
+SPECTRA = ('Transmittance', 'Absorbance')
+
+
+def merge_resistance(folder_path, tolerance=0.0, storage_format='excel', excel_copy=False):
+    """
+    将同一个文件夹下的IV数据文件合并为一个总的数据文件
+    :param tolerance: 电压对齐容差[V]，相差不超过该值的电压视为同一个点
+    :return: (合并后的 DataFrame, 输出文件路径)
+    """
+    # 获取文件夹内所有数据文件（excel/parquet/feather）的路径
+    excel_files = [f for f in collect_records(folder_path) if 'merge' not in os.path.basename(f)]
+
+    # 读取所有数据文件，获取file_name，即电学曲线的标签，电流列作为该曲线的数据
+    curves = []
+    for file_path in excel_files:
+        df, _, parameters = load_record(file_path)
+        curves.append((parameters['File Name'], df['Potential[V]'].to_numpy(), df.iloc[:, 1].to_numpy()))
+
+    # 一次性合并，共享第一列 'Potential[V]'
+    merged_df = merge_curves(curves, 'Potential[V]', tolerance)
+
+    # 将合并后的 DataFrame 写入新 Excel 文件
+    output_name = os.path.basename(folder_path)
+    output_path = os.path.join(folder_path, f'Resistance_merged_{output_name}.xlsx')
+    output_path = save_record(merged_df, output_path, 'Resistance', {'File Name': f'Resistance_merged_{output_name}'},
+                              storage_format, excel_copy, excel_engine='openpyxl')
+    return merged_df, output_path
+
+
+def resistance_fit(df_merged, folder_path, w_l_value=W_L_VALUE):
+    """
+    对合并后的每条IV曲线进行直线拟合，并计算差分、梯度斜率对应的方阻
+    :return: 拟合结果文件的路径
+    """
+    # 获取列名，即IV曲线的标签
+    curve_labels = df_merged.columns[1:]
+    # 创建空列表
+    results_data = []
+    diff_slope_data = []  # 差分
+    gradient_slope_data = []  # 梯度
+
+    for curve_label in curve_labels:
+        # 获取对应IV曲线的数据
+        Potential = df_merged.iloc[:, 0]  # 提取第一列数据作为波长数据
+        Current = df_merged[curve_label]
+
+        # 删除包含NaN值的行：电流列比电压列少的地方由NaN值填充
+        non_nan_indices = Current.notna()
+        Potential = Potential[non_nan_indices]
+        Current = Current[non_nan_indices]
+
+        # 在给定电压范围内进行线性拟合并计算相关系数
+        voltage1 = Potential.iloc[0]  # 使用电流列的第一个值对应的电压
+        voltage2 = Potential.iloc[-1]  # 使用电流列的最后一个值对应的电压
+        voltage_range_mask = (Potential >= voltage1) & (Potential <= voltage2)
+        fit_potential = Potential[voltage_range_mask]
+        fit_current = Current[voltage_range_mask]
+        # 计算线性拟合的系数
+        coeffs = np.polyfit(fit_potential, fit_current, 1)
+        # 计算相关系数
+        correlation = np.corrcoef(fit_potential, fit_current)[0, 1]
+
+        # 固定参数
+        curve_type = '欧姆型（恒电阻）'
+        sheet_resistance = (1 / coeffs[0]) * w_l_value  # 方阻：Rs=RW/L, W界面宽1.5 L长2.5 【注意：斜率的倒数才是电阻】
+
+        # 计算差分斜率
+        diff_slopes = np.diff(Current) / np.diff(Potential)
+        diff_slope_data.append(pd.Series(diff_slopes, name=curve_label))
+        mean_diff_slope = np.mean(diff_slopes)  # 均值
+        cv_diff_slope = np.std(diff_slopes) / mean_diff_slope if mean_diff_slope != 0 else float('inf')  # 变异系数
+        diff_sheet_resistance = (1 / mean_diff_slope) * w_l_value
+
+        # 计算梯度斜率（一阶导数）
+        gradient_slopes = np.gradient(Current, Potential)
+        gradient_slope_data.append(pd.Series(gradient_slopes, name=curve_label))
+        mean_gradient_slope = np.mean(gradient_slopes)
+        cv_gradient_slope = np.std(gradient_slopes) / mean_gradient_slope if mean_gradient_slope != 0 else float('inf')
+        gradient_sheet_resistance = (1 / mean_gradient_slope) * w_l_value
+
+        # 将结果添加到DataFrame
+        data_dict = {'Curve Label': curve_label, 'Curve Type': curve_type, 'W/L': w_l_value,
+                     'voltage_range_start[V]': voltage1, 'voltage_range_end[V]': voltage2,
+                     'Correlation Coefficient': correlation, 'Fit Slope': coeffs[0],
+                     'Fit Intercept': coeffs[1],
+                     'Fit Sheet Resistance[ohm/sq]': sheet_resistance,
+                     'Mean Diff Slope': mean_diff_slope, 'CV Diff Slope': cv_diff_slope,
+                     'diff_sheet_resistance': diff_sheet_resistance,
+                     'Mean Deriv Slope': mean_gradient_slope, 'CV Deriv Slope': cv_gradient_slope,
+                     'gradient_sheet_resistance': gradient_sheet_resistance}
+        # 将当前数据添加到列表中
+        results_data.append(data_dict)
+
+    # 将列表转换为 DataFrame
+    results_df = pd.DataFrame(results_data)
+    diff_slope_df = pd.DataFrame(diff_slope_data).transpose()
+    gradient_slope_df = pd.DataFrame(gradient_slope_data).transpose()
+    # 将合并后的 DataFrame 写入新 Excel 文件
+    output_name = os.path.basename(folder_path)
+    output_path = os.path.join(folder_path, f'LinearFit_merged_{output_name}.xlsx')
+    # results_df.to_excel(output_path, index=False, engine='openpyxl', sheet_name='LinearFit')
+    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        results_df.to_excel(writer, index=False, sheet_name='LinearFit')
+        diff_slope_df.to_excel(writer, index=True, sheet_name='DiffSlope')
+        gradient_slope_df.to_excel(writer, index=True, sheet_name='DerivSlope')
+
+    return output_path
+
+
+def merge_spectra(folder_path, spectrum, tolerance=0.0, storage_format='excel', excel_copy=False):
+    """
+    将同一个文件夹下同一种光谱的数据文件合并为一个总的数据文件
+    :param spectrum: 'Transmittance' 或 'Absorbance'，只合并文件名中包含该光谱类型的文件
+    :param tolerance: 波长对齐容差[nm]
+    :return: 输出文件路径
+    """
+    # 获取文件夹内所有数据文件（excel/parquet/feather）的路径
+    excel_files = [f for f in collect_records(folder_path)
+                   if ('merge' not in os.path.basename(f)) and (spectrum in os.path.basename(f))]
+
+    # 读取所有数据文件，获取file_name，即曲线的标签，透过率/吸光度列作为该曲线的数据
+    curves = []
+    for file_path in excel_files:
+        df, _, parameters = load_record(file_path)
+        curves.append((parameters['File Name'], df['Wavelength[nm]'].to_numpy(), df.iloc[:, 1].to_numpy()))
+
+    # 一次性合并，共享第一列 'Wavelength[nm]'
+    merged_df = merge_curves(curves, 'Wavelength[nm]', tolerance)
+
+    # 将合并后的 DataFrame 写入新 Excel 文件
+    output_name = os.path.basename(folder_path)
+    output_path = os.path.join(folder_path, f'{spectrum}_merged_{output_name}.xlsx')
+    return save_record(merged_df, output_path, spectrum, {'File Name': f'{spectrum}_merged_{output_name}'},
+                       storage_format, excel_copy, excel_engine='openpyxl')
+
+
+def merge_folders(root_folder, kind):
+    """
+    目录树中需要合并的文件夹：含有可以合并的数据文件的文件夹
+    :param kind: 'Resistance' 或 SPECTRA 中的光谱类型
+    """
+    folders = []
+    for folder, _, _ in os.walk(root_folder):
+        names = [os.path.basename(f) for f in collect_records(folder)]
+        if any('merge' not in name and (kind == 'Resistance' or kind in name) for name in names):
+            folders.append(folder)
+    return sorted(folders)
+
+
+def merge_folder(folder_path, kind, tolerance=0.0, fit_check=False, w_l_value=W_L_VALUE, storage_format='excel',
+                 excel_copy=False):
+    """
+    合并一个文件夹（批处理的工作函数）
+    :param kind: 'Resistance' 时合并IV数据，fit_check 为真时同时保存直线拟合结果；否则为 SPECTRA 中的光谱类型
+    :return: 合并后的文件路径
+    """
+    if kind != 'Resistance':
+        return merge_spectra(folder_path, kind, tolerance, storage_format, excel_copy)
+    merged_df, output_path = merge_resistance(folder_path, tolerance, storage_format, excel_copy)
+    if fit_check:
+        resistance_fit(merged_df, folder_path, w_l_value)
+    return output_path
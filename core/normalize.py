@@ -0,0 +1,102 @@
+"""数据表的归一化：第一列为x，其余各列为y，按列各自归一化或所有y列一起归一化"""
+import os
+
+from core.storage import collect_records, load_record, save_record
+
+# 归一化类型
+NORMALIZATION_TYPES = ('最大最小值归一化', '最大值归一化')
+# 归一化结果文件名的前缀，批量处理时跳过这些文件
+NORMALIZED_PREFIXES = ('RowNormalized_', 'GlobalNormalized_')
+
+
+def normalize_min_max(series):
+    """最大最小值归一化到0-1之间。"""
+    min_value = series.min()
+    max_value = series.max()
+    return (series - min_value) / (max_value - min_value)
+
+
+def normalize_max(series):
+    """最大值归一化到0-1之间，使用最大值进行归一化。"""
+    max_value = series.max()
+    return series / max_value
+
+
+def normalize_series(series, normalization_type):
+    """根据归一化类型选择归一化方式。"""
+    if normalization_type == '最大最小值归一化':
+        return normalize_min_max(series)
+    elif normalization_type == '最大值归一化':
+        return normalize_max(series)
+
+
+def normalize_individual_columns(df, normalization_type):
+    """对DataFrame中从第二列开始的每一列依次归一化。"""
+    for column in df.columns[1:]:
+        df[column] = normalize_series(df[column], normalization_type)
+    return df
+
+
+def normalize_all_y_together(df, normalization_type):
+    """对DataFrame中从第二列开始的所有列一起归一化。"""
+    if normalization_type == '最大最小值归一化':
+        all_y = df.iloc[:, 1:]
+        global_min = all_y.min().min()  # 找到所有列的全局最小值
+        global_max = all_y.max().max()  # 找到所有列的全局最大值
+        for column in all_y.columns:
+            df[column] = (df[column] - global_min) / (global_max - global_min)
+    elif normalization_type == '最大值归一化':
+        all_y = df.iloc[:, 1:]
+        global_max = all_y.max().max()  # 找到所有列的全局最大值
+        for column in all_y.columns:
+            df[column] = df[column] / global_max
+    return df
+
+
+def normalize_files(folder_path, recursive=False):
+    """文件夹内需要归一化的数据文件（跳过已经归一化的结果）"""
+    return [f for f in collect_records(folder_path, recursive)
+            if not os.path.basename(f).startswith(NORMALIZED_PREFIXES)]
+
+
+def excel_normalize(file_path, row_normalize_select, global_normalize_select, normalization_type,
+                    storage_format='excel', excel_copy=False):
+    """
+    归一化处理并保存为新文件。
+    :param row_normalize_select: 是否保存每一y列各自归一化的结果
+    :param global_normalize_select: 是否保存所有y列一起归一化的结果
+    :return: 保存的文件路径列表
+    """
+    if normalization_type not in NORMALIZATION_TYPES:
+        raise ValueError(f'未知的归一化类型：{normalization_type}')
+    df, sheet_name, _ = load_record(file_path)
+    x_col_name = df.columns[0]
+    file_dir = os.path.dirname(file_path)
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    # new_file_name = 'Normalized_' + file_name
+    # save_path = file_path.replace(file_name, new_file_name)
+    # 根据归一化类型决定文件名后缀
+    normalization_suffix = 'max' if normalization_type == '最大值归一化' else 'maxmin'
+
+    df_individual_normalized = normalize_individual_columns(df.copy(), normalization_type)
+    df_all_y_normalized = normalize_all_y_together(df.copy(), normalization_type)
+
+    df_individual_normalized.columns = [x_col_name] + ['row_normalized_' + col
+                                                       for col in df_individual_normalized.columns[1:]]
+    df_all_y_normalized.columns = [x_col_name] + ['global_normalized_' + col
+                                                  for col in df_all_y_normalized.columns[1:]]
+
+    save_paths = []
+    if row_normalize_select:
+        save_path = os.path.join(file_dir, f'RowNormalized_{normalization_suffix}_{file_name}.xlsx')
+        save_path = save_record(df_individual_normalized, save_path, sheet_name, {'File Name': file_name},
+                                storage_format, excel_copy, excel_engine='openpyxl')
+        save_paths.append(save_path)
+
+    if global_normalize_select:
+        save_path = os.path.join(file_dir, f'GlobalNormalized_{normalization_suffix}_{file_name}.xlsx')
+        save_path = save_record(df_all_y_normalized, save_path, sheet_name, {'File Name': file_name},
+                                storage_format, excel_copy, excel_engine='openpyxl')
+        save_paths.append(save_path)
+
+    return save_paths
@@ -0,0 +1,158 @@
+"""
+批处理的分阶段计时：在读取解析（parse）、计算（math）、画图（plot）、保存图片（savefig）、写入数据（write）等阶段
+记录每个文件的用时与读写字节数，批处理结束后汇总各阶段的占比，可以导出为CSV跟踪性能变化
+
+只在批处理执行文件时（begin_file 与 end_file 之间）记录，页面中直接调用被计时的函数没有额外开销
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+STAGES = ('parse', 'math', 'plot', 'savefig', 'write', 'read')
+# 不属于任何已记录阶段的用时
+OTHER_STAGE = 'other'
+
+# 每个线程各自的记录，同一进程内多个会话同时顺序执行批处理时互不干扰：
+# current 为当前线程正在处理的文件的记录（阶段 → 用时，以及读写过的文件路径），为None时不记录；
+# stack 为正在执行的嵌套阶段，外层阶段的用时不包含内层阶段
+_local = threading.local()
+
+
+def _current():
+    return getattr(_local, 'current', None)
+
+
+def begin_file():
+    """开始记录一个文件"""
+    _local.current = {'stages': {}, 'read': set(), 'written': set()}
+    _local.stack = []
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError, ValueError):
+        return 0
+
+
+def end_file(total_time, read_paths=(), written_paths=()):
+    """
+    结束记录并返回该文件的分阶段用时
+    :param total_time: 处理该文件的总用时，未归入任何阶段的部分记为 other
+    :param read_paths: 额外计入读取字节数的文件（原始文件）
+    :param written_paths: 额外计入写入字节数的文件（输出文件）
+    :return: 字典，阶段名 → 用时[s]，以及 Read[B]、Written[B]
+    """
+    record, _local.current = _current(), None
+    if record is None:
+        return {}
+    profile = dict(record['stages'])
+    profile[OTHER_STAGE] = max(total_time - sum(profile.values()), 0.0)
+    # 同一个文件被多个阶段读取时只计一次
+    profile['Read[B]'] = sum(_file_size(path) for path in record['read'] | set(read_paths))
+    profile['Written[B]'] = sum(_file_size(path) for path in record['written'] | set(written_paths))
+    return profile
+
+
+class _StageRecord:
+    """stage 上下文中登记读写的文件"""
+
+    def __init__(self, current):
+        self._current = current
+
+    def read(self, path):
+        if self._current is not None and isinstance(path, str):
+            self._current['read'].add(os.path.abspath(path))
+
+    def written(self, path):
+        if self._current is not None and isinstance(path, str):
+            self._current['written'].add(os.path.abspath(path))
+
+
+@contextmanager
+def stage(name, read=None):
+    """
+    记录一个阶段的用时
+    :param name: 阶段名，见 STAGES
+    :param read: 该阶段读取的文件路径
+    使用方法：with stage('write') as record: path = save(...); record.written(path)
+    计时只是附带记录，记录状态异常时也不影响被计时的代码
+    """
+    current = _current()
+    record = _StageRecord(current)
+    if current is None:
+        yield record
+        return
+    record.read(read)
+    stack = _local.stack
+    frame = [name, 0.0]
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        elapsed = time.perf_counter() - start
+        # 只撤销本阶段压入的记录，期间开始了新的文件时（stack 已被替换）不再写入
+        if stack and stack[-1] is frame:
+            stack.pop()
+            stages = current['stages']
+            stages[name] = stages.get(name, 0.0) + elapsed - frame[1]
+            if stack:
+                stack[-1][1] += elapsed
+
+
+def profiled(name, read_arg=None, returns_written=False):
+    """
+    把整个函数记为一个阶段的装饰器
+    :param read_arg: 表示读取文件路径的第一个位置参数或关键字参数名
+    :param returns_written: 返回值是否为写入的文件路径
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current() is None:
+                return func(*args, **kwargs)
+            read = kwargs.get(read_arg, args[0] if args else None) if read_arg else None
+            with stage(name, read) as record:
+                result = func(*args, **kwargs)
+                if returns_written:
+                    record.written(result)
+            return result
+        return wrapper
+    return decorator
+
+
+# ---汇总---
+def profile_table(results):
+    """每个文件一行的分阶段用时表"""
+    rows = [{'File': result['File'], **result['Profile']} for result in results if result.get('Profile')]
+    table = pd.DataFrame(rows)
+    stage_columns = [column for column in (*STAGES, OTHER_STAGE) if column in table.columns]
+    return table.reindex(columns=['File', *stage_columns, 'Read[B]', 'Written[B]']).fillna(0.0)
+
+
+def breakdown(table, converter=''):
+    """
+    各阶段的汇总：总用时、占比、平均每个文件的用时
+    :param table: profile_table 的结果
+    :param converter: 转换函数名，写入汇总表，便于把多次导出的CSV合并后比较
+    """
+    stage_columns = [column for column in table.columns if column in (*STAGES, OTHER_STAGE)]
+    totals = table[stage_columns].sum()
+    total = totals.sum()
+    summary = pd.DataFrame({
+        'Stage': stage_columns,
+        'Time[s]': totals.to_numpy(),
+        'Share[%]': (totals / total * 100 if total else totals * 0).to_numpy(),
+        'Per File[ms]': (totals / max(len(table), 1) * 1000).to_numpy(),
+    })
+    summary.insert(0, 'Files', len(table))
+    summary.insert(0, 'Converter', converter)
+    summary.insert(0, 'Timestamp', pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'))
+    summary['Read[MB]'] = table['Read[B]'].sum() / 1e6
+    summary['Written[MB]'] = table['Written[B]'].sum() / 1e6
+    return summary
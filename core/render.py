@@ -0,0 +1,223 @@
+"""
+批量导出曲线图的渲染器：每种图在每个线程中只建一次Agg画布模板，之后每个文件只替换曲线数据再保存
+不使用pyplot的全局状态，可以在批处理的工作进程中反复调用；模板按线程保存，多个会话在页面线程中同时渲染时互不干扰
+"""
+import os
+import threading
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from core.profiling import stage
+
+FIGURE_FORMATS = ('png', 'jpg', 'svg', 'pdf')
+
+# 每个线程中已经建好的模板：图类型 → (figure, 更新函数)
+_local = threading.local()
+_builders = {}
+
+
+def template(kind):
+    """注册一种图的模板构建函数，构建函数返回 (figure, update(df, label, **options))"""
+    def register(builder):
+        _builders[kind] = builder
+        return builder
+    return register
+
+
+def _new_figure(figsize=None):
+    # 字体只需要在进程中设置一次
+    rcParams['font.sans-serif'] = ['simhei']
+    rcParams['axes.unicode_minus'] = False
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _fix_layout(fig, axes, sample_x=(0.0, 1.0), sample_y=(-1e-3, 1e-3)):
+    """用一组有代表性的数据做一次tight_layout，之后复用这组边距，不再每张图重新计算布局"""
+    for ax in axes:
+        ax.set_xlim(*sample_x)
+        ax.set_ylim(*sample_y)
+    fig.tight_layout()
+    fig.set_layout_engine('none')
+    for ax in axes:
+        ax.set_autoscale_on(True)
+
+
+def _rescale(ax):
+    ax.relim()
+    ax.autoscale_view()
+
+
+def get_template(kind):
+    """取出本线程中的模板，第一次使用时构建"""
+    templates = _local.__dict__.setdefault('templates', {})
+    if kind not in templates:
+        templates[kind] = _builders[kind]()
+    return templates[kind]
+
+
+def render(kind, df, label, save_path, dpi=300, fig_format='png', **options):
+    """
+    用模板渲染一张图并保存
+    :param kind: 图类型，见 _builders
+    :param df: 数据表
+    :param label: 曲线标签
+    :param save_path: 保存路径，后缀会替换为 fig_format
+    :param options: 传给模板更新函数的参数，例如XRD的 x_bar
+    :return: 图片路径
+    """
+    with stage('plot'):
+        fig, update = get_template(kind)
+        # 上一张图手动设置的坐标范围（如XRD的 x_bar）会关闭自动缩放，每张图重新开启
+        for ax in fig.axes:
+            ax.set_autoscale_on(True)
+        update(df, label, **options)
+    save_path = os.path.splitext(save_path)[0] + f'.{fig_format}'
+    with stage('savefig') as record:
+        fig.savefig(save_path, dpi=dpi, format=fig_format)
+        record.written(save_path)
+    return save_path
+
+
+# ---电学曲线---
+def _xy_template(x_name, y_name, sci_y=True):
+    fig = _new_figure()
+    ax = fig.add_subplot()
+    line, = ax.plot([], [], label=' ')
+    ax.set_xlabel(x_name)
+    ax.set_ylabel(y_name)
+    if sci_y:
+        # 使用科学计数法表示纵轴坐标
+        ax.ticklabel_format(style='sci', axis='y', scilimits=(0, 0))
+    _fix_layout(fig, [ax])
+
+    def update(df, label):
+        line.set_data(df[x_name], df[y_name])
+        line.set_label(label)
+        _rescale(ax)
+        ax.legend()
+    return fig, update
+
+
+def _two_panel_template(top_name, bottom_name, sci_top, sci_bottom):
+    """上下两个子图（高度比1:3）共用时间轴"""
+    fig = _new_figure(figsize=(4, 5))
+    gs = fig.add_gridspec(2, 1, height_ratios=[1, 3])  # 子图高度比例
+    axes, lines = [], []
+    for spec, y_name, sci in ((gs[0], top_name, sci_top), (gs[1], bottom_name, sci_bottom)):
+        ax = fig.add_subplot(spec)
+        line, = ax.plot([], [], label=' ')
+        ax.set_xlabel('Time[s]')
+        ax.set_ylabel(y_name)
+        if sci:
+            ax.ticklabel_format(style='sci', axis='y', scilimits=(0, 0))
+        axes.append(ax)
+        lines.append(line)
+    _fix_layout(fig, axes[1:])
+
+    def update(df, label):
+        for ax, line, y_name in zip(axes, lines, (top_name, bottom_name)):
+            line.set_data(df['Time[s]'], df[y_name])
+            line.set_label(label)
+            _rescale(ax)
+        axes[1].legend()
+    return fig, update
+
+
+template('CV')(lambda: _xy_template('Potential[V]', 'Current[A]'))
+template('LSV')(lambda: _xy_template('Potential[V]', 'Current[A]', sci_y=False))
+template('OCP')(lambda: _xy_template('Time[s]', 'Potential[V]', sci_y=False))
+template('It_CA')(lambda: _two_panel_template('Potential[V]', 'Current[A]', False, True))
+template('Vt')(lambda: _two_panel_template('Current[A]', 'Potential[V]', True, False))
+
+
+# ---XRD---
+@template('XRD')
+def _xrd_template():
+    fig = _new_figure(figsize=(12, 6))
+    ax = fig.add_subplot()
+    raw, = ax.plot([], [], label=' ')
+    smoothed, = ax.plot([], [], label='Smoothed Intensity')
+    ax.set_xlabel('2Θ[degree]')
+    ax.set_ylabel('Intensity[a.u.]')
+    ax.ticklabel_format(style='sci', axis='y', scilimits=(0, 0))
+    _fix_layout(fig, [ax], sample_y=(0, 1e4))
+
+    def update(df, label, x_bar=None):
+        raw.set_data(df['2Θ[degree]'], df['Intensity[a.u.]'])
+        smoothed.set_data(df['2Θ[degree]'], df['Smoothed Intensity[a.u.]'])
+        raw.set_label(label)
+        _rescale(ax)
+        if x_bar is not None:
+            ax.set_xlim(x_bar[0], x_bar[1])
+        ax.legend()
+    return fig, update
+
+
+# ---FTIR---
+@template('FTIR')
+def _ftir_template():
+    fig = _new_figure(figsize=(12, 6))
+    ax1 = fig.add_subplot()
+    raw, = ax1.plot([], [], label=' ', color='tab:blue')
+    ax1.set_xlabel('Wavenumbers[cm-1]')
+    ax1.set_ylabel('Intensity', color='tab:blue')
+    ax2 = ax1.twinx()
+    corrected, = ax2.plot([], [], label='Corrected Transmittance', color='tab:red')
+    ax2.set_ylabel('Corrected Transmittance', color='tab:red')
+    _fix_layout(fig, [ax1, ax2], sample_x=(4000, 400), sample_y=(0, 100))
+
+    def update(df, label):
+        x = df['Wavenumbers[cm-1]']
+        raw.set_data(x, df['Transmittance'])
+        raw.set_label(label)
+        has_corrected = 'Corrected Transmittance' in df.columns
+        ax2.set_visible(has_corrected)
+        handles = [raw]
+        if has_corrected:
+            corrected.set_data(x, df['Corrected Transmittance'])
+            _rescale(ax2)
+            handles.append(corrected)
+        _rescale(ax1)
+        # 反转x轴（波数从大到小）
+        ax1.set_xlim(np.nanmax(x), np.nanmin(x))
+        ax1.legend(handles, [handle.get_label() for handle in handles], loc='upper right')  # 合并图例
+    return fig, update
+
+
+# ---IV（电阻）---
+@template('IV')
+def _iv_template():
+    fig = _new_figure()
+    ax = fig.add_subplot()
+    ax.grid(True)  # 辅助网格样式
+    ax.set_xlabel('Potential[V]')
+    ax.set_ylabel('Current[A]')
+    ax.ticklabel_format(style='sci', axis='y', scilimits=(0, 0))
+    data, = ax.plot([], [], marker='o', linestyle='-', label=' ')
+    fit, = ax.plot([], [], linestyle='--', label='Linear Fit')
+    title = ax.set_title('\n\n')
+    _fix_layout(fig, [ax])
+
+    def update(df, label, w_l_value=1.0):
+        potential = df.iloc[:, 0].to_numpy(dtype=float)
+        current = df.iloc[:, 1].to_numpy(dtype=float)
+        # 线性拟合的系数与相关系数
+        coeffs = np.polyfit(potential, current, 1)
+        correlation = np.corrcoef(potential, current)[0, 1]
+        data.set_data(potential, current)
+        data.set_label(label)
+        fit.set_data(potential, np.polyval(coeffs, potential))
+        # 在标题中添加相关系数,线性拟合的斜率与截距(科学计数法表示)
+        title.set_text(f'IV Curve with Linear Fit Coefficients\n'
+                       f'Correlation Coefficient: {correlation:.4f}, '
+                       f'Slope: {coeffs[0]:.2e}\n'
+                       f'Sheet Resistance[ohm/sq]: {(1 / coeffs[0]) * w_l_value:.2e}')
+        _rescale(ax)
+        ax.legend()
+    return fig, update
+
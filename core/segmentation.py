@@ -0,0 +1,66 @@
+"""CV/GCD数据分段：按电位扫描方向翻转或电流正负换向给每个数据点标记分段编号"""
+import os
+
+from core.storage import collect_records, load_record, save_record
+from utils.segment import label_segments, reversal_starts, segment_ranges, sign_change_starts
+
+# 分段结果文件名的前缀
+SEGMENT_PREFIX = 'segment_'
+
+
+def CV_segment(df, hysteresis=0.0):
+    """
+    按电位扫描方向翻转分段
+    :param df: 包含 'Potential[V]' 列的数据
+    :param hysteresis: 电位噪声滞回阈值[V]
+    :return: (长表格式的分段数据, 分段索引范围)
+    """
+    starts = reversal_starts(df['Potential[V]'].to_numpy(), hysteresis)
+    return _long_format(df, segment_ranges(starts, len(df)))
+
+
+def GCD_segment(df, hysteresis=0.0):
+    """
+    按电流正负换向分段
+    :param df: 包含 'Current[A]' 列的数据
+    :param hysteresis: 电流噪声滞回阈值[A]
+    :return: (长表格式的分段数据, 分段索引范围)
+    """
+    starts = sign_change_starts(df['Current[A]'].to_numpy(), hysteresis)
+    return _long_format(df, segment_ranges(starts, len(df)))
+
+
+def _long_format(df, ranges):
+    """长表格式：保留原始各列，新增一列 Segment 标记分段编号"""
+    segments_df = df.reset_index(drop=True)
+    segments_df.insert(0, 'Segment', label_segments(ranges, len(df)))
+    return segments_df, ranges
+
+
+def segment_files(folder_path, recursive=False):
+    """文件夹内需要分段的数据文件（跳过已经分段的结果）"""
+    return [f for f in collect_records(folder_path, recursive)
+            if not os.path.basename(f).startswith(SEGMENT_PREFIX)]
+
+
+def segment_record(file_path, cv_hysteresis=0.0, gcd_hysteresis=0.0, storage_format='excel', excel_copy=False):
+    """
+    对单个数据文件分段（批处理的工作函数），根据数据表名称自动区分CV/GCD
+    :return: 分段结果的文件路径，不是CV/GCD数据时返回None
+    """
+    # 读取数据文件（excel/parquet/feather），获取file_name，即电学曲线的标签
+    df, sheet_name, parameters = load_record(file_path)
+    if 'CV' in sheet_name:
+        segments_df, ranges = CV_segment(df, cv_hysteresis)
+        parameters['Hysteresis'] = cv_hysteresis
+    elif 'GCD' in sheet_name:
+        segments_df, ranges = GCD_segment(df, gcd_hysteresis)
+        parameters['Hysteresis'] = gcd_hysteresis
+    else:
+        return None
+
+    # 保存路径：长表格式，行数与原始数据相同
+    parameters['Segments'] = len(ranges)
+    save_path = os.path.join(os.path.dirname(file_path), SEGMENT_PREFIX + os.path.basename(file_path))
+    return save_record(segments_df, save_path, f'{sheet_name}_segment', parameters, storage_format, excel_copy,
+                       excel_engine='xlsxwriter')
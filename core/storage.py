@@ -0,0 +1,187 @@
+"""数据记录的存储层：同一份“数据表 + 参数表”可以保存为Excel、Parquet或Feather，读取时统一返回相同的结构"""
+import json
+import os
+
+import pandas as pd
+
+from core.profiling import profiled, stage
+
+# 存储格式与文件后缀
+STORAGE_FORMATS = {'excel': '.xlsx', 'parquet': '.parquet', 'feather': '.feather'}
+RECORD_SUFFIXES = tuple(STORAGE_FORMATS.values())
+# 列式文件中保存sheet名与参数的元数据键
+METADATA_KEY = b'streamlitweb.record'
+
+
+def _to_builtin(value):
+    """将numpy标量等转换为json可以序列化的python类型"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def record_path(output_path, storage_format):
+    """根据存储格式替换输出文件的后缀"""
+    return os.path.splitext(output_path)[0] + STORAGE_FORMATS[storage_format]
+
+
+def is_record_file(file_name):
+    return file_name.endswith(RECORD_SUFFIXES)
+
+
+def _write_excel(df, excel_path, sheet_name, parameters, engine=None):
+    with pd.ExcelWriter(excel_path, engine=engine) as writer:
+        # 将 df 保存到名为 sheet_name 的 sheet 中
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+        # 创建包含参数的 DataFrame，保存到名为 'parameter' 的 sheet 中
+        pd.DataFrame({key: [value] for key, value in parameters.items()}).to_excel(
+            writer, sheet_name='parameter', index=False)
+
+
+def _record_metadata(schema, sheet_name, parameters):
+    """将sheet名与参数写入schema的元数据"""
+    record_meta = json.dumps({'sheet_name': sheet_name,
+                              'parameters': {key: _to_builtin(value) for key, value in parameters.items()}},
+                             ensure_ascii=False)
+    return schema.with_metadata({**(schema.metadata or {}), METADATA_KEY: record_meta.encode()})
+
+
+def _write_columnar(df, path, sheet_name, parameters, storage_format):
+    import pyarrow as pa
+
+    # 列名统一为字符串，参数与sheet名写入文件的schema元数据
+    df = df.rename(columns=str)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(_record_metadata(table.schema, sheet_name, parameters).metadata)
+    if storage_format == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path)
+
+
+def _write_columnar_chunks(chunks, path, sheet_name, parameters, storage_format):
+    """逐块写入列式文件，内存中只保留当前块"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer, schema = None, None
+    try:
+        for df in chunks:
+            table = pa.Table.from_pandas(df.rename(columns=str), preserve_index=False)
+            if writer is None:
+                schema = _record_metadata(table.schema, sheet_name, parameters)
+                if storage_format == 'parquet':
+                    writer = pq.ParquetWriter(path, schema)
+                else:
+                    # feather v2 即 Arrow IPC 文件格式，可以按批追加
+                    writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression='lz4'))
+            writer.write_table(table.replace_schema_metadata(schema.metadata))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError('没有可以写入的数据')
+
+
+def save_record(df, output_path, sheet_name, parameters, storage_format='excel', excel_copy=False,
+                excel_engine=None):
+    """
+    保存一份数据记录
+    :param df: 数据表
+    :param output_path: 输出路径（后缀会按存储格式替换）
+    :param sheet_name: 数据表的名称（Excel中的sheet名，下游程序用它识别测试模式/光谱类型）
+    :param parameters: 参数字典，例如 {'File Name': file_name}
+    :param storage_format: 'excel' / 'parquet' / 'feather'
+    :param excel_copy: 使用列式格式时是否同时导出一份Excel
+    :param excel_engine: Excel写入引擎
+    :return: 主输出文件的路径
+    """
+    path = record_path(output_path, storage_format)
+    with stage('write') as record:
+        if storage_format == 'excel':
+            _write_excel(df, path, sheet_name, parameters, excel_engine)
+        else:
+            _write_columnar(df, path, sheet_name, parameters, storage_format)
+            if excel_copy:
+                _write_excel(df, record_path(output_path, 'excel'), sheet_name, parameters, excel_engine)
+                record.written(record_path(output_path, 'excel'))
+        record.written(path)
+    return path
+
+
+def save_record_chunks(chunks, output_path, sheet_name, parameters, storage_format='excel', excel_copy=False,
+                       excel_engine=None):
+    """
+    分块保存一份数据记录，参数含义同 save_record
+    :param chunks: 列名相同的 DataFrame 迭代器；parquet/feather 逐块写入，excel 需要合并后一次写入
+    :return: 主输出文件的路径
+    """
+    path = record_path(output_path, storage_format)
+    # 按块读取时解析发生在逐块写入的过程中，两者的用时都计入 write
+    with stage('write') as record:
+        if storage_format == 'excel':
+            _write_excel(pd.concat(chunks, ignore_index=True), path, sheet_name, parameters, excel_engine)
+        else:
+            _write_columnar_chunks(chunks, path, sheet_name, parameters, storage_format)
+            if excel_copy:
+                _write_excel(load_record(path)[0], record_path(output_path, 'excel'), sheet_name, parameters,
+                             excel_engine)
+                record.written(record_path(output_path, 'excel'))
+        record.written(path)
+    return path
+
+
+@profiled('read', read_arg='source')
+def load_record(source, sheet_name=None):
+    """
+    读取一份数据记录
+    :param source: 文件路径，或带有name属性的文件对象（例如st.file_uploader的返回值）
+    :param sheet_name: 要读取的sheet名，为None时读取第一个sheet；列式文件只有一张表，名称不符时抛出ValueError
+    :return: (数据表, sheet名, 参数字典)
+    """
+    name = source if isinstance(source, str) else source.name
+    if name.endswith(('.parquet', '.feather')):
+        if name.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            table = pq.read_table(source)
+        else:
+            import pyarrow.feather as feather
+            table = feather.read_table(source)
+        record_meta = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b'{}'))
+        record_sheet = record_meta.get('sheet_name', os.path.splitext(os.path.basename(name))[0])
+        if sheet_name is not None and sheet_name != record_sheet:
+            raise ValueError(f'{os.path.basename(name)} 中没有名为 {sheet_name} 的数据表')
+        return table.to_pandas(), record_sheet, record_meta.get('parameters', {})
+
+    # Excel：第一个sheet（或指定的sheet）为数据，'parameter' sheet的第一行为参数
+    workbook = pd.ExcelFile(source)
+    if sheet_name is None:
+        sheet_name = workbook.sheet_names[0]
+    df = workbook.parse(sheet_name)
+    parameters = {}
+    if 'parameter' in workbook.sheet_names:
+        parameter_df = workbook.parse('parameter')
+        if not parameter_df.empty:
+            parameters = {key: _to_builtin(value) for key, value in parameter_df.iloc[0].items()}
+    return df, sheet_name, parameters
+
+
+def collect_records(folder, recursive=False):
+    """
+    收集文件夹内的数据记录文件；同一记录同时存在列式文件与Excel副本时只保留列式文件
+    :return: 文件路径列表
+    """
+    if recursive:
+        paths = [os.path.join(root, file) for root, _, files in os.walk(folder) for file in files]
+    else:
+        paths = [os.path.join(folder, file) for file in os.listdir(folder)]
+    paths = [path for path in paths if is_record_file(path) and not os.path.basename(path).startswith('~$')]
+
+    # 按后缀优先级去重：parquet/feather 优先于 xlsx
+    priority = {'.parquet': 0, '.feather': 1, '.xlsx': 2}
+    records = {}
+    for path in sorted(paths, key=lambda p: priority[os.path.splitext(p)[1]]):
+        records.setdefault(os.path.splitext(path)[0], path)
+    return sorted(records.values())
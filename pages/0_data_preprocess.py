@@ -3,69 +3,38 @@ page_0：将数据从原始格式转换为统一格式，并初步进行批量
 """
 import streamlit as st
 
-from pages.preprocess import (keithley_txt2excel, ichy_csv2excel, chi_txt2excel, lanhe_csv2excel,
-                              IV_excel2fig_merge, electricity_excel2fig,
-                              electricity_excel_split_segment,
-                              uv_sca2excel, uv_excel_merge2fig, excel_normalize,
-                              avantes_raw2excel, avantes_excel2fig_split, olympus_csv2excel,
-                              XRD_txt2excel, XRD_excel2fig, FTIR_csv2excel, FTIR_excel2fig,
-                              Step_xml2excel,
-                              image_add_name_scale, files_remove, files_copy)
+from utils.registry import run_tool
 
 # ----------页面属性控制----------
 # 设置页面宽度必须在第一句，且全局只能设置一次
 st.set_page_config(layout="wide")
 
-# 设置选项按钮，选择运行哪个数据预处理程序
-tools = ['keithley.txt转excel', 'ichy.csv转excel', 'chi.txt转excel', 'LANHE.csv转excel',
-         '电阻.excel数据合并与画图', '其他电学.excel数据画图',
-         '其他电学.excel数据分段',
-         'uv.sca转excel', 'uv.excel数据合并与画图', 'excel数据归一化',
-         'avantes.raw转excel', 'avantes.excel数据画图与拆分',
-         'olympus.csv转excel', 'XRD.txt转excel', 'XRD.excel数据画图', 'FTIR.csv转excel', 'FTIR.excel数据画图',
-         'Step.xml转excel',
-         'image添加名称与比例尺', '批量删除文件', '批量复制/移动文件']
-option = st.sidebar.selectbox('选择运行哪个数据**批量预处理**小程序', tools)
-if option == 'keithley.txt转excel':
-    keithley_txt2excel.st_main()
-elif option == 'ichy.csv转excel':
-    ichy_csv2excel.st_main()
-elif option == 'chi.txt转excel':
-    chi_txt2excel.st_main()
-elif option == 'LANHE.csv转excel':
-    lanhe_csv2excel.st_main()
-elif option == '电阻.excel数据合并与画图':
-    IV_excel2fig_merge.st_main()
-elif option == '其他电学.excel数据画图':
-    electricity_excel2fig.st_main()
-elif option == '其他电学.excel数据分段':
-    electricity_excel_split_segment.st_main()
-elif option == 'uv.sca转excel':
-    uv_sca2excel.st_main()
-elif option == 'uv.excel数据合并与画图':
-    uv_excel_merge2fig.st_main()
-elif option == 'excel数据归一化':
-    excel_normalize.st_main()
-elif option == 'avantes.raw转excel':
-    avantes_raw2excel.st_main()
-elif option == 'olympus.csv转excel':
-    olympus_csv2excel.st_main()
-elif option == 'avantes.excel数据画图与拆分':
-    avantes_excel2fig_split.st_main()
-elif option == 'XRD.txt转excel':
-    XRD_txt2excel.st_main()
-elif option == 'XRD.excel数据画图':
-    XRD_excel2fig.st_main()
-elif option == 'FTIR.csv转excel':
-    FTIR_csv2excel.st_main()
-elif option == 'FTIR.excel数据画图':
-    FTIR_excel2fig.st_main()
-elif option == 'Step.xml转excel':
-    Step_xml2excel.st_main()
-elif option == 'image添加名称与比例尺':
-    image_add_name_scale.st_main()
-elif option == '批量删除文件':
-    files_remove.st_main()
-elif option == '批量复制/移动文件':
-    files_copy.st_main()
+# 工具注册表：侧边栏选项 → (模块路径, 入口函数)，只导入被选中的工具
+TOOLS = {
+    '自动识别仪器格式转excel': ('pages.preprocess.auto_ingest2excel', 'st_main'),
+    'keithley.txt转excel': ('pages.preprocess.keithley_txt2excel', 'st_main'),
+    'ichy.csv转excel': ('pages.preprocess.ichy_csv2excel', 'st_main'),
+    'chi.txt转excel': ('pages.preprocess.chi_txt2excel', 'st_main'),
+    'LANHE.csv转excel': ('pages.preprocess.lanhe_csv2excel', 'st_main'),
+    '电阻.excel数据合并与画图': ('pages.preprocess.IV_excel2fig_merge', 'st_main'),
+    '其他电学.excel数据画图': ('pages.preprocess.electricity_excel2fig', 'st_main'),
+    '其他电学.excel数据分段': ('pages.preprocess.electricity_excel_split_segment', 'st_main'),
+    'uv.sca转excel': ('pages.preprocess.uv_sca2excel', 'st_main'),
+    'uv.excel数据合并与画图': ('pages.preprocess.uv_excel_merge2fig', 'st_main'),
+    'excel数据归一化': ('pages.preprocess.excel_normalize', 'st_main'),
+    'avantes.raw转excel': ('pages.preprocess.avantes_raw2excel', 'st_main'),
+    'avantes.excel数据画图与拆分': ('pages.preprocess.avantes_excel2fig_split', 'st_main'),
+    'olympus.csv转excel': ('pages.preprocess.olympus_csv2excel', 'st_main'),
+    'XRD.txt转excel': ('pages.preprocess.XRD_txt2excel', 'st_main'),
+    'XRD.excel数据画图': ('pages.preprocess.XRD_excel2fig', 'st_main'),
+    'FTIR.csv转excel': ('pages.preprocess.FTIR_csv2excel', 'st_main'),
+    'FTIR.excel数据画图': ('pages.preprocess.FTIR_excel2fig', 'st_main'),
+    'Step.xml转excel': ('pages.preprocess.Step_xml2excel', 'st_main'),
+    'image添加名称与比例尺': ('pages.preprocess.image_add_name_scale', 'st_main'),
+    '批量删除文件': ('pages.preprocess.files_remove', 'st_main'),
+    '批量复制/移动文件': ('pages.preprocess.files_copy', 'st_main'),
+}
 
+# 设置选项按钮，选择运行哪个数据预处理程序
+option = st.sidebar.selectbox('选择运行哪个数据**批量预处理**小程序', list(TOOLS))
+run_tool(TOOLS, option)
@@ -3,30 +3,23 @@ page_1：数据处理，从获取的标准格式数据中，进一步提取有
 """
 import streamlit as st
 
-from pages.process import (time_series_Spectrum, time_series_CV, IV_resistance, image_crop, image_coffee_ring,
-                           confocal_heatmap, electropolymerization_analysis)
+from utils.registry import run_tool
 
 # ----------页面属性控制----------
 # 设置页面宽度必须在第一句，且全局只能设置一次
 st.set_page_config(layout="centered")
 
-# 设置选项按钮，选择运行哪个数据处理程序
-tools = ['IV曲线电阻率计算', '图片裁剪', '咖啡环数据采集', '时间序列的光谱数据', '时间序列的电学数据', '激光共聚焦数据', '电聚合I-t曲线分析']
-option = st.sidebar.selectbox('选择运行哪个数据**可视化处理**小程序', tools)
-if option == 'IV曲线电阻率计算':
-    IV_resistance.st_main()
-elif option == '图片裁剪':
-    image_crop.st_main()
-elif option == '咖啡环数据采集':
-    image_coffee_ring.st_main()
-elif option == '时间序列的光谱数据':
-    time_series_Spectrum.st_main()
-elif option == '时间序列的电学数据':
-    time_series_CV.st_main()
-elif option == '激光共聚焦数据':
-    confocal_heatmap.st_main()
-elif option == '电聚合I-t曲线分析':
-    electropolymerization_analysis.st_main()
-
-
+# 工具注册表：侧边栏选项 → (模块路径, 入口函数)，只导入被选中的工具
+TOOLS = {
+    'IV曲线电阻率计算': ('pages.process.IV_resistance', 'st_main'),
+    '图片裁剪': ('pages.process.image_crop', 'st_main'),
+    '咖啡环数据采集': ('pages.process.image_coffee_ring', 'st_main'),
+    '时间序列的光谱数据': ('pages.process.time_series_Spectrum', 'st_main'),
+    '时间序列的电学数据': ('pages.process.time_series_CV', 'st_main'),
+    '激光共聚焦数据': ('pages.process.confocal_heatmap', 'st_main'),
+    '电聚合I-t曲线分析': ('pages.process.electropolymerization_analysis', 'st_main'),
+}
 
+# 设置选项按钮，选择运行哪个数据处理程序
+option = st.sidebar.selectbox('选择运行哪个数据**可视化处理**小程序', list(TOOLS))
+run_tool(TOOLS, option)
@@ -3,10 +3,14 @@
 '''
 import streamlit as st
 import pandas as pd
-import base64
 from st_aggrid import GridOptionsBuilder, AgGrid
 from st_aggrid.shared import JsCode
 
+from utils.thumbnail import original_image_viewer, thumbnail_columns
+
+# 显示为图片的列
+IMAGE_COLUMNS = ['Struct', 'UV', 'NearIR', 'IR', 'HNMR', 'MS']
+
 
 # 定义一个用于显示图片的JavaScript函数，在表格的每个单元格中显示图片
 # 根据列名修改params.data中的属性，单元格的数据不为空，则创建一个包含图片的img元素
@@ -38,23 +42,12 @@ def load_data(excel_file_path, sheet_name):
     return df
 
 
-# 将本地的图片转为web可读的uri格式
-def create_image_uri(image_path):
-    try:
-        image_bs64 = base64.b64encode(open(image_path, 'rb').read()).decode()  # 读取本地图片文件并将其转换为Base64编码的字符串
-        image_format = image_path[-4:]  # 后四个字符是图片的格式类型
-        return f'data:image/{image_format};base64,' + image_bs64
-    # 读取或转换失败，则返回空字符串
-    except:
-        return ""
-
-
 def display_solute_information(df_solute):
     # -----📓-----
     st.subheader(":notebook: 溶质基本属性信息查询")
-    # 使用apply方法，在DataFrame的每一行上应用写入uri信息函数
-    for row in ['Struct', 'UV', 'NearIR', 'IR', 'HNMR', 'MS']:
-        df_solute[row] = df_solute[row].apply(create_image_uri)
+    # 图片列替换为缩略图地址（每张原图只缩小一次），原始路径留给按需查看原图
+    df_solute_paths = df_solute
+    df_solute = thumbnail_columns(df_solute, IMAGE_COLUMNS)
 
     # 多项选择按钮，用于选择要显示的列
     selected_columns = st.multiselect('多项选择框中为默认排序，可根据需要选择显示的数据列', df_solute.columns,
@@ -89,20 +82,23 @@ def display_solute_information(df_solute):
     # 配置Ag-Grid的侧边栏
     builder.configure_side_bar()
     # 配置Struct UV NearIR IR HNMR MS列，使用cellRenderer参数来指定一个用于显示图片的JavaScript函数。
-    builder.configure_columns(['Struct', 'UV', 'NearIR', 'IR', 'HNMR', 'MS'], cellRenderer=ShowImage)
+    builder.configure_columns(IMAGE_COLUMNS, cellRenderer=ShowImage)
     go = builder.build()
     # 在web上显示DataFrame对象
     AgGrid(df_solute_copy, gridOptions=go, theme='light', height=300, allow_unsafe_jscode=True)
 
+    # -----🔍-----
+    original_image_viewer(df_solute_paths, 'Chinese Name', IMAGE_COLUMNS, key='solute_original')
+
     return None
 
 
 def display_solvent_information(df_solvent):
     # -----📓-----
     st.subheader(":notebook: 溶剂基本属性信息查询")
-    # 使用apply方法，在DataFrame的每一行上应用写入uri信息函数
-    for row in ['Struct', 'UV', 'NearIR', 'IR', 'HNMR', 'MS']:
-        df_solvent[row] = df_solvent[row].apply(create_image_uri)
+    # 图片列替换为缩略图地址（每张原图只缩小一次），原始路径留给按需查看原图
+    df_solvent_paths = df_solvent
+    df_solvent = thumbnail_columns(df_solvent, IMAGE_COLUMNS)
 
     # 多项选择按钮，用于选择要显示的列
     selected_columns = st.multiselect('多项选择框中为默认排序，可根据需要选择显示的数据列', df_solvent.columns,
@@ -134,11 +130,14 @@ def display_solvent_information(df_solvent):
     # 配置Ag-Grid的侧边栏
     builder.configure_side_bar()
     # 配置Struct UV NearIR IR HNMR MS列，使用cellRenderer参数来指定一个用于显示图片的JavaScript函数。
-    builder.configure_columns(['Struct', 'UV', 'NearIR', 'IR', 'HNMR', 'MS'], cellRenderer=ShowImage)
+    builder.configure_columns(IMAGE_COLUMNS, cellRenderer=ShowImage)
     go = builder.build()
     # 在web上显示DataFrame对象
     AgGrid(df_solvent, gridOptions=go, theme='light', height=300, allow_unsafe_jscode=True)
 
+    # -----🔍-----
+    original_image_viewer(df_solvent_paths, 'Chinese Name', IMAGE_COLUMNS, key='solvent_original')
+
     return None
 
 
@@ -3,12 +3,13 @@
 '''
 import pandas as pd
 import streamlit as st
-import base64
 import os
 import PIL.Image as Image
 from st_aggrid import GridOptionsBuilder, AgGrid
 from st_aggrid.shared import JsCode
 
+from utils.thumbnail import thumbnail_url
+
 
 ShowImage = JsCode("""
     function (params) {
@@ -30,17 +31,6 @@ ShowImage = JsCode("""
 """)
 
 
-def create_image_uri(image_path):
-    """读取本地图片文件并将其转换为Base64编码的字符串
-    """
-    try:
-        image_bs64 = base64.b64encode(open(image_path, 'rb').read()).decode()
-        image_format = image_path[-4:]
-        return f'data:image/{image_format};base64,' + image_bs64
-    except:
-        return ""
-
-
 def string_to_list(path_string, separator=','):
     """将逗号分隔的多个路径字符串转换为列表
     """
@@ -59,8 +49,8 @@ def img_paths_to_dataframe(path_list):
     for path in path_list:
         if path.lower().endswith('.png'):
             column_name = os.path.basename(path)
-            # 创建Base64编码的URI并将其存储为值
-            data[column_name] = [create_image_uri(path)]
+            # 缩略图的静态文件地址（只在第一次显示时生成）作为值
+            data[column_name] = [thumbnail_url(path)]
     # 返回只有图片的dataframe
     return pd.DataFrame(data)
 
@@ -126,7 +116,7 @@ def data_analysis(excel_file_path):
         for solution_number in selected_number:
             # 读取单元格中的图片路径，并将其转换为列表
             solution_image_paths = string_to_list(filtered_df.loc[solution_number, 'Solution Image'])
-            # 将图片路径列表转换为dataframe，其中路径转为Base64编码的URI
+            # 将图片路径列表转换为dataframe，其中路径转为缩略图地址
             solution_image_df = img_paths_to_dataframe(solution_image_paths)
             # 使用Ag-Grid在网页上显示图片
             builder = GridOptionsBuilder.from_dataframe(solution_image_df, enableRowGroup=True)
@@ -134,6 +124,9 @@ def data_analysis(excel_file_path):
             builder.configure_columns(solution_image_df.columns, cellRenderer=ShowImage)
             go = builder.build()
             AgGrid(solution_image_df, gridOptions=go, theme='fresh', height=130, allow_unsafe_jscode=True)
+            # 原图只在勾选后读取
+            if st.checkbox(f'查看{solution_number}的原图', key=f'original_{solution_number}'):
+                st.image([path for path in solution_image_paths if os.path.exists(path)])
 
 
 
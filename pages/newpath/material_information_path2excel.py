@@ -7,50 +7,77 @@ import pandas as pd
 import os
 
 
+# 图片类型（列名）与图片文件的后缀，图片文件名为 {Chinese Name}_{图片类型}.png
+IMAGE_TYPES = ['Struct', 'UV', 'IR', 'NearIR', 'HNMR', 'MS']
+IMAGE_SUFFIX = '.png'
+
+
+def scan_image_folder(image_folder, image_types=IMAGE_TYPES):
+    """
+    只列一次图片文件夹，建立 图片类型 → {Chinese Name: 图片路径} 的索引，代替对每个化学品的每类图片分别判断文件是否存在
+    :return: 字典，键为图片类型
+    """
+    index = {image_type: {} for image_type in image_types}
+    with os.scandir(image_folder) as entries:
+        for entry in entries:
+            stem, suffix = os.path.splitext(entry.name)
+            if suffix.lower() != IMAGE_SUFFIX:
+                continue
+            # 化学品名称中可能含有下划线，只按最后一个下划线拆分
+            chinese_name, _, image_type = stem.rpartition('_')
+            if chinese_name and image_type in index and entry.is_file():
+                index[image_type][chinese_name] = os.path.join(image_folder, entry.name)
+    return index
+
+
+def fill_image_paths(df, index):
+    """
+    按 Chinese Name 一次填写所有图片列，没有找到图片时保留表格中原来的内容
+    :param index: scan_image_folder 的结果
+    :return: (填写后的DataFrame, 新填写的路径个数)
+    """
+    df = df.copy()
+    names = df['Chinese Name']
+    filled = 0
+    for image_type, paths_by_name in index.items():
+        # 全为空的列会被推断为float，统一为object避免combine_first改变列的类型
+        scanned = names.map(paths_by_name).astype(object)
+        old = df[image_type].astype(object) if image_type in df.columns else pd.Series(index=df.index, dtype=object)
+        # 本次扫描的结果优先，只有原来为空、由本次扫描填写的单元格计为新填写
+        filled += int((scanned.notna() & old.isna()).sum())
+        df[image_type] = scanned.combine_first(old)
+    return df, filled
+
+
 def update_excel_with_image_paths(input_file, output_file, image_folder):
+    """将图片路径写入新的Excel文件"""
     # 读取Excel文件的所有sheet
     all_sheets = pd.read_excel(input_file, sheet_name=None)
+    # 图片文件夹只扫描一次，溶质与溶剂共用
+    index = scan_image_folder(image_folder)
 
     # -----合并"单体"、"配体"和"氧化剂" sheet-----
     monomer_sheet = all_sheets['monomer']
     ligand_sheet = all_sheets['ligand']
     oxidant_sheet = all_sheets['oxidant']
     merged_solute_df = pd.concat([monomer_sheet, ligand_sheet, oxidant_sheet], ignore_index=True)
-
     # 在新的Excel文件中添加结构式、紫外光谱等图片列的路径
-    for index, row in merged_solute_df.iterrows():
-        chinese_name = row['Chinese Name']
-        image_types = ['Struct', 'UV', 'IR', 'NearIR', 'HNMR', 'MS']
-        for image_type in image_types:
-            image_path = os.path.join(image_folder, f'{chinese_name}_{image_type}.png')
-            if os.path.exists(image_path):
-                merged_solute_df.loc[index, image_type] = image_path
-        print(f'{chinese_name}图片路径已更新')
-
+    merged_solute_df, solute_filled = fill_image_paths(merged_solute_df, index)
 
     # -----处理"溶剂" sheet-----
     solvent_sheet = all_sheets['solvent']
     merged_solvent_df = pd.concat([solvent_sheet], ignore_index=True)
-
-    # 在新的Excel文件中添加结构式、紫外光谱等图片列的路径
-    for index, row in merged_solvent_df.iterrows():
-        chinese_name = row['Chinese Name']
-        image_types = ['Struct', 'UV', 'IR', 'NearIR', 'HNMR', 'MS']
-        for image_type in image_types:
-            image_path = os.path.join(image_folder, f'{chinese_name}_{image_type}.png')
-            if os.path.exists(image_path):
-                merged_solvent_df.loc[index, image_type] = image_path
-        print(f'{chinese_name}图片路径已更新')
+    merged_solvent_df, solvent_filled = fill_image_paths(merged_solvent_df, index)
 
     # -----创建新的Excel文件-----
-    writer = pd.ExcelWriter(output_file, engine='xlsxwriter')
-    # 将合并后的数据写入新的Excel文件
-    merged_solute_df.to_excel(writer, sheet_name='solute', index=False)
-    merged_solvent_df.to_excel(writer, sheet_name='solvent', index=False)
-    # 保存新的Excel文件
-    writer.save()
-
-    return st.success(f'新的path已更新到：{output_file}')
+    with pd.ExcelWriter(output_file, engine='xlsxwriter') as writer:
+        # 将合并后的数据写入新的Excel文件
+        merged_solute_df.to_excel(writer, sheet_name='solute', index=False)
+        merged_solvent_df.to_excel(writer, sheet_name='solvent', index=False)
+
+    n_images = sum(len(paths_by_name) for paths_by_name in index.values())
+    return st.success(f'新的path已更新到：{output_file}（文件夹中共{n_images}张图片，'
+                      f'溶质新填写{solute_filled}个路径，溶剂新填写{solvent_filled}个路径）')
 
 
 def st_main(data_folder):
@@ -1,41 +1,11 @@
 """将台阶仪的xml测试数据转换为Excel文件"""
-import pandas as pd
-import re
 import streamlit as st
-import os
-import xml.etree.ElementTree as ET
 
-
-def step_xml2excel(file_path):
-    # 读取并解析XML文件
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-    data = []
-
-    # 提取X和Z的单位
-    x_units = root.find('.//XUnits').text
-    z_units = root.find('.//ZUnits').text
-
-    # 提取数据
-    for elem in root.find('.//DataBlock'):
-        x = float(elem.find('X').text)
-        z = float(elem.find('Z').text)
-        data.append({f'X ({x_units})': x, f'Z ({z_units})': z})
-
-    # 将数据转换为 DataFrame
-    df = pd.DataFrame(data)
-
-    # 将数据保存为Excel文件，包含处理后的第一行，指定工作表名称为文件名
-    file_name = os.path.splitext(os.path.basename(file_path))[0]
-    excel_output_path = os.path.splitext(file_path)[0] + '.xlsx'
-    with pd.ExcelWriter(excel_output_path, engine='xlsxwriter') as writer:
-        # 将 df 保存到名为 scan_mode 的 sheet 中
-        df.to_excel(writer, index=False, header=True, startrow=0, sheet_name='Step_rawdata')  # 从第一行开始写入数据，包含标题行
-        # 创建包含参数的 DataFrame，将filename保存到名为 'parameter' 的 sheet 中
-        parameters = pd.DataFrame({'File Name': [file_name],})
-        parameters.to_excel(writer, sheet_name='parameter', index=False)
-
-    return st.success(f"Excel file saved to {excel_output_path}")
+from core.batch import collect_files
+from core.converters.step import step_xml2excel
+from utils.batch import incremental_checkbox, st_run_batch, worker_number_input
+from utils.jobs import background_checkbox, job_monitor
+from utils.storage import storage_format_select
 
 
 @st.cache_data(experimental_allow_widgets=True)
@@ -50,22 +20,26 @@ def parameter_configuration():
     elif mode == '模式三：处理单个xml':
         txt_path = st.text_input("输入xml的绝对路径，例如：**C:\\Users\\JiaPeng\\Desktop\\test\\2023\\kei.txt**")
 
+    # ---输出格式---
+    storage_options = storage_format_select()
+
+    # ---批量处理选项---
+    if mode != '模式三：处理单个xml':
+        max_workers = worker_number_input()
+        incremental = incremental_checkbox()
+        background = background_checkbox()
 
     # ---按mode执行---
     if st.button('运行文件转换程序'):
         if mode == '模式一：处理所有子文件夹内的所有xml':
-            # 获取所有txt文件的路径
-            txt_files = [os.path.join(root, file) for root, _, files in os.walk(txt_farther_folder) for file in files if
-                         file.endswith('.xml')]
-            # 处理每个txt文件
-            for file_path in txt_files:
-                step_xml2excel(file_path)
+            # 获取所有xml文件的路径，并行处理每个xml文件
+            xml_files = collect_files(txt_farther_folder, '.xml', recursive=True)
+            st_run_batch(step_xml2excel, xml_files, max_workers, incremental, background=background, **storage_options)
         elif mode == '模式二：处理单个文件夹下的所有xml':
-            txt_files = [os.path.join(txt_folder, file) for file in os.listdir(txt_folder) if file.endswith('.xml')]
-            for file_path in txt_files:
-                step_xml2excel(file_path)
+            xml_files = collect_files(txt_folder, '.xml')
+            st_run_batch(step_xml2excel, xml_files, max_workers, incremental, background=background, **storage_options)
         elif mode == '模式三：处理单个xml':
-            step_xml2excel(txt_path)
+            st_run_batch(step_xml2excel, [txt_path], 1, **storage_options)
 
     return None
 
@@ -73,6 +47,7 @@ def parameter_configuration():
 def st_main():
     st.title(":repeat_one: 数据预处理——Step.xml文件转excel文件")  # 🔂
     parameter_configuration()
+    job_monitor()
     return None
 
 
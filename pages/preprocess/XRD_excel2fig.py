@@ -1,47 +1,20 @@
-"""将同一文件夹内的所有电学测试数据（除电阻）的Excel文件进行画图"""
-import pandas as pd
+"""将XRD数据文件画成衍射图（原始与平滑后的强度），可以限定2Θ的显示范围"""
 import streamlit as st
-import os
-import matplotlib.pyplot as plt
 
+from core.render import render
+from core.storage import collect_records, load_record
+from utils.batch import st_run_batch, worker_number_input
+from utils.jobs import background_checkbox, job_monitor
+from utils.render import figure_format_select
 
-def single_curve(file_path, x_bar):
-    """一个数据一个图"""
-    # 读取excel文件数据
-    workbook = pd.ExcelFile(file_path)
-    sheet_name = workbook.sheet_names[0]
-    df = workbook.parse(sheet_name)
-    # 获取file_name
-    parameter_df = workbook.parse('parameter')
-    curve_label = parameter_df['File Name'][0]
-    # 图片保存路径
-    save_path = file_path.replace('.xlsx', '.png')
 
-    # 提取数据
-    X = df['2Θ[degree]']
-    Intensity = df['Intensity[a.u.]']
-    Smoothed_Intensity = df['Smoothed Intensity[a.u.]']
-
-    # 提前设置图形属性，避免重复
-    plt.rcParams['font.sans-serif'] = ['simhei']
-    plt.rcParams['axes.unicode_minus'] = False
-    # 画图
-    plt.figure(figsize=(12, 6))
-    plt.plot(X, Intensity, label=curve_label)
-    plt.plot(X, Smoothed_Intensity, label='Smoothed Intensity')
-
-    plt.xlim(x_bar[0], x_bar[1])
-    plt.xlabel('2Θ[degree]')
-    plt.ylabel('Intensity[a.u.]')
-    # 使用科学计数法表示纵轴坐标
-    plt.ticklabel_format(style='sci', axis='y', scilimits=(0, 0))
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=300)
-    plt.close()
-    st.success(f'XRD_plot PNG saved to {save_path}')
-
-    return None
+def single_curve(file_path, x_bar, dpi=300, fig_format='png'):
+    """一个数据一个图（批处理的工作函数），返回图片路径"""
+    # 读取数据文件（excel/parquet/feather），获取file_name
+    df, sheet_name, parameters = load_record(file_path)
+    curve_label = parameters['File Name']
+    # 用XRD模板替换曲线数据后保存，图片与数据文件同名
+    return render('XRD', df, curve_label, file_path, dpi, fig_format, x_bar=x_bar)
 
 
 @st.cache_data(experimental_allow_widgets=True)
@@ -64,27 +37,30 @@ def parameter_configuration():
     x_max = col2.number_input('横坐标2Θ[degree]最大值', value=50)
     x_bar = [x_min, x_max]
 
+    # ---图片格式与并行---
+    figure_options = figure_format_select()
+    if mode != '模式三：处理单个excel':
+        max_workers = worker_number_input()
+        background = background_checkbox()
+
     # ---按mode执行---
     if st.button('运行文件转换程序'):
         if mode == '模式一：处理所有子文件夹内的所有excel':
-            # 获取所有excel文件的路径
-            excel_files = [os.path.join(root, file) for root, _, files in os.walk(excel_farther_folder) for file in files if
-                         file.endswith('.xlsx')]
-            # 处理每个excel文件
-            for file_path in excel_files:
-                single_curve(file_path, x_bar)
+            # 获取所有excel文件的路径，并行画图
+            excel_files = collect_records(excel_farther_folder, recursive=True)
+            st_run_batch(single_curve, excel_files, max_workers, background=background, x_bar=x_bar, **figure_options)
         elif mode == '模式二：处理单个文件夹下的所有excel':
-            excel_files = [os.path.join(excel_folder, file) for file in os.listdir(excel_folder) if file.endswith('.xlsx')]
-            for file_path in excel_files:
-                single_curve(file_path, x_bar)
+            excel_files = collect_records(excel_folder)
+            st_run_batch(single_curve, excel_files, max_workers, background=background, x_bar=x_bar, **figure_options)
         elif mode == '模式三：处理单个excel':
-            single_curve(file_path, x_bar)
+            st_run_batch(single_curve, [file_path], 1, x_bar=x_bar, **figure_options)
     return None
 
 
 def st_main():
     st.title(":twisted_rightwards_arrows: 数据预处理——XRD.excel数据画图")  # 🔀
     parameter_configuration()
+    job_monitor()
     return None
 
 
@@ -0,0 +1,91 @@
+"""自动识别仪器格式，把同一目录下不同仪器的原始数据一次性转换为Excel文件"""
+import pandas as pd
+import streamlit as st
+
+from core.ingest import DEFAULT_OPTIONS, convert_file, sniff, sniff_tree
+from utils.batch import incremental_checkbox, st_run_batch, worker_number_input
+from utils.jobs import background_checkbox, job_monitor
+from utils.storage import storage_format_select
+
+
+def instrument_options():
+    """各仪器转换参数的部件，未列出的参数使用各转换页面的默认值"""
+    options = {}
+    with st.expander('各仪器的转换参数'):
+        col1, col2 = st.columns(2)
+        options['keithley'] = {**DEFAULT_OPTIONS['keithley'],
+                               'current_unit': col1.checkbox('keithley：将电流单位转为A（原始数据是mA）', value=True)}
+        uv_transmittance = col2.checkbox('uv.sca：转换纵坐标为**透过率**（原始为吸光度）', value=True)
+        options['uv'] = {'spectrum': 'Transmittance' if uv_transmittance else 'Absorbance'}
+
+        col1, col2 = st.columns(2)
+        options['olympus'] = {'heatmap_fig': col1.checkbox('olympus：画出共聚焦热力图', value=True)}
+        spectrum_select = col2.selectbox('avantes：处理成哪种光谱', ('Transmittance', 'Absorbance', 'fluorescence'))
+        options['avantes'] = {**DEFAULT_OPTIONS['avantes'], 'spectrum_select': spectrum_select}
+
+        col1, col2 = st.columns(2)
+        options['XRD'] = {'window_length': col1.number_input('XRD：SG窗口长度', value=11),
+                          'polyorder': col2.number_input('XRD：SG多项式阶数', value=2)}
+        base_csv_path = st.text_input('FTIR：基底csv的绝对路径（留空则不扣除背景）')
+        options['FTIR'] = {'base_csv_path': base_csv_path or None}
+    return options
+
+
+@st.cache_data(experimental_allow_widgets=True)
+def parameter_configuration():
+    # ---mode选择确定path---
+    mode = st.radio('选择处理模式',
+                    ['模式一：处理所有子文件夹内的所有文件', '模式二：处理单个文件夹下的所有文件', '模式三：处理单个文件'],
+                    index=0)
+    if mode == '模式一：处理所有子文件夹内的所有文件':
+        farther_folder = st.text_input(
+            "输入数据所在文件夹的上一级目录的绝对路径，例如：**C:\\Users\\JiaPeng\\Desktop\\test**")
+    elif mode == '模式二：处理单个文件夹下的所有文件':
+        folder = st.text_input("输入数据所在文件夹的绝对路径，例如：**C:\\Users\\JiaPeng\\Desktop\\test\\2023**")
+    elif mode == '模式三：处理单个文件':
+        file_path = st.text_input("输入文件的绝对路径，例如：**C:\\Users\\JiaPeng\\Desktop\\test\\2023\\kei.txt**")
+    st.warning('支持keithley/CHI/XRD的txt、ichy/LANHE/olympus/FTIR的csv、uv的sca、台阶仪的xml和AvaSoft导出的excel，'
+               '同一文件夹下可以混合存放不同仪器的文件')
+
+    # ---各仪器参数---
+    options = instrument_options()
+
+    # ---输出格式---
+    storage_options = storage_format_select()
+
+    # ---批量处理选项---
+    if mode != '模式三：处理单个文件':
+        max_workers = worker_number_input()
+        incremental = incremental_checkbox()
+        background = background_checkbox()
+
+    # ---按mode执行---
+    if st.button('运行文件转换程序'):
+        if mode == '模式三：处理单个文件':
+            st.info(f'识别为：{sniff(file_path)}')
+            st_run_batch(convert_file, [file_path], 1, options=options, **storage_options)
+        else:
+            # 只遍历一次目录，识别每个文件对应的仪器
+            if mode == '模式一：处理所有子文件夹内的所有文件':
+                detected, unknown = sniff_tree(farther_folder, recursive=True)
+            else:
+                detected, unknown = sniff_tree(folder, recursive=False)
+            st.dataframe(pd.Series(detected, dtype=str).value_counts().rename_axis('仪器').reset_index(name='文件数'),
+                         hide_index=True)
+            if unknown:
+                st.info(f'{len(unknown)}个文件无法识别仪器格式，已跳过')
+            st_run_batch(convert_file, list(detected), max_workers, incremental, background=background,
+                         options=options, **storage_options)
+
+    return None
+
+
+def st_main():
+    st.title(":repeat_one: 数据预处理——自动识别仪器格式并转excel文件")  # 🔂
+    parameter_configuration()
+    job_monitor()
+    return None
+
+
+if __name__ == '__main__':
+    st_main()
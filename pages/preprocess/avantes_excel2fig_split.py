@@ -2,23 +2,23 @@ import pandas as pd
 import streamlit as st
 import os
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 import numpy as np
 from matplotlib.colors import ListedColormap
 from mpl_toolkits.mplot3d import Axes3D
-import plotly.graph_objects as go
-import plotly.io as pio
+
+from core.storage import collect_records, load_record, save_record
+from utils.animation import ANIMATION_FORMATS, write_animation
+from utils.batch import st_run_batch, worker_number_input
+from utils.jobs import background_checkbox, job_monitor
+from utils.storage import storage_format_select
+from utils.waterfall import export_images, waterfall_figure
 
 
 def excel2png(file_path, x_scale, y_scale, use_legend):
     """绘制2维图"""
-    # 读取excel文件数据
-    workbook = pd.ExcelFile(file_path)
-    spectrum_data_sheet = workbook.sheet_names[0]
-    df = workbook.parse(spectrum_data_sheet)
-    # 获取文件名
-    parameter_df = workbook.parse('parameter')
-    file_name = parameter_df['File Name'][0]
+    # 读取数据文件（excel/parquet/feather），获取文件名
+    df, spectrum_data_sheet, parameters = load_record(file_path)
+    file_name = parameters['File Name']
     # 获取列名，即光谱曲线的标签
     curve_labels = df.columns[1:]
 
@@ -56,98 +56,44 @@ def excel2png(file_path, x_scale, y_scale, use_legend):
     if use_legend:
         plt.legend(loc='upper left', bbox_to_anchor=(1.02, 1.0))  # 调整legend的位置到右侧
     plt.tight_layout()
-    plt.savefig(file_path.replace('.xlsx', '.png'), dpi=300)
+    plt.savefig(os.path.splitext(file_path)[0] + '.png', dpi=300)
     plt.close()
     st.success(f"PNG of {file_path} is saved.")
 
     return None
 
 
-def excel2gif(file_path, series_type, x_scale, y_scale):
-    """绘制动图"""
-    # 读取excel文件数据
-    workbook = pd.ExcelFile(file_path)
-    sheet_name = workbook.sheet_names[0]
-    df = workbook.parse(sheet_name, index_col=0)
-    # 获取文件名
-    parameter_df = workbook.parse('parameter')
-    file_name = parameter_df['File Name'][0]
-
-    # 初始化图形
-    fig, ax = plt.subplots()
-    line, = ax.plot(df.index, df.iloc[:, 0], label=df.columns[0])  # 初始化第一个时间点
-
-    # 添加标题和标签
-    ax.set_title(f'{file_name} of {series_type} series')
-    ax.set_xlabel(df.index.name)
-    ax.set_ylabel(sheet_name)
-    ax.set_xlim(x_scale[0], x_scale[1])
-    ax.set_ylim(y_scale[0], y_scale[1])
-    ax.legend()
-
-    # 更新函数，用于每个动画帧
-    def update(frame):
-        line.set_ydata(df.iloc[:, frame])
-        line.set_label(df.columns[frame])
-        legend = ax.legend()
-        return line, legend
-
-    # 创建动画
-    animation = FuncAnimation(fig, update, frames=df.shape[1], interval=50)
-    # 保存为 GIF
-    animation.save(file_path.replace('xlsx', 'gif'), writer='pillow', fps=30)
-
-    return st.success(f'GIF of {file_path} is saved.')
-
-
-def excel2waterfall(file_path, x_scale, y_scale):
-    """使用 Plotly 绘制3D瀑布图"""
-    # 读取excel文件数据
-    workbook = pd.ExcelFile(file_path)
-    spectrum_data_sheet = workbook.sheet_names[0]
-    df = workbook.parse(spectrum_data_sheet)
-    # 获取文件名
-    parameter_df = workbook.parse('parameter')
-    file_name = parameter_df['File Name'][0]
-    # 获取列名，即光谱曲线的标签
-    curve_labels = df.columns[1:]
-
-    fig = go.Figure()
-
-    for i, curve_label in enumerate(curve_labels):
-        fig.add_trace(go.Scatter3d(
-            x=df.iloc[:, 0],
-            y=[i] * len(df),
-            z=df[curve_label],
-            mode='lines',
-            name=curve_label,
-            line=dict(color=f'rgba({i * 30 % 255}, {(i * 60) % 255}, {(i * 90) % 255}, 1)')
-        ))
-
-    fig.update_layout(
-        scene=dict(
-            xaxis_title='Wavelength[nm]',
-            yaxis_title='Curve Index',
-            zaxis_title=spectrum_data_sheet,
-            xaxis=dict(range=x_scale),
-            yaxis=dict(range=[0, len(curve_labels) - 1]),
-            zaxis=dict(range=y_scale)
-        ),
-        title=f"{file_name}",
-        margin=dict(r=20, b=10, l=10, t=10)
-    )
-
-    output_file = file_path.replace('.xlsx', '_3D.png')
-    pio.write_image(fig, output_file)
-    st.success(f"3D Waterfall plot is saved as {output_file}")
+def excel2gif(file_path, series_type, x_scale, y_scale, fps=30, step=1, max_frames=None, fig_format='gif'):
+    """绘制动图（批处理的工作函数），返回动图路径"""
+    # 读取数据文件，第一列（波长）作为横坐标，其余每一列为一帧，获取文件名
+    df, sheet_name, parameters = load_record(file_path)
+    file_name = parameters['File Name']
+    # 直接从光谱数组生成帧，静态的坐标轴只渲染一次
+    return write_animation(df.iloc[:, 0].to_numpy(), df.iloc[:, 1:].to_numpy(), list(df.columns[1:]), file_path,
+                           fps, step, max_frames, fig_format, title=f'{file_name} of {series_type} series',
+                           xlabel=df.columns[0], ylabel=sheet_name, x_scale=x_scale, y_scale=y_scale)
+
+
+def excel2waterfall(file_paths, x_scale, y_scale, max_curves=None):
+    """使用 Plotly 绘制3D瀑布图，所有文件的图片一次导出"""
+    figures, output_files = [], []
+    for file_path in file_paths:
+        # 读取数据文件，获取文件名
+        df, spectrum_data_sheet, parameters = load_record(file_path)
+        # 所有光谱合并为一条用NaN隔开的曲线，时间轴上最多保留 max_curves 条光谱
+        figures.append(waterfall_figure(df.iloc[:, 0].to_numpy(), df.iloc[:, 1:].to_numpy(),
+                                        parameters['File Name'], spectrum_data_sheet, x_scale, y_scale, max_curves))
+        output_files.append(os.path.splitext(file_path)[0] + '_3D.png')
+
+    export_images(figures, output_files)
+    for output_file in output_files:
+        st.success(f"3D Waterfall plot is saved as {output_file}")
 
     return None
 
 
-def excel_split(file_path):
-    xls = pd.ExcelFile(file_path)
-    spectrum_model = xls.sheet_names[0]
-    df = pd.read_excel(xls, sheet_name=spectrum_model)
+def excel_split(file_path, storage_format='excel', excel_copy=False):
+    df, spectrum_model, _ = load_record(file_path)
     # 获取第一列数据 (Wavelength[nm])
     wavelength_column = df.iloc[:, 0]
 
@@ -164,12 +110,8 @@ def excel_split(file_path):
         file_dir = os.path.dirname(file_path)
         excel_output_path = os.path.join(file_dir, f'{spectrum_model}_{file_name}.xlsx')
 
-        with pd.ExcelWriter(excel_output_path) as writer:
-            # 将 new_df保存到名为 scan_mode 的 sheet 中
-            new_df.to_excel(writer, sheet_name=spectrum_model, index=False)
-            # 创建包含参数的 DataFrame，将filename保存到名为 'parameter' 的 sheet 中
-            parameters = pd.DataFrame({'File Name': [file_name]})
-            parameters.to_excel(writer, sheet_name='parameter', index=False)
+        excel_output_path = save_record(new_df, excel_output_path, spectrum_model, {'File Name': file_name},
+                                        storage_format, excel_copy)
         st.success(f"Splited excel file saved to {excel_output_path}")
 
     return None
@@ -210,47 +152,66 @@ def parameter_configuration():
     if plot_gif:
         series_type = colb.text_input('输入序列的类型，例如：time', value='time')
     plot_3d = colc.checkbox('3D瀑布图', value=True)
+    if plot_3d:
+        max_curves = colc.number_input('3D图最多光谱条数（0为不限制）', min_value=0, value=200,
+                                       help='时间轴上均匀抽取光谱，限制导出时间') or None
+    if plot_gif:
+        # ---动图参数---
+        col1, col2, col3, col4 = st.columns(4)
+        fps = col1.number_input('动图帧率fps', min_value=1, value=30)
+        step = col2.number_input('每隔几帧取一帧', min_value=1, value=1)
+        max_frames = col3.number_input('最多帧数（0为不限制）', min_value=0, value=300)
+        gif_format = col4.selectbox('动图格式', ANIMATION_FORMATS, index=0, help='MP4/WebM需要安装ffmpeg')
+        gif_options = {'series_type': series_type, 'x_scale': x_scale, 'y_scale': y_scale, 'fps': fps,
+                       'step': step, 'max_frames': max_frames or None, 'fig_format': gif_format}
+        if mode != '模式三：处理单个excel':
+            max_workers = worker_number_input('动图并行进程数')
+            background = background_checkbox()
 
     # ---按mode执行---
     if st.button('将excel数据绘制成光谱图'):
         if mode == '模式一：处理所有子文件夹内的所有excel':
-            excel_files = [os.path.join(root, file) for root, _, files in os.walk(excel_farther_folder) for file in
-                           files if file.endswith('.xlsx') and
-                           any(keyword in file for keyword in ['Transmittance', 'Absorbance', 'Fluorescence'])]
-            for file_path in excel_files:
-                if plot_gif:
-                    excel2gif(file_path, series_type, x_scale, y_scale)
-                if plot_2d:
+            excel_files = [file for file in collect_records(excel_farther_folder, recursive=True) if
+                           any(keyword in os.path.basename(file)
+                               for keyword in ['Transmittance', 'Absorbance', 'Fluorescence'])]
+            # 动图在后台进程中并行生成
+            if plot_gif:
+                st_run_batch(excel2gif, excel_files, max_workers, background=background, **gif_options)
+            if plot_2d:
+                for file_path in excel_files:
                     excel2png(file_path, x_scale, y_scale, use_legend)
-                if plot_3d:
-                    excel2waterfall(file_path, x_scale, y_scale)
+            # 3D图一次导出所有文件
+            if plot_3d:
+                excel2waterfall(excel_files, x_scale, y_scale, max_curves)
         elif mode == '模式二：处理单个文件夹下的所有excel':
-            excel_files = [os.path.join(excel_folder, file) for file in os.listdir(excel_folder) if
-                           file.endswith('.xlsx') and
-                           any(keyword in file for keyword in ['Transmittance', 'Absorbance', 'Fluorescence'])]
-            for file_path in excel_files:
-                if plot_gif:
-                    excel2gif(file_path, series_type, x_scale, y_scale)
-                if plot_2d:
+            excel_files = [file for file in collect_records(excel_folder) if
+                           any(keyword in os.path.basename(file)
+                               for keyword in ['Transmittance', 'Absorbance', 'Fluorescence'])]
+            # 动图在后台进程中并行生成
+            if plot_gif:
+                st_run_batch(excel2gif, excel_files, max_workers, background=background, **gif_options)
+            if plot_2d:
+                for file_path in excel_files:
                     excel2png(file_path, x_scale, y_scale, use_legend)
-                if plot_3d:
-                    excel2waterfall(file_path, x_scale, y_scale)
+            # 3D图一次导出所有文件
+            if plot_3d:
+                excel2waterfall(excel_files, x_scale, y_scale, max_curves)
         elif mode == '模式三：处理单个excel':
             if plot_gif:
-                excel2gif(excel_path, series_type, x_scale, y_scale)
+                st_run_batch(excel2gif, [excel_path], 1, **gif_options)
             if plot_2d:
                 excel2png(excel_path, x_scale, y_scale, use_legend)
             if plot_3d:
-                excel2waterfall(excel_path, x_scale, y_scale)
+                excel2waterfall([excel_path], x_scale, y_scale, max_curves)
 
     st.subheader('文件拆分程序（可以独立使用，共用上面的选择项与路径输入项，仅支持model2）')
+    storage_options = storage_format_select()
     if st.button('拆分excel文件'):
-        excel_files = [os.path.join(excel_folder, file) for file in os.listdir(excel_folder) if
-                       file.endswith('.xlsx') and
-                       any(keyword in file for keyword in
+        excel_files = [file for file in collect_records(excel_folder) if
+                       any(keyword in os.path.basename(file) for keyword in
                            ['Transmittance_merged', 'Absorbance_merged', 'Fluorescence_merged'])]
         for file_path in excel_files:
-            excel_split(file_path)
+            excel_split(file_path, **storage_options)
 
     return None
 
@@ -258,6 +219,7 @@ def parameter_configuration():
 def st_main():
     st.title(":twisted_rightwards_arrows: 数据预处理——avantes.excel文件画图与拆分")  # 🔀
     parameter_configuration()
+    job_monitor()
     return None
 
 
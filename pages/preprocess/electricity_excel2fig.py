@@ -1,169 +1,44 @@
 """将同一文件夹内的所有电学测试数据（除电阻）的Excel文件进行画图"""
-import pandas as pd
 import streamlit as st
 import os
-import matplotlib.pyplot as plt
-
-
-def CV_plot(df, curve_label, save_path):
-    # 提取数据，考虑到keithley的CV数据无法提取时间则不画时间轴
-    potential = df['Potential[V]']
-    current = df['Current[A]']
-
-    # 画图
-    plt.figure()
-    plt.plot(potential, current, label=curve_label)
-
-    plt.xlabel('Potential[V]')
-    plt.ylabel('Current[A]')
-    # 使用科学计数法表示纵轴坐标
-    plt.ticklabel_format(style='sci', axis='y', scilimits=(0, 0))
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=300)
-    plt.close()
-
-    return st.success(f'CV_plot PNG saved to {save_path}')
-
-
-def It_CA_plot(df, curve_label, save_path):
-    # 提取数据
-    time = df['Time[s]']
-    potential = df['Potential[V]']
-    current = df['Current[A]']
-
-    # 画图
-    fig = plt.figure(figsize=(4, 5))  # 根据需要调整 figsize
-    gs = fig.add_gridspec(2, 1, height_ratios=[1, 3])  # 子图高度比例
-
-    # 在第一个子图中绘制电压随时间变化的图形
-    ax1 = fig.add_subplot(gs[0])
-    ax1.plot(time, potential, label=curve_label)
-    ax1.set_xlabel('Time[s]')
-    ax1.set_ylabel('Potential[V]')
-
-    # 在第二个子图中绘制电流随时间变化的图形（主要）
-    ax2 = fig.add_subplot(gs[1])
-    ax2.plot(time, current, label=curve_label)
-    ax2.set_xlabel('Time[s]')
-    ax2.set_ylabel('Current[A]')
-    # 使用科学计数法表示纵轴坐标
-    ax2.ticklabel_format(style='sci', axis='y', scilimits=(0, 0))
-
-    plt.subplots_adjust(hspace=0.3)  # 调整子图之间的间距
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=300)
-    plt.close()
-
-    return st.success(f'It_CA_plot PNG saved to {save_path}')
-
-
-def Vt_plot(df, curve_label, save_path):
-    # 提取数据
-    time = df['Time[s]']
-    potential = df['Potential[V]']
-    current = df['Current[A]']
-
-    # 画图
-    fig = plt.figure(figsize=(4, 5))  # 根据需要调整 figsize
-    gs = fig.add_gridspec(2, 1, height_ratios=[1, 3])  # 子图高度比例
-
-    # 在第一个子图中绘制电流随时间变化的图形
-    ax1 = fig.add_subplot(gs[0])
-    ax1.plot(time, current, label=curve_label)
-    ax1.set_xlabel('Time[s]')
-    ax1.set_ylabel('Current[A]')
-    # 使用科学计数法表示纵轴坐标
-    ax1.ticklabel_format(style='sci', axis='y', scilimits=(0, 0))
-
-    # 在第二个子图中绘制电压随时间变化的图形（主要）
-    ax2 = fig.add_subplot(gs[1])
-    ax2.plot(time, potential, label=curve_label)
-    ax2.set_xlabel('Time[s]')
-    ax2.set_ylabel('Potential[V]')
-    # 使用科学计数法表示纵轴坐标
-    # ax2.ticklabel_format(style='sci', axis='y', scilimits=(0, 0))
-
-    plt.subplots_adjust(hspace=0.3)  # 调整子图之间的间距
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=300)
-    plt.close()
-
-    return st.success(f'Vt_plot PNG saved to {save_path}')
-
-
-def OCP_plot(df, curve_label, save_path):
-    time = df['Time[s]']
-    potential = df['Potential[V]']
-
-    # 画图
-    plt.figure()
-    plt.plot(time, potential, label=curve_label)
-
-    plt.xlabel('Time[s]')
-    plt.ylabel('Potential[V]')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=300)
-    plt.close()
-
-    return st.success(f'OCP_plot PNG saved to {save_path}')
-
-
-def LSV_plot(df, curve_label, save_path):
-    potential = df['Potential[V]']
-    current = df['Current[A]']
-
-    # 画图
-    plt.figure()
-    plt.plot(potential, current, label=curve_label)
-
-    plt.xlabel('Potential[V]')
-    plt.ylabel('Current[A]')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=300)
-    plt.close()
-
-    return st.success(f'LSV_plot PNG saved to {save_path}')
-
-
-def single_curve(folder_path):
-    """一个数据一个图"""
-    single_files = [f for f in os.listdir(folder_path) if f.endswith('.xlsx')]
-
-    # 提前设置图形属性，避免重复
-    plt.rcParams['font.sans-serif'] = ['simhei']
-    plt.rcParams['axes.unicode_minus'] = False
-
-    for single_file_name in single_files:
-        single_file_path = os.path.join(folder_path, single_file_name)
-        # 读取excel文件数据
-        workbook = pd.ExcelFile(single_file_path)
-        sheet_name = workbook.sheet_names[0]
-        df = workbook.parse(sheet_name)
-        # 获取file_name，即电学曲线的标签
-        parameter_df = workbook.parse('parameter')
-        curve_label = parameter_df['File Name'][0]
-        # 图片保存路径
-        save_path = os.path.join(folder_path, single_file_path.replace('.xlsx', '.png'))
-
-        if 'CV' in single_file_name:
-            CV_plot(df, curve_label, save_path)
-        elif 'It' in single_file_name or 'CA' in single_file_name:
-            It_CA_plot(df, curve_label, save_path)
-        elif 'Vt' in single_file_name:
-            Vt_plot(df, curve_label, save_path)
-        elif 'OCP' in single_file_name:
-            OCP_plot(df, curve_label, save_path)
-        elif 'LSV' in single_file_name:
-            LSV_plot(df, curve_label, save_path)
 
+from core.render import render
+from core.storage import collect_records, load_record
+from utils.batch import st_run_batch, worker_number_input
+from utils.render import figure_format_select
+
+
+def plot_kind(file_name):
+    """根据文件名区分曲线类型，返回渲染模板名，无法区分时返回None"""
+    if 'CV' in file_name:
+        return 'CV'
+    elif 'It' in file_name or 'CA' in file_name:
+        return 'It_CA'
+    elif 'Vt' in file_name:
+        return 'Vt'
+    elif 'OCP' in file_name:
+        return 'OCP'
+    elif 'LSV' in file_name:
+        return 'LSV'
     return None
 
 
+def plot_record(file_path, dpi=300, fig_format='png'):
+    """画单个数据文件的曲线（批处理的工作函数），返回图片路径"""
+    # 读取数据文件（excel/parquet/feather），获取file_name，即电学曲线的标签
+    df, sheet_name, parameters = load_record(file_path)
+    return render(plot_kind(os.path.basename(file_path)), df, parameters['File Name'], file_path, dpi, fig_format)
+
+
+def single_curve(folder_paths, max_workers=None, dpi=300, fig_format='png'):
+    """一个数据一个图，所有文件夹的文件在同一个进程池中渲染"""
+    if isinstance(folder_paths, str):
+        folder_paths = [folder_paths]
+    single_files = [file_path for folder_path in folder_paths for file_path in collect_records(folder_path)
+                    if plot_kind(os.path.basename(file_path))]
+    return st_run_batch(plot_record, single_files, max_workers, dpi=dpi, fig_format=fig_format)
+
+
 @st.cache_data(experimental_allow_widgets=True)
 def parameter_configuration():
     # ---mode选择确定path---
@@ -177,16 +52,20 @@ def parameter_configuration():
         excel_folder = st.text_input("输入excel所在文件夹的绝对路径，例如：**C:\\Users\\JiaPeng\\Desktop\\test\\2023**")
     st.warning('根据文件名自动区分CV/It/CA/Vt/OCP/LSV曲线')
 
+    # ---图片格式与并行---
+    figure_options = figure_format_select()
+    max_workers = worker_number_input()
+
     # ---按mode执行---
     if st.button('运行画图程序'):
         if mode == '模式一：处理所有子文件夹内的所有excel':
             # 获取所有子文件夹的路径
             subfolders = [os.path.join(excel_farther_folder, subfolder) for subfolder in
                           os.listdir(excel_farther_folder)]
-            for subfolder in subfolders:
-                single_curve(subfolder)
+            single_curve([subfolder for subfolder in subfolders if os.path.isdir(subfolder)], max_workers,
+                         **figure_options)
         elif mode == '模式二：处理单个文件夹下的所有excel':
-            single_curve(excel_folder)
+            single_curve(excel_folder, max_workers, **figure_options)
 
     return None
 
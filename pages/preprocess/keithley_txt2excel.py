@@ -1,55 +1,11 @@
 """将keithley的txt测试数据转换为Excel文件"""
-import pandas as pd
-import re
 import streamlit as st
-import os
 
-
-def kei_txt2excel(file_path, columns, current_unit):
-    """注意原始txt列数，起始行的处理"""
-    # 读取文件内容
-    with open(file_path, 'r') as file:
-        content = file.readlines()
-
-    # 匹配一个或多个非 \t 字符，后面跟着 '测试数据' 字符串
-    pattern = r'([^\t]+测试数据)'
-    matches = re.findall(pattern, content[0])
-    # 根据文字信息匹配测试模式
-    if matches[0] == 'I-V测试数据':
-        scan_model = 'CV'
-        columns = ['Potential[V]', 'Current[mA]']
-    elif matches[0] == '方波信号测试数据':
-        scan_model = 'CA'
-        columns = ['Time[s]', 'Potential[V]', 'Current[mA]']
-    elif matches[0] == 'I-t测试数据':
-        scan_model = 'It'
-        columns = ['Time[s]', 'Potential[V]', 'Current[mA]']
-    else:
-        scan_model = 'Electricity'
-
-    # 处理第一行内容，只保留'I-V测试数据'之前的部分
-    content[0] = content[0].split(matches[0])[0].strip()
-
-    # 提取电压和电流数据，并将其转换为浮点数
-    data = [[float(value) for value in line.split()] for line in content]  # 从第二行开始处理，并将数据转换为浮点数
-    df = pd.DataFrame(data, columns=columns)  # 【可修改第一列，第二列列名】
-
-    # 将电流单位转为A
-    if current_unit:
-        df['Current[mA]'] = df['Current[mA]'] / 1000
-        df.rename(columns={'Current[mA]': 'Current[A]'}, inplace=True)
-
-    # 将数据保存为Excel文件，包含处理后的第一行，指定工作表名称为文件名
-    file_name = file_path.split('.txt')[0].split('\\')[-1]
-    excel_output_path = file_path.replace(f'{file_name}.txt', f'{scan_model}_{file_name}.xlsx')
-    with pd.ExcelWriter(excel_output_path, engine='xlsxwriter') as writer:
-        # 将 df 保存到名为 scan_mode 的 sheet 中
-        df.to_excel(writer, index=False, header=True, startrow=0, sheet_name=scan_model)  # 从第一行开始写入数据，包含标题行
-        # 创建包含参数的 DataFrame，将filename保存到名为 'parameter' 的 sheet 中
-        parameters = pd.DataFrame({'File Name': [file_name]})
-        parameters.to_excel(writer, sheet_name='parameter', index=False)
-
-    return st.success(f"Excel file saved to {excel_output_path}")
+from core.batch import collect_files
+from core.converters.keithley import kei_txt2excel
+from utils.batch import incremental_checkbox, st_run_batch, worker_number_input
+from utils.jobs import background_checkbox, job_monitor
+from utils.storage import storage_format_select
 
 
 @st.cache_data(experimental_allow_widgets=True)
@@ -84,21 +40,29 @@ def parameter_configuration():
     # ---电流单位选择---
     current_unit = st.checkbox('是否将电流单位转为A（原始数据是mA）', value=True)
 
+    # ---输出格式---
+    storage_options = storage_format_select()
+
+    # ---批量处理选项---
+    if mode != '模式三：处理单个txt':
+        max_workers = worker_number_input()
+        incremental = incremental_checkbox()
+        background = background_checkbox()
+
     # ---按mode执行---
     if st.button('运行文件转换程序'):
         if mode == '模式一：处理所有子文件夹内的所有txt':
-            # 获取所有txt文件的路径
-            txt_files = [os.path.join(root, file) for root, _, files in os.walk(txt_farther_folder) for file in files if
-                         file.endswith('.txt')]
-            # 处理每个txt文件
-            for file_path in txt_files:
-                kei_txt2excel(file_path, columns=columns, current_unit=current_unit)
+            # 获取所有txt文件的路径，并行处理每个txt文件
+            txt_files = collect_files(txt_farther_folder, '.txt', recursive=True)
+            st_run_batch(kei_txt2excel, txt_files, max_workers, incremental, background=background,
+                         columns=columns, current_unit=current_unit, **storage_options)
         elif mode == '模式二：处理单个文件夹下的所有txt':
-            txt_files = [os.path.join(txt_folder, file) for file in os.listdir(txt_folder) if file.endswith('.txt')]
-            for file_path in txt_files:
-                kei_txt2excel(file_path, columns=columns, current_unit=current_unit)
+            txt_files = collect_files(txt_folder, '.txt')
+            st_run_batch(kei_txt2excel, txt_files, max_workers, incremental, background=background,
+                         columns=columns, current_unit=current_unit, **storage_options)
         elif mode == '模式三：处理单个txt':
-            kei_txt2excel(txt_path, columns=columns, current_unit=current_unit)
+            st_run_batch(kei_txt2excel, [txt_path], 1,
+                         columns=columns, current_unit=current_unit, **storage_options)
 
     return None
 
@@ -106,6 +70,7 @@ def parameter_configuration():
 def st_main():
     st.title(":repeat_one: 数据预处理——keithley.txt文件转excel文件")  # 🔂
     parameter_configuration()
+    job_monitor()
     return None
 
 
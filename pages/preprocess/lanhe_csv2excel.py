@@ -1,43 +1,10 @@
-import pandas as pd
 import streamlit as st
-import os
-
-
-def LANDHE_csv2excel(file_path):
-    """将LANDHE的csv测试数据转换为Excel文件"""
-    # 读取csv文件内容
-    df = pd.read_csv(file_path, delimiter=',', header=0,  encoding='GB2312')
-
-    # 根据电流单位自动进行转换
-    current_column = df.columns[df.columns.str.contains('电流')][0]
-    if 'uA' in current_column:
-        df['Current[A]'] = df[current_column] / 1e6  # 从 uA 转换为 A
-    elif 'mA' in current_column:
-        df['Current[A]'] = df[current_column] / 1e3  # 从 mA 转换为 A
-    elif 'A' in current_column:
-        df['Current[A]'] = df[current_column]  # 单位已经是 A，不需要转换
-
-    # 创建新的 DataFrame
-    new_df = pd.DataFrame({
-        "Time[s]": df["测试时间/Sec"],  # 提取测试时间
-        "Current[A]": df['Current[A]'],  # 使用自动转换后的电流
-        "Potential[V]": df["电压/V"]  # 提取电压
-    })
-
-    df = new_df.astype(float).dropna()  # 转换为浮点数类型，并去除空白行
-
-    # 将 DataFrame 保存为 Excel 文件
-    file_name = file_path.split('.csv')[0].split('\\')[-1]
-    excel_output_path = file_path.replace(f'{file_name}.csv', f'GCD_{file_name}.xlsx')
-    with pd.ExcelWriter(excel_output_path) as writer:
-        # 将 df 保存到名为 scan_mode 的 sheet 中
-        df.to_excel(writer, sheet_name='GCD', index=False)
-        # 创建包含参数的 DataFrame，将filename保存到名为 'parameter' 的 sheet 中
-        parameters = pd.DataFrame({'File Name': [file_name]})
-        parameters.to_excel(writer, sheet_name='parameter', index=False)
-
-    return st.success(f"Excel file saved to {excel_output_path}")
 
+from core.batch import collect_files
+from core.converters.lanhe import LANDHE_csv2excel
+from utils.batch import incremental_checkbox, st_run_batch, worker_number_input
+from utils.jobs import background_checkbox, job_monitor
+from utils.storage import storage_format_select
 
 
 @st.cache_data(experimental_allow_widgets=True)
@@ -54,21 +21,28 @@ def parameter_configuration():
     elif mode == '模式三：处理单个csv':
         csv_path = st.text_input("输入csv的绝对路径，例如：**C:\\Users\\JiaPeng\\Desktop\\test\\2023\\FTIR.csv**")
 
+    # ---输出格式---
+    storage_options = storage_format_select()
+
+    # ---批量处理选项---
+    if mode != '模式三：处理单个csv':
+        max_workers = worker_number_input()
+        incremental = incremental_checkbox()
+        background = background_checkbox()
+
     # ---按mode执行---
     st.warning('蓝电系统的csv文件一般包括‘测试时间/Sec’、‘电流/uA’、‘电压/V’等列')
     if st.button('运行文件转换程序'):
         if mode == '模式一：处理所有子文件夹内的所有csv':
-            csv_files = [os.path.join(root, file) for root, _, files in os.walk(csv_farther_folder) for file in files if
-                         file.lower().endswith('.csv')]
-            for file_path in csv_files:
-                LANDHE_csv2excel(file_path)
+            csv_files = collect_files(csv_farther_folder, '.csv', recursive=True, ignore_case=True)  # 避免大小写问题
+            st_run_batch(LANDHE_csv2excel, csv_files, max_workers, incremental, background=background,
+                         **storage_options)
         elif mode == '模式二：处理单个文件夹下的所有csv':
-            csv_files = [os.path.join(csv_folder, file) for file in os.listdir(csv_folder) if
-                         file.lower().endswith('.csv')]  # 避免大小写问题
-            for csv_file in csv_files:
-                LANDHE_csv2excel(csv_file)
+            csv_files = collect_files(csv_folder, '.csv', ignore_case=True)  # 避免大小写问题
+            st_run_batch(LANDHE_csv2excel, csv_files, max_workers, incremental, background=background,
+                         **storage_options)
         elif mode == '模式三：处理单个csv':
-            LANDHE_csv2excel(csv_path)
+            st_run_batch(LANDHE_csv2excel, [csv_path], 1, **storage_options)
 
     return None
 
@@ -76,6 +50,7 @@ def parameter_configuration():
 def st_main():
     st.title(":repeat_one: 数据预处理——LANDHE.csv文件转excel文件")  # 🔂
     parameter_configuration()
+    job_monitor()
     return None
 
 
@@ -1,111 +1,96 @@
 """将同一文件夹内的所有UV的Excel文件进行合并，并画图"""
-import pandas as pd
 import streamlit as st
 import os
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.colors import ListedColormap
-
-
-def merge_excel(folder_path, spectrum):
-    # 获取文件夹内所有 Excel 文件的路径
-    excel_files = [f for f in os.listdir(folder_path) if f.endswith('.xlsx') and ('merge' not in f) and (spectrum in f)]
-    # 创建一个空 DataFrame 用于存储合并后的数据
-    merged_df = pd.DataFrame()
-    # 创建一个空 DataFrame 用于存储归一化的数据
-    normalized_df = pd.DataFrame()
-
-    # 遍历所有 Excel 文件
-    for excel_file in excel_files:
-        file_path = os.path.join(folder_path, excel_file)
-
-        # 读取 Excel 文件，获取sheet_name，并转化为dataframe
-        workbook = pd.ExcelFile(file_path)
-        data_sheet = workbook.sheet_names[0]
-        df = workbook.parse(data_sheet)
-        # 获取file_name，即曲线的标签
-        parameter_df = workbook.parse('parameter')
-        curve_label = parameter_df['File Name'][0]
-        # 将透过率列名重命名为file_name
-        df.rename(columns={df.columns[1]: curve_label}, inplace=True)
-        # 将归一化数据列名重命名为 "Normalized " + file_name
-        # normalized_column_name = 'Normalized_' + curve_label
-        # df.rename(columns={'Normalized': normalized_column_name}, inplace=True)
-
-        # 如果第一次读取，直接作为基础 DataFrame
-        if merged_df.empty:
-            merged_df = df[[df.columns[0], curve_label]]  # 只选取波长和当前文件的数据列
-            # normalized_merged_df = df[[df.columns[0], normalized_column_name]]  # 只选取波长和当前文件的归一化数据列
-        else:
-            # 合并主数据，共享第一列 'Wavelengths'
-            merged_df = pd.merge(merged_df, df[[df.columns[0], curve_label]], on='Wavelength[nm]', how='outer')
-            # 合并归一化数据
-            # normalized_merged_df = pd.merge(normalized_merged_df, df[[df.columns[0], normalized_column_name]],
-            #                                 on='Wavelength[nm]', how='outer')
-
-    # 将合并后的 DataFrame 写入新 Excel 文件
-    output_name = os.path.basename(folder_path)
-    output_path = os.path.join(folder_path, f'{spectrum}_merged_{output_name}.xlsx')
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-        merged_df.to_excel(writer, index=False, sheet_name=spectrum)
-        # normalized_merged_df.to_excel(writer, index=False, sheet_name='Normalized Data')
-
-    return st.success(f"Merged excel file saved to {output_path}")
-
-
-def merged_curve(folder_path, spectrum, x_scale, y_scale):
-    """所有曲线画在一个图中"""
-    merged_files = [f for f in os.listdir(folder_path) if f.endswith('.xlsx') and ('merge' in f) and (spectrum in f)]
-    for merged_file_name in merged_files:
-        merged_file_path = os.path.join(folder_path, merged_file_name)
-        # 读取excel文件数据
-        df_merged = pd.read_excel(merged_file_path, engine='openpyxl', sheet_name=spectrum)
-        # 获取列名，即光谱曲线的标签
-        curve_labels = df_merged.columns[1:]
-
-        # 提前设置图形属性，避免重复
-        plt.rcParams['font.sans-serif'] = ['simhei']
-        plt.rcParams['axes.unicode_minus'] = False
-
-        # 遍历每个光谱曲线并绘总图
-        plt.figure()
-        plt.xlim(x_scale[0], x_scale[1])
-        plt.ylim(y_scale[0], y_scale[1])
-        plt.xlabel("Wavelength[nm]")
-        plt.ylabel(spectrum)
-        # 自定义颜色映射的颜色列表
-        custom_colors = ['#E91ECC', '#E91E99', '#FFC0CB', '#9C27B0', '#3F51B5', '#C0CBFF', '#2196F3',
-                         '#00BCD4', '#009688', '#4CAF50', '#8BC34A', '#CDDC39', '#FFEB3B', '#FFC107',
-                         '#FF9800', '#FF5722', '#F44336', '#c82423', '#795548', '#9E9E9E', '#607D8B']
-        # 创建自定义的颜色映射
-        custom_cmap = ListedColormap(custom_colors)
-        # 使用自定义颜色映射分配颜色给曲线
-        colors = custom_cmap(np.linspace(0, 1, len(curve_labels)))
-
-        # 循环内只进行绘图设置提高效率
-        for i, curve_label in enumerate(curve_labels):
-            # 获取对应光谱曲线的数据
-            wavelength = df_merged.iloc[:, 0]  # 提取第一列数据作为波长数据
-            intensity = df_merged[curve_label]
-            # 绘制光谱曲线
-            plt.plot(wavelength, intensity, label=curve_label, color=colors[i])
-
-        plt.legend(loc='upper left', bbox_to_anchor=(1.02, 1.0))  # 调整legend的位置到右侧
-        plt.tight_layout()
-        plt.savefig(os.path.join(folder_path, merged_file_path.replace('.xlsx', '.png')), dpi=300)
-        plt.close()
-        st.success(f"Merged {merged_file_name} PNG saved to {folder_path}")
-
-    return None
+from matplotlib.figure import Figure
+
+from core.merge import SPECTRA, merge_folder
+from core.storage import collect_records, load_record
+from utils.batch import st_run_batch, worker_number_input
+from utils.jobs import background_checkbox, job_monitor
+from utils.storage import storage_format_select
+
+# 合并后曲线的自定义颜色映射的颜色列表
+CUSTOM_COLORS = ['#E91ECC', '#E91E99', '#FFC0CB', '#9C27B0', '#3F51B5', '#C0CBFF', '#2196F3',
+                 '#00BCD4', '#009688', '#4CAF50', '#8BC34A', '#CDDC39', '#FFEB3B', '#FFC107',
+                 '#FF9800', '#FF5722', '#F44336', '#c82423', '#795548', '#9E9E9E', '#607D8B']
+
+
+def _spectrum_axes(spectrum, x_scale, y_scale):
+    """
+    新建一张光谱图（不使用pyplot的全局状态，可以在批处理的工作进程或页面线程中并行调用）
+    :return: (figure, axes)
+    """
+    rcParams['font.sans-serif'] = ['simhei']
+    rcParams['axes.unicode_minus'] = False
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_xlim(x_scale[0], x_scale[1])
+    ax.set_ylim(y_scale[0], y_scale[1])
+    ax.set_xlabel("Wavelength[nm]")
+    ax.set_ylabel(spectrum)
+    return fig, ax
+
+
+def merged_files(folder_path, spectrum):
+    """文件夹内合并后的光谱数据文件"""
+    return [f for f in collect_records(folder_path)
+            if ('merge' in os.path.basename(f)) and (spectrum in os.path.basename(f))]
+
+
+def single_files(folder_path, spectrum):
+    """文件夹内单个光谱的数据文件"""
+    return [f for f in collect_records(folder_path)
+            if ('merge' not in os.path.basename(f)) and (spectrum in os.path.basename(f))]
+
+
+def merged_curve(merged_file_path, spectrum, x_scale, y_scale):
+    """合并后的所有曲线画在一个图中（批处理的工作函数），返回图片路径"""
+    # 读取数据文件，获取列名，即光谱曲线的标签
+    df_merged, _, _ = load_record(merged_file_path)
+    curve_labels = df_merged.columns[1:]
+    fig, ax = _spectrum_axes(spectrum, x_scale, y_scale)
+    # 使用自定义颜色映射分配颜色给曲线
+    colors = ListedColormap(CUSTOM_COLORS)(np.linspace(0, 1, len(curve_labels)))
+    wavelength = df_merged.iloc[:, 0]  # 提取第一列数据作为波长数据
+    for i, curve_label in enumerate(curve_labels):
+        ax.plot(wavelength, df_merged[curve_label], label=curve_label, color=colors[i])
+    ax.legend(loc='upper left', bbox_to_anchor=(1.02, 1.0))  # 调整legend的位置到右侧
+    fig.tight_layout()
+    save_path = os.path.splitext(merged_file_path)[0] + '.png'
+    fig.savefig(save_path, dpi=300)
+    return save_path
+
+
+def single_curve(single_file_path, spectrum, x_scale, y_scale):
+    """单个数据画单个图（批处理的工作函数），返回图片路径"""
+    # 读取数据文件，获取file_name，即曲线的标签
+    df, _, parameters = load_record(single_file_path)
+    fig, ax = _spectrum_axes(spectrum, x_scale, y_scale)
+    ax.plot(df.iloc[:, 0], df.iloc[:, 1], label=parameters['File Name'])
+    ax.legend()
+    fig.tight_layout()
+    save_path = os.path.splitext(single_file_path)[0] + '.png'
+    fig.savefig(save_path, dpi=300)
+    return save_path
 
 
 def merged_normalized_curve(folder_path, spectrum, x_scale, y_scale):
     """所有曲线画在一个图中"""
-    merged_files = [f for f in os.listdir(folder_path) if f.endswith('.xlsx') and ('merge' in f) and (spectrum in f)]
-    for merged_file_name in merged_files:
-        merged_file_path = os.path.join(folder_path, merged_file_name)
-        # 读取excel文件数据
-        df_merged = pd.read_excel(merged_file_path, engine='openpyxl', sheet_name='Normalized Data')
+    merged_files = [f for f in collect_records(folder_path)
+                    if ('merge' in os.path.basename(f)) and (spectrum in os.path.basename(f))]
+    for merged_file_path in merged_files:
+        merged_file_name = os.path.basename(merged_file_path)
+        # 读取数据文件中的归一化数据，没有归一化数据的文件跳过
+        try:
+            df_merged, _, _ = load_record(merged_file_path, sheet_name='Normalized Data')
+        except ValueError:
+            continue
         # 获取列名，即光谱曲线的标签
         curve_labels = df_merged.columns[1:]
 
@@ -138,64 +123,23 @@ def merged_normalized_curve(folder_path, spectrum, x_scale, y_scale):
 
         plt.legend(loc='upper left', bbox_to_anchor=(1.02, 1.0))  # 调整legend的位置到右侧
         plt.tight_layout()
-        plt.savefig(os.path.join(folder_path, merged_file_path.replace('.xlsx', '.png').replace(spectrum, 'Normalized_'+spectrum)), dpi=300)
+        png_name = os.path.splitext(merged_file_name)[0].replace(spectrum, 'Normalized_' + spectrum) + '.png'
+        plt.savefig(os.path.join(folder_path, png_name), dpi=300)
         plt.close()
         st.success(f"Merged Normalized_{merged_file_name} PNG saved to {folder_path}")
 
     return None
 
 
-def single_curve(folder_path, spectrum, x_scale, y_scale):
-    """单个数据画单个图"""
-    single_files = [f for f in os.listdir(folder_path) if f.endswith('.xlsx') and ('merge' not in f) and (spectrum in f)]
-    for single_file_name in single_files:
-        single_file_path = os.path.join(folder_path, single_file_name)
-        # 读取excel文件数据
-        workbook = pd.ExcelFile(single_file_path)
-        data_sheet = workbook.sheet_names[0]
-        df = workbook.parse(data_sheet)
-        # 获取file_name，即曲线的标签
-        parameter_df = workbook.parse('parameter')
-        curve_label = parameter_df['File Name'][0]
-
-        # 提前设置图形属性，避免重复
-        plt.rcParams['font.sans-serif'] = ['simhei']
-        plt.rcParams['axes.unicode_minus'] = False
-
-        # 遍历每个光谱曲线并绘总图
-        plt.figure()
-        plt.xlim(x_scale[0], x_scale[1])
-        plt.ylim(y_scale[0], y_scale[1])
-        plt.xlabel("Wavelength[nm]")
-        plt.ylabel(spectrum)
-
-        # 获取对应光谱曲线的数据
-        wavelength = df.iloc[:, 0]
-        intensity = df.iloc[:, 1]
-        # 绘制光谱曲线
-        plt.plot(wavelength, intensity, label=curve_label)
-
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(os.path.join(folder_path, single_file_name.replace('.xlsx', '.png')), dpi=300)
-        plt.close()
-        st.success(f"Single {single_file_name } PNG saved to {folder_path}")
-
-    return None
-
-
 def single_normalized_curve(folder_path, spectrum, x_scale, y_scale):
     """单个数据画单个图"""
-    single_files = [f for f in os.listdir(folder_path) if f.endswith('.xlsx') and ('merge' not in f) and (spectrum in f)]
-    for single_file_name in single_files:
-        single_file_path = os.path.join(folder_path, single_file_name)
-        # 读取excel文件数据
-        workbook = pd.ExcelFile(single_file_path)
-        data_sheet = workbook.sheet_names[0]
-        df = workbook.parse(data_sheet)
-        # 获取file_name，即曲线的标签
-        parameter_df = workbook.parse('parameter')
-        curve_label = parameter_df['File Name'][0]
+    single_files = [f for f in collect_records(folder_path)
+                    if ('merge' not in os.path.basename(f)) and (spectrum in os.path.basename(f))]
+    for single_file_path in single_files:
+        single_file_name = os.path.basename(single_file_path)
+        # 读取数据文件（excel/parquet/feather），获取file_name，即曲线的标签
+        df, _, parameters = load_record(single_file_path)
+        curve_label = parameters['File Name']
 
         # 提前设置图形属性，避免重复
         plt.rcParams['font.sans-serif'] = ['simhei']
@@ -216,7 +160,8 @@ def single_normalized_curve(folder_path, spectrum, x_scale, y_scale):
 
         plt.legend()
         plt.tight_layout()
-        plt.savefig(os.path.join(folder_path, single_file_name.replace('.xlsx', '.png').replace(spectrum, 'Normalized_'+spectrum)), dpi=300)
+        png_name = os.path.splitext(single_file_name)[0].replace(spectrum, 'Normalized_' + spectrum) + '.png'
+        plt.savefig(os.path.join(folder_path, png_name), dpi=300)
         plt.close()
         st.success(f"Single Normalized_{single_file_name} PNG saved to {folder_path}")
 
@@ -236,17 +181,29 @@ def parameter_configuration():
         excel_folder = st.text_input("输入excel所在文件夹的绝对路径，例如：**C:\\Users\\JiaPeng\\Desktop\\test\\2023**")
 
     # ---spectrum选择---
-    spectrum = st.selectbox('当前excel数据是哪种光谱？', ('Transmittance', 'Absorbance'), index=0)
+    spectrum = st.selectbox('当前excel数据是哪种光谱？', SPECTRA, index=0)
+
+    # ---波长对齐容差---
+    tolerance = st.number_input('波长对齐容差[nm]', min_value=0.0, value=0.0, format='%.3f',
+                                help='相差不超过该值的波长视为同一个点，为0时只合并完全相同的波长')
+
+    # ---输出格式与并行（合并与画图共用）---
+    storage_options = storage_format_select()
+    max_workers = worker_number_input()
+    background = background_checkbox()
+
+    # ---按mode确定文件夹---
+    if mode == '模式一：合并所有子文件夹内的所有excel':
+        # 获取所有子文件夹的路径
+        folders = [os.path.join(excel_farther_folder, subfolder) for subfolder in os.listdir(excel_farther_folder)
+                   if os.path.isdir(os.path.join(excel_farther_folder, subfolder))] if excel_farther_folder else []
+    else:
+        folders = [excel_folder] if excel_folder else []
 
-    # ---按mode执行---
+    # ---按mode执行：每个文件夹合并为一个文件---
     if st.button('运行文件转换程序'):
-        if mode == '模式一：合并所有子文件夹内的所有excel':
-            # 获取所有子文件夹的路径
-            subfolders = [os.path.join(excel_farther_folder, subfolder) for subfolder in os.listdir(excel_farther_folder)]
-            for subfolder in subfolders:
-                merge_excel(subfolder, spectrum)
-        elif mode == '模式二：合并单个文件夹下的所有excel':
-            merge_excel(excel_folder, spectrum)
+        st_run_batch(merge_folder, folders, max_workers, background=background, kind=spectrum, tolerance=tolerance,
+                     **storage_options)
 
     st.subheader('画图程序（可以独立使用，共用上面的选择项与路径输入项）')
     # ---绘制merged选择---
@@ -268,23 +225,15 @@ def parameter_configuration():
 
     # ---绘图---
     if st.button('将excel数据绘制成光谱图'):
-        if mode == '模式一：合并所有子文件夹内的所有excel':
-            # 获取所有子文件夹的路径
-            subfolders = [os.path.join(excel_farther_folder, subfolder) for subfolder in os.listdir(excel_farther_folder)]
-            for subfolder in subfolders:
-                if single_fig:
-                    single_curve(subfolder, spectrum, x_scale, y_scale)
-                    # single_normalized_curve(subfolder, spectrum, x_scale, y_scale)
-                if merged_fig:
-                    merged_curve(subfolder, spectrum, x_scale, y_scale)
-                    # merged_normalized_curve(subfolder, spectrum, x_scale, y_scale)
-        elif mode == '模式二：合并单个文件夹下的所有excel':
-            if single_fig:
-                single_curve(excel_folder, spectrum, x_scale, y_scale)
-                # single_normalized_curve(excel_folder, spectrum, x_scale, y_scale)
-            if merged_fig:
-                merged_curve(excel_folder, spectrum, x_scale, y_scale)
-                # merged_normalized_curve(excel_folder, spectrum, x_scale, y_scale)
+        # 每个数据文件画一张图，并行处理所有文件夹内的文件
+        if single_fig:
+            st_run_batch(single_curve, [f for folder in folders for f in single_files(folder, spectrum)], max_workers,
+                         background=background, spectrum=spectrum, x_scale=x_scale, y_scale=y_scale)
+            # single_normalized_curve(folder, spectrum, x_scale, y_scale)
+        if merged_fig:
+            st_run_batch(merged_curve, [f for folder in folders for f in merged_files(folder, spectrum)], max_workers,
+                         background=background, spectrum=spectrum, x_scale=x_scale, y_scale=y_scale)
+            # merged_normalized_curve(folder, spectrum, x_scale, y_scale)
 
     return None
 
@@ -292,6 +241,7 @@ def parameter_configuration():
 def st_main():
     st.title(":twisted_rightwards_arrows: 数据预处理——uv.excel文件合并与画图")  # 🔀
     parameter_configuration()
+    job_monitor()
     return None
 
 
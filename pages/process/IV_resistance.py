@@ -8,16 +8,18 @@ import numpy as np
 import plotly.graph_objects as go
 import os
 
+from utils.plotting import decimation_options, line_trace, selected_x_range, zoomable_chart
+from utils.storage import load_upload
+
 
 # 1.0 -----读入DataFrame-----
-@st.cache_data(experimental_allow_widgets=True)  # 缓存加载数据
 def load_data():
     # 设置上传选项，Markdown语法设置加粗
     uploaded_file = st.file_uploader("上传一个包含IV曲线数据的Excel文件，通常为[**Resistance_merged_yyyymmdd-.xlsx**]文件",
-                                     type=["xlsx", "xls"])
-    # 设置返回参数
+                                     type=["xlsx", "xls", "parquet", "feather"])
+    # 设置返回参数，解析结果按文件内容缓存
     if uploaded_file is not None:
-        return pd.read_excel(uploaded_file)
+        return load_upload(uploaded_file)[0]
     else:
         return None
 
@@ -31,19 +33,15 @@ def plot_all_curves(df):
     selected_labels = st.multiselect("通过多项选项框模式来选择需要显示的曲线，默认加载所有曲线",
                                      curve_labels, default=curve_labels)  # default输入为列表
 
+    # 抽样方法与框选放大的范围
+    max_points, method = decimation_options('iv_all_curves')
+    x_range = selected_x_range('iv_all_curves')
+
     # 创建一个fig
     fig = go.Figure()
     for curve_label in selected_labels:
-        Potential = df.iloc[:, 0]  # 提取第一列数据作为波长数据
-        Current = df[curve_label]
-        # 判断当前曲线中是否存在NaN值
-        if Current.isna().any():
-            # 如果存在NaN值，则仅在非NaN数据点上绘制曲线
-            non_nan_indices = Current.notna()
-            Potential = Potential[non_nan_indices]
-            Current = Current[non_nan_indices]
-        # 使用 Plotly 来绘制曲线
-        fig.add_trace(go.Scatter(x=Potential, y=Current, mode='lines', name=curve_label))
+        # 抽样后用WebGL绘制曲线，NaN值（电流列比电压列少的地方）在抽样时去掉
+        fig.add_trace(line_trace(df.iloc[:, 0], df[curve_label], curve_label, max_points, method, x_range))
 
     # 设置常用的绘图样式
     fig.update_layout(
@@ -71,8 +69,8 @@ def plot_all_curves(df):
         layer="below"
     )
 
-    # 使用st.plotly_chart()显示Plotly图形
-    return st.plotly_chart(fig)
+    # 显示Plotly图形，框选区域后按原始分辨率重新抽样
+    return zoomable_chart(fig, 'iv_all_curves')
 
 
 # 3.0 -----绘制单独的IV曲线并保存图片和数据-----
@@ -1,25 +1,22 @@
 """共聚焦的excel数据，可视化分析与画图"""
 import streamlit as st
-import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 
+from utils.plotting import build_pyramid, pyramid_region
+from utils.storage import UPLOAD_CACHE_ENTRIES, load_upload, upload_digest
+
 
-@st.cache_data(experimental_allow_widgets=True)
 def load_data():
     uploaded_file = st.file_uploader("上传激光共聚焦的数据Excel文件，通常为[**Confocal_yyyymmdd-.xlsx**]文件",
-                                     type=["xlsx", "xls"])
+                                     type=["xlsx", "xls", "parquet", "feather"])
     if uploaded_file is not None:
-        # 读取 Excel 文件，获取sheet_name，并转化为dataframe
-        workbook = pd.ExcelFile(uploaded_file)
-        data_sheet = workbook.sheet_names[0]
-        df = workbook.parse(data_sheet)
-        # 获取file_name
-        parameter_df = workbook.parse('parameter')
-        file_name = parameter_df['File Name'][0]
-        return df, file_name
+        # 读取数据文件（excel/parquet/feather，解析结果按文件内容缓存），并转化为dataframe，获取file_name
+        df, _, parameters = load_upload(uploaded_file)
+        file_name = parameters['File Name']
+        return df, file_name, upload_digest(uploaded_file)
     else:
-        return None, None
+        return None, None, None
 
 
 def heatmap_plot(df, file_name):
@@ -33,8 +30,23 @@ def heatmap_plot(df, file_name):
     return None
 
 
-def surface_plot(df, file_name):
-    fig = go.Figure(data=[go.Surface(z=df.values)])
+@st.cache_data(max_entries=UPLOAD_CACHE_ENTRIES)
+def surface_pyramid(digest, _df):
+    """曲面的降采样金字塔，按上传文件的内容哈希缓存，同一份数据只计算一次"""
+    return build_pyramid(_df.to_numpy(dtype=float))
+
+
+def surface_plot(df, file_name, digest):
+    rows, cols = df.shape
+    # 选择显示区域：区域越小显示越精细，不超过 MAX_SURFACE_SIZE×MAX_SURFACE_SIZE 个点
+    col1, col2 = st.columns(2)
+    row_range = col1.slider('显示的行范围', 0, rows, (0, rows))
+    col_range = col2.slider('显示的列范围', 0, cols, (0, cols))
+    z, row_axis, col_axis = pyramid_region(surface_pyramid(digest, df), row_range, col_range)
+    if z.shape != (row_range[1] - row_range[0], col_range[1] - col_range[0]):
+        st.caption(f'数据已降采样为{z.shape[0]}×{z.shape[1]}显示，缩小显示范围可以看到更多细节')
+
+    fig = go.Figure(data=[go.Surface(z=z, x=col_axis, y=row_axis)])
     fig.update_layout(title=file_name)
     # 显示图形
     st.plotly_chart(fig)
@@ -44,14 +56,14 @@ def surface_plot(df, file_name):
 def st_main():
     st.title(":dart:数据处理——时间序列的电学数据分析")  # 🎯
     # 1.0 -----读入DataFrame-----
-    df, file_name = load_data()
+    df, file_name, digest = load_data()
 
     if df is not None:
         # 2.0 -----绘制某个时间点的器件光谱曲线-----
         st.subheader(":high_brightness:绘制热力图")  #
         heatmap_plot(df, file_name)
         st.subheader(":low_brightness:绘制3D表面图")  #
-        surface_plot(df, file_name)
+        surface_plot(df, file_name, digest)
 
     return None
 
@@ -8,6 +8,12 @@ import os
 import pandas as pd
 import pyperclip
 import math
+import time
+
+from core.batch import collect_files, run_batch, summarize
+from core.storage import save_record
+from utils.batch import worker_number_input
+from utils.storage import storage_format_select
 
 
 @st.cache_data(experimental_allow_widgets=True)
@@ -131,37 +137,81 @@ class RadialProfileCalculator:
     def radial_profile_mean_variance(self, img, center, new_radius):
         """创建一个数组，存储每个半径对应的灰度平均值和方差(标准差)
         """
-        gray_values = []
-        # variances = []
-        standard_deviation = []
-
-        # 计算每个像素的灰度值
-        for i in range(new_radius + 1):
-            # 创建一个数组，存储当前半径上所有像素的灰度值
-            gray_values_at_radius = []
-
-            for j in range(360):
-                # 将方向角度转换为弧度
-                direction_angle_radians = np.deg2rad(j)
-
-                # 计算当前点的坐标，从中心点开始，包括半径所在的一圈像素
-                x = int(center[0] + i * np.cos(direction_angle_radians))
-                y = int(center[1] + i * np.sin(direction_angle_radians))
-
-                # 设置报错：如果当前点超出图像范围，跳出循环
-                if x < 0 or y < 0 or x >= img.shape[1] or y >= img.shape[0]:
-                    break
-
-                # 计算当前点的灰度值并添加到列表中
-                gray_value = img[y, x]
-                gray_values_at_radius.append(gray_value)
+        _, means, standard_deviation, _ = self.radial_profile_statistics(img, center, new_radius)
+        return means[:, 0].tolist(), standard_deviation[:, 0].tolist()
+
+    @staticmethod
+    def radius_index_map(shape, center, radius, bin_width=1.0, sectors=None, axis_ratio=1.0, axis_angle=0.0):
+        """预先计算圆（椭圆）内每个像素所属的半径序号，同一几何参数下可以用于所有通道与多张图片
+        :param shape: 图像的 (高, 宽)
+        :param center: 圆心坐标 (x, y)
+        :param radius: 最大半径（椭圆时为长半轴），单位为像素
+        :param bin_width: 半径步长，单位为像素；小于1时中心附近的许多半径上没有像素，因此不小于1
+        :param sectors: 角度扇区列表 [(起始角, 终止角), ...]，单位为度，与原方法相同从x轴正方向顺时针计；None为整圆
+        :param axis_ratio: 椭圆短轴与长轴之比，1为圆
+        :param axis_angle: 椭圆长轴的方向角，单位为度
+        :return: (像素在图像中的展平位置, 对应的半径序号, 半径数组)
+        """
+        height, width = shape[:2]
+        n_bins = int(np.floor(radius / bin_width)) + 1
+        # 只在外接正方形内计算，减少无关像素
+        reach = int(np.ceil(radius * max(1.0, axis_ratio))) + 1
+        x0, x1 = max(0, int(center[0]) - reach), min(width, int(center[0]) + reach + 1)
+        y0, y1 = max(0, int(center[1]) - reach), min(height, int(center[1]) + reach + 1)
+        dy, dx = np.mgrid[y0 - center[1]:y1 - center[1], x0 - center[0]:x1 - center[0]].astype(float)
+
+        # 椭圆模型：旋转到长轴坐标系后将短轴方向拉伸，使椭圆边界上的“半径”等于长半轴
+        if axis_ratio != 1.0 or axis_angle:
+            phi = np.deg2rad(axis_angle)
+            u = dx * np.cos(phi) + dy * np.sin(phi)
+            v = (dy * np.cos(phi) - dx * np.sin(phi)) / axis_ratio
+            r = np.hypot(u, v)
+        else:
+            r = np.hypot(dx, dy)
+        bins = np.rint(r / bin_width).astype(np.int64)
+        keep = bins < n_bins
+
+        # 扇区掩码，支持跨越0°的扇区，例如 (300, 60)
+        if sectors:
+            theta = np.rad2deg(np.arctan2(dy, dx)) % 360
+            in_sector = np.zeros_like(keep)
+            for start, end in sectors:
+                start, end = start % 360, end % 360
+                if end - start == 0:
+                    in_sector[:] = True
+                elif start < end:
+                    in_sector |= (theta >= start) & (theta <= end)
+                else:
+                    in_sector |= (theta >= start) | (theta <= end)
+            keep &= in_sector
+
+        rows, cols = np.nonzero(keep)
+        positions = (rows + y0) * width + (cols + x0)
+        return positions, bins[keep], np.arange(n_bins) * bin_width
+
+    def radial_profile_statistics(self, img, center, radius, bin_width=1.0, sectors=None, axis_ratio=1.0,
+                                  axis_angle=0.0):
+        """一次性计算所有通道每个半径上的灰度平均值与标准差
+        :param img: 单通道(H, W)或多通道(H, W, C)图像
+        :return: (半径数组, 平均值(n, C), 标准差(n, C), 每个半径上的像素数(n,))
+        """
+        positions, bins, radii = self.radius_index_map(img.shape, center, radius, bin_width, sectors,
+                                                       axis_ratio, axis_angle)
+        n_bins = len(radii)
+        values = img.reshape(img.shape[0] * img.shape[1], -1)[positions].astype(float)
+        n_channels = values.shape[1]
 
-            # 计算当前半径上所有像素的灰度平均值和方差并添加到列表中
-            gray_values.append(np.mean(gray_values_at_radius))
-            # variances.append(np.var(gray_values_at_radius))  # 方差
-            standard_deviation.append(np.std(gray_values_at_radius))  # 标准差
+        # 每个通道的半径序号错开n_bins，用一次bincount同时统计所有通道
+        channel_bins = (bins[:, None] + n_bins * np.arange(n_channels)).ravel()
+        counts = np.bincount(bins, minlength=n_bins)
+        sums = np.bincount(channel_bins, weights=values.ravel(), minlength=n_bins * n_channels)
+        squares = np.bincount(channel_bins, weights=(values ** 2).ravel(), minlength=n_bins * n_channels)
 
-        return gray_values, standard_deviation
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = (sums.reshape(n_channels, n_bins) / counts).T
+            variances = (squares.reshape(n_channels, n_bins) / counts).T - means ** 2
+        standard_deviation = np.sqrt(np.clip(variances, 0, None))
+        return radii, means, standard_deviation, counts
 
 
 class CalculateCircleCenter:
@@ -306,21 +356,12 @@ def get_coffee_ring_center(img):
     return center, new_radius
 
 
-@st.cache_data(experimental_allow_widgets=True)
-def get_radial_profile_data(img, file_name, scale, center, radius):
-    """提取咖啡环径向分布的像素灰度值数据
+def radial_profile_figure(img, center, radius, L, means, standard_deviation):
+    """绘制灰度值随半径的变化曲线，并在下方排列裁切到咖啡环范围的RGB图像与各通道图像
+    :param L: 半径数组
+    :param means: 各通道灰度平均值 (n, 3)
+    :param standard_deviation: 各通道标准差 (n, 3)
     """
-    st.subheader(":straight_ruler: 提取咖啡环径向分布的像素灰度值数据")  # 📏
-
-    # 实例化之前定义的径向像素值强度分布计算类
-    calculator = RadialProfileCalculator()
-    # 3个通道数据
-    R_gray_values, R_standard_deviation = calculator.radial_profile_mean_variance(img[:, :, 0], center, radius)
-    G_gray_values, G_standard_deviation = calculator.radial_profile_mean_variance(img[:, :, 1], center, radius)
-    B_gray_values, B_standard_deviation = calculator.radial_profile_mean_variance(img[:, :, 2], center, radius)
-
-    # ---绘制灰度值随半径的变化曲线---
-    L = np.arange(0, radius + 1)
     # 使用gridspec界面进行复杂图排版
     fig = plt.figure()
     grid = plt.GridSpec(6, 4)
@@ -335,6 +376,8 @@ def get_radial_profile_data(img, file_name, scale, center, radius):
     ax1.set_ylabel('Gray Value')
     ax2.set_ylabel('Standard Deviation')
     # 绘制曲线
+    R_gray_values, G_gray_values, B_gray_values = means.T
+    R_standard_deviation, G_standard_deviation, B_standard_deviation = standard_deviation.T
     ax1.plot(L, R_gray_values, label='R gray_values', color='#dc565a')
     ax1.plot(L, G_gray_values, label='G gray_values', color='#56dc95')
     ax1.plot(L, B_gray_values, label='B gray_values', color='#569ddc')
@@ -381,8 +424,42 @@ def get_radial_profile_data(img, file_name, scale, center, radius):
     axb.set_title('B channel')
     axb.imshow(b, cmap='gray')
     axb.axis('off')
-    # 渲染
     plt.tight_layout()
+    return fig
+
+
+@st.cache_data(experimental_allow_widgets=True)
+def get_radial_profile_data(img, file_name, scale, center, radius):
+    """提取咖啡环径向分布的像素灰度值数据
+    """
+    st.subheader(":straight_ruler: 提取咖啡环径向分布的像素灰度值数据")  # 📏
+
+    # ---径向统计参数---
+    col1, col2, col3 = st.columns(3)
+    bin_width = col1.number_input('半径步长（像素）', min_value=1.0, max_value=10.0, value=1.0, step=0.1)
+    sector_input = col1.text_input('角度扇区（度，顺时针），例如：0-90, 180-270', value='0-360')
+    use_ellipse = col2.checkbox('使用椭圆模型（咖啡环非正圆时）')
+    axis_ratio = col3.number_input('椭圆短轴/长轴', min_value=0.1, max_value=1.0, value=1.0, disabled=not use_ellipse)
+    axis_angle = col3.number_input('椭圆长轴方向角（度）', min_value=0.0, max_value=180.0, value=0.0,
+                                   disabled=not use_ellipse)
+    if not use_ellipse:
+        axis_ratio, axis_angle = 1.0, 0.0
+    try:
+        sectors = [tuple(map(float, sector.split('-'))) for sector in sector_input.split(',')]
+    except ValueError:
+        st.warning("请输入有效的角度扇区")
+        sectors = None
+
+    # 实例化之前定义的径向像素值强度分布计算类，3个通道一次计算
+    calculator = RadialProfileCalculator()
+    L, means, standard_deviation, _ = calculator.radial_profile_statistics(img[:, :, :3], center, radius, bin_width,
+                                                                           sectors, axis_ratio, axis_angle)
+    R_gray_values, G_gray_values, B_gray_values = means.T
+    R_standard_deviation, G_standard_deviation, B_standard_deviation = standard_deviation.T
+
+    # ---绘制灰度值随半径的变化曲线与裁切后的图像---
+    fig = radial_profile_figure(img, center, radius, L, means, standard_deviation)
+    # 渲染
     st.pyplot(fig)
 
     # -----💾-----
@@ -401,7 +478,9 @@ def get_radial_profile_data(img, file_name, scale, center, radius):
                             'G_gray_values': G_gray_values, 'G_variances': G_standard_deviation,
                             'B_gray_values': B_gray_values, 'B_variances': B_standard_deviation})
         # 将center, radius保存到sheet2中
-        df2 = pd.DataFrame({'center(x, y)': list(center), 'radius (pixel)': radius, 'scale (mm/pixel)': scale})
+        df2 = pd.DataFrame({'center(x, y)': list(center), 'radius (pixel)': radius, 'scale (mm/pixel)': scale,
+                            'radius step (pixel)': bin_width, 'sectors (degree)': sector_input,
+                            'axis ratio': axis_ratio, 'axis angle (degree)': axis_angle})
         writer = pd.ExcelWriter(os.path.join(save_dir, f'{file_name[:-4]}_RadialProfile.xlsx'), engine='xlsxwriter')
         df1.to_excel(writer, sheet_name='gray_values', index=False)
         df2.to_excel(writer, sheet_name='circle', index=False)
@@ -411,8 +490,101 @@ def get_radial_profile_data(img, file_name, scale, center, radius):
     return None
 
 
+def coffee_ring_profile(file_path, color_threshold=20, radius_scale=1.2, bin_width=1.0, save_png=True):
+    """无界面处理单张咖啡环图片：以图片中心的颜色做阈值mask找圆心，计算径向分布并保存图片
+    :param color_threshold: 颜色阈值范围（±）
+    :param radius_scale: 统计半径相对mask最小外接圆半径的倍数
+    :return: 该图片的径向分布 DataFrame，每个半径一行
+    """
+    img = np.asarray(Image.open(file_path).convert('RGB'))
+    # 与交互模式相同，以图片中心作为近似中心点取颜色
+    color = img[img.shape[0] // 2, img.shape[1] // 2].astype(int)
+    lower_bound = np.clip(color - color_threshold, 0, 255).astype(np.uint8)
+    upper_bound = np.clip(color + color_threshold, 0, 255).astype(np.uint8)
+    mask = cv2.inRange(img, lower_bound, upper_bound)
+    center, radius = CalculateCircleCenter().center_from_mask(mask)
+    if center is None:
+        raise ValueError('阈值mask中没有找到轮廓，无法确定圆心')
+    radius = int(radius * radius_scale)
+
+    L, means, standard_deviation, counts = RadialProfileCalculator().radial_profile_statistics(img, center, radius,
+                                                                                                bin_width)
+    profile = pd.DataFrame({'File Name': os.path.basename(file_path), 'center_x': center[0], 'center_y': center[1],
+                            'radius (pixel)': radius, 'radius': L,
+                            'R_gray_values': means[:, 0], 'R_variances': standard_deviation[:, 0],
+                            'G_gray_values': means[:, 1], 'G_variances': standard_deviation[:, 1],
+                            'B_gray_values': means[:, 2], 'B_variances': standard_deviation[:, 2],
+                            'pixels': counts})
+
+    if save_png:
+        plt.rcParams['font.sans-serif'] = ['simhei']
+        plt.rcParams['axes.unicode_minus'] = False
+        fig = radial_profile_figure(img, center, radius, L, means, standard_deviation)
+        fig.savefig(os.path.splitext(file_path)[0] + '_RadialProfile.png', dpi=300)
+        plt.close(fig)
+    return profile
+
+
+def batch_radial_profile():
+    """批量处理文件夹内的所有咖啡环图片，汇总为一张径向分布表"""
+    st.subheader(":file_folder: 批量提取文件夹内咖啡环图片的径向分布")  # 📁
+    image_folder = st.text_input("输入图片所在文件夹的绝对路径，例如：**C:\\Users\\JiaPeng\\Desktop\\test\\2023**")
+    recursive = st.checkbox('包含所有子文件夹内的图片', value=False)
+    col1, col2, col3 = st.columns(3)
+    color_threshold = col1.slider("颜色阈值范围（±）", min_value=1, max_value=50, value=20)
+    radius_scale = col2.number_input('统计半径/最小外接圆半径', min_value=0.1, max_value=3.0, value=1.2)
+    bin_width = col3.number_input('半径步长（像素）', min_value=1.0, max_value=10.0, value=1.0, step=0.1)
+    save_png = st.checkbox('保存每张图片的径向分布图', value=True)
+    max_workers = worker_number_input()
+    storage_options = storage_format_select()
+
+    if st.button('运行批量处理程序'):
+        # 跳过之前生成的径向分布图
+        image_files = [file for file in collect_files(image_folder, ('.jpg', '.jpeg', '.png'), recursive=recursive,
+                                                     ignore_case=True)
+                       if not file.endswith('_RadialProfile.png')]
+        if not image_files:
+            st.warning('未找到需要处理的图片，请检查路径')
+            return None
+
+        progress = st.progress(0.0, text=f'0/{len(image_files)}')
+        start = time.perf_counter()
+        results, profiles = [], []
+        for i, result in enumerate(run_batch(coffee_ring_profile, image_files, max_workers,
+                                             color_threshold=color_threshold, radius_scale=radius_scale,
+                                             bin_width=bin_width, save_png=save_png), start=1):
+            # 径向分布表汇总后统一保存，汇总表中不显示
+            if result['Status'] == 'success':
+                profiles.append(result['Output'])
+                result['Output'] = None
+            else:
+                st.error(f"{result['File']} 处理失败：{result['Message']}")
+            results.append(result)
+            progress.progress(i / len(image_files), text=f'{i}/{len(image_files)}')
+        elapsed = time.perf_counter() - start
+
+        # ---汇总表---
+        if profiles:
+            output_path = os.path.join(image_folder, f'RadialProfile_merged_{os.path.basename(image_folder)}.xlsx')
+            parameters = {'File Name': os.path.basename(image_folder), 'color threshold': color_threshold,
+                          'radius scale': radius_scale, 'radius step (pixel)': bin_width}
+            output_path = save_record(pd.concat(profiles, ignore_index=True), output_path, 'RadialProfile',
+                                      parameters, **storage_options)
+            st.success(f"Saved to {output_path}")
+        st.info(f'共处理{len(image_files)}张图片，成功{len(profiles)}张，用时{elapsed:.1f}s，'
+                f'{len(profiles) / elapsed:.2f} 张/s')
+        st.dataframe(summarize(results), hide_index=True)
+
+    return None
+
+
 def st_main():
     st.title(":rainbow: 数据处理——咖啡环图像处理")  # 🌈
+    mode = st.radio('选择处理模式', ['模式一：交互处理单张图片', '模式二：批量处理文件夹内的所有图片'], index=0)
+    if mode == '模式二：批量处理文件夹内的所有图片':
+        batch_radial_profile()
+        return None
+
     # 1.0-----上传图片-----
     img, file_name = load_data()
     if img is not None:
@@ -1,25 +1,21 @@
 """时间序列的CV数据，可视化分析与画图"""
 
 import streamlit as st
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.animation import FuncAnimation
 import os
 
+from utils.storage import load_upload
+
 
-@st.cache_data(experimental_allow_widgets=True)
 def load_data():
     uploaded_file = st.file_uploader("上传时间序列的循环扫描数据Excel文件，通常为[**CV_yyyymmdd-.xlsx**]文件",
-                                     type=["xlsx", "xls"])
+                                     type=["xlsx", "xls", "parquet", "feather"])
     if uploaded_file is not None:
-        # 读取 Excel 文件，获取sheet_name，并转化为dataframe
-        workbook = pd.ExcelFile(uploaded_file)
-        data_sheet = workbook.sheet_names[0]
-        df = workbook.parse(data_sheet)
-        # 获取curve_name
-        parameter_df = workbook.parse('parameter')
-        curve_name = parameter_df['File Name'][0]
+        # 读取数据文件（excel/parquet/feather，解析结果按文件内容缓存），并转化为dataframe，获取curve_name
+        df, _, parameters = load_upload(uploaded_file)
+        curve_name = parameters['File Name']
         # 获取file_name
         file_name = uploaded_file.name
         return df, curve_name, file_name
@@ -96,7 +92,7 @@ def cv_plot(df, curve_name, file_name):
 
         # 选择保存文件夹
         save_folder = st.text_input("输入保存文件夹的**绝对路径**，如C:\\User\\JiaPeng\\Desktop\\test")  # 【可修改】
-        save_name = st.text_input("输入保存的名字，例如xxx.png", value=file_name.replace('.xlsx', '[process].png'))  # 【可修改】
+        save_name = st.text_input("输入保存的名字，例如xxx.png", value=os.path.splitext(file_name)[0]+'[process].png')  # 【可修改】
         # 保存图形按钮
         if st.button("保存为png格式"):
             if save_folder == '':
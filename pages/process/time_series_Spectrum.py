@@ -8,24 +8,22 @@ import numpy as np
 from matplotlib.animation import FuncAnimation
 import os
 
+from utils.plotting import line_trace, selected_x_range, zoomable_chart
+from utils.storage import UPLOAD_CACHE_ENTRIES, load_upload, upload_digest
+
 
-@st.cache_data(experimental_allow_widgets=True)
 def load_data():
     uploaded_file = st.file_uploader("上传时间序列的光谱透过率数据Excel文件，通常为[**spectrum_yyyymmdd-.xlsx**]文件",
-                                     type=["xlsx", "xls"])
+                                     type=["xlsx", "xls", "parquet", "feather"])
     if uploaded_file is not None:
-        # 读取 Excel 文件，获取sheet_name，并转化为dataframe
-        workbook = pd.ExcelFile(uploaded_file)
-        data_sheet = workbook.sheet_names[0]
-        df = workbook.parse(data_sheet)
-        # 获取curve_name
-        parameter_df = workbook.parse('parameter')
-        curve_name = parameter_df['File Name'][0]
+        # 读取数据文件（excel/parquet/feather，解析结果按文件内容缓存），并转化为dataframe，获取curve_name
+        df, _, parameters = load_upload(uploaded_file)
+        curve_name = parameters['File Name']
         # 获取file_name
         file_name = uploaded_file.name
-        return df, curve_name, file_name
+        return df, curve_name, file_name, upload_digest(uploaded_file)
     else:
-        return None, None, None
+        return None, None, None, None
 
 
 def data_transform(df):
@@ -39,6 +37,12 @@ def data_transform(df):
     return df_T
 
 
+@st.cache_data(max_entries=UPLOAD_CACHE_ENTRIES)
+def cached_transform(digest, _df):
+    """转置后的光谱矩阵按上传文件的内容哈希缓存，拖动滑块等交互不再重复转置"""
+    return data_transform(_df)
+
+
 def time_point_plot(df, df_T, curve_name, filename):
     # ---选择单个波长来确定时间点---
     col1, col2 = st.columns([30, 70])
@@ -59,9 +63,9 @@ def time_point_plot(df, df_T, curve_name, filename):
         time_axis = np.arange(df_T.shape[0]) * sampling_interval
 
     with col2:
-        # 使用 Plotly 来预览曲线
+        # 使用 Plotly 来预览曲线（抽样后用WebGL绘制，框选区域放大）
         fig = go.Figure()
-        fig.add_trace(go.Scatter(x=time_axis, y=df_T[selected_column], mode='lines'))
+        fig.add_trace(line_trace(time_axis, df_T[selected_column], x_range=selected_x_range('time_point_preview')))
         fig.update_layout(
             title=f'单个波长下的循环曲线',
             title_x=0.45,
@@ -72,7 +76,7 @@ def time_point_plot(df, df_T, curve_name, filename):
             height=400,  # 设置高度
             width=500,  # 设置宽度
         )
-        st.plotly_chart(fig)
+        zoomable_chart(fig, 'time_point_preview')
 
     # ---实际选择多个时间点来绘制曲线---
     col3, col4 = st.columns([30, 70])
@@ -94,7 +98,7 @@ def time_point_plot(df, df_T, curve_name, filename):
         # 选择保存文件夹
         save_folder = st.text_input("输入保存文件夹的**绝对路径**，如C:\\Users\\JiaPeng\\Desktop")  # 【可修改】
         save_name = st.text_input("输入保存的名字，例如TimePlot_.png",
-                                  value='TimePlot_'+filename.replace('.xlsx', '.png'))  # 【可修改】
+                                  value='TimePlot_'+os.path.splitext(filename)[0]+'.png')  # 【可修改】
 
     with col4:
         # 提取波长列作为x轴
@@ -158,9 +162,9 @@ def wavelength_plot(df, df_T, time_axis, save_folder, curve_name, filename):
         st.write(f'You selected {selected_column}')
 
     with col2:
-        # 使用 Plotly 来预览曲线
+        # 使用 Plotly 来预览曲线（抽样后用WebGL绘制，框选区域放大）
         fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df.iloc[:, 0], y=df[selected_column], mode='lines'))
+        fig.add_trace(line_trace(df.iloc[:, 0], df[selected_column], x_range=selected_x_range('wavelength_preview')))
         fig.update_layout(
             title=f'单个时间点下的光谱',
             title_x=0.4,
@@ -171,7 +175,7 @@ def wavelength_plot(df, df_T, time_axis, save_folder, curve_name, filename):
             height=400,  # 设置高度
             width=500,  # 设置宽度
         )
-        st.plotly_chart(fig)
+        zoomable_chart(fig, 'wavelength_preview')
 
     col3, col4 = st.columns([30, 70])
     with col3:
@@ -182,7 +186,7 @@ def wavelength_plot(df, df_T, time_axis, save_folder, curve_name, filename):
         st.write(f'You selected {selected_columns}')
         # 选择保存名字
         save_name = st.text_input("输入保存的名字，例如WavePlot_.png",
-                                  value='WavePlot_'+filename.replace('.xlsx', '.png'))  # 【可修改】
+                                  value='WavePlot_'+os.path.splitext(filename)[0]+'.png')  # 【可修改】
         # 选择PLT图的y轴大小范围
         y_axis_range = st.text_input("输入y轴范围（例如：0.5, 1.0）", value="0.28, 0.78")
 
@@ -232,10 +236,10 @@ def wavelength_plot(df, df_T, time_axis, save_folder, curve_name, filename):
 def st_main():
     st.title(":rainbow:数据处理——时间序列的光谱数据分析")  # 🌈
     # 1.0 -----读入DataFrame-----
-    df, curve_name, file_name = load_data()
+    df, curve_name, file_name, digest = load_data()
 
     if df is not None:
-        df_T = data_transform(df)
+        df_T = cached_transform(digest, df)
         # 2.0 -----绘制某个时间点的器件光谱曲线-----
         st.subheader(":clock1:绘制某个时间点的器件光谱曲线")  # 🕐
         time_axis, save_folder = time_point_plot(df, df_T, curve_name, file_name)
@@ -0,0 +1,26 @@
+import numpy as np
+
+from utils.merge import merge_curves, union_axis
+
+
+def test_tolerance_not_smaller_than_grid_step_keeps_grid():
+    x = np.linspace(0, 1, 11)
+    merged = merge_curves([('a', x, x), ('b', x + 0.001, x)], 'x', 0.1)
+    np.testing.assert_allclose(merged['x'], x)
+    np.testing.assert_allclose(merged['a'], x)
+    np.testing.assert_allclose(merged['b'], x)
+
+
+def test_points_outside_tolerance_are_added_to_axis():
+    x = np.linspace(0, 1, 11)
+    axis, rows = union_axis([x, x + 0.05], 0.01)
+    assert axis.size == 22
+    np.testing.assert_allclose(axis[rows[1]], x + 0.05)
+
+
+def test_repeated_x_keeps_every_point():
+    x = np.array([0, 1, 2, 1, 0.])
+    merged = merge_curves([('a', x, np.arange(5.)), ('b', np.array([0, 1, 2.]), np.array([7, 8, 9.]))], 'V')
+    assert len(merged) == 5
+    assert sorted(merged['a']) == [0, 1, 2, 3, 4]
+    assert merged['b'].notna().sum() == 3
@@ -0,0 +1,139 @@
+"""
+光谱序列动图的快速写入：坐标轴等静态部分只渲染一次作为背景，每帧只重画曲线与图例（blit），
+直接从光谱数组生成像素帧，GIF复用第一帧的调色板，MP4/WebM交给后台的ffmpeg进程编码
+"""
+import os
+import shutil
+import subprocess
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from core.profiling import profiled
+
+ANIMATION_FORMATS = ('gif', 'mp4', 'webm')
+# ffmpeg的编码参数，yuv420p要求宽高为偶数
+VIDEO_CODECS = {'mp4': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-crf', '23'],
+                'webm': ['-c:v', 'libvpx-vp9', '-pix_fmt', 'yuv420p', '-crf', '32', '-b:v', '0']}
+
+
+def frame_indices(n_frames, step=1, max_frames=None):
+    """
+    帧的抽样：先按固定间隔抽取，帧数仍超过上限时再均匀抽取，始终保留第一帧与最后一帧
+    :return: 帧序号数组
+    """
+    indices = np.arange(0, n_frames, max(int(step), 1))
+    if indices.size and indices[-1] != n_frames - 1:
+        indices = np.append(indices, n_frames - 1)
+    if max_frames and indices.size > max_frames:
+        indices = indices[np.linspace(0, indices.size - 1, int(max_frames)).round().astype(int)]
+    return np.unique(indices)
+
+
+def spectrum_frames(x, spectra, labels, title='', xlabel='', ylabel='', x_scale=None, y_scale=None, dpi=100):
+    """
+    逐帧生成RGBA像素数组
+    :param x: 横坐标（波长），长度为n
+    :param spectra: n×帧数 的光谱数组，每一列为一帧
+    :param labels: 每一帧的图例文字
+    :return: 生成器，每个元素为 高×宽×4 的uint8数组
+    """
+    rcParams['font.sans-serif'] = ['simhei']
+    rcParams['axes.unicode_minus'] = False
+    fig = Figure(dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    line, = ax.plot(x, spectra[:, 0], label=str(labels[0]), animated=True)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if x_scale is not None:
+        ax.set_xlim(x_scale[0], x_scale[1])
+    if y_scale is not None:
+        ax.set_ylim(y_scale[0], y_scale[1])
+    legend = ax.legend()
+    legend.set_animated(True)
+    legend_text = legend.get_texts()[0]
+
+    # 静态部分只渲染一次
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    for i in range(spectra.shape[1]):
+        canvas.restore_region(background)
+        line.set_ydata(spectra[:, i])
+        legend_text.set_text(str(labels[i]))
+        ax.draw_artist(line)
+        ax.draw_artist(legend)
+        canvas.blit(fig.bbox)
+        # 整块复制画布缓存比先切片去掉透明通道再复制快得多
+        yield np.array(canvas.buffer_rgba())
+
+
+def save_gif(frames, output_path, fps=30):
+    """所有帧共用第一帧的调色板，只需要做一次颜色量化"""
+    palette = None
+    images = []
+    for frame in frames:
+        image = Image.fromarray(frame).convert('RGB')
+        if palette is None:
+            palette = image.quantize(colors=256)
+            images.append(palette)
+        else:
+            images.append(image.quantize(palette=palette, dither=Image.Dither.NONE))
+    if not images:
+        raise ValueError('没有可以写入的帧')
+    images[0].save(output_path, save_all=True, append_images=images[1:], duration=round(1000 / fps), loop=0,
+                   optimize=False)
+    return output_path
+
+
+def save_video(frames, output_path, fps=30, fig_format='mp4'):
+    """把原始像素帧通过管道交给ffmpeg进程编码，画图与编码同时进行"""
+    ffmpeg = rcParams['animation.ffmpeg_path']
+    if shutil.which(ffmpeg) is None:
+        raise RuntimeError('未找到ffmpeg，无法输出MP4/WebM，请安装ffmpeg或改用GIF')
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError('没有可以写入的帧')
+    height, width = first.shape[:2]
+    command = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgba',
+               '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+               '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', *VIDEO_CODECS[fig_format], output_path]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        process.stdin.write(first.tobytes())
+        for frame in frames:
+            process.stdin.write(frame.tobytes())
+    finally:
+        process.stdin.close()
+        error = process.stderr.read().decode(errors='replace')
+        process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f'ffmpeg编码失败：{error}')
+    return output_path
+
+
+# 逐帧画图与编码交替进行，整体记为 savefig
+@profiled('savefig', returns_written=True)
+def write_animation(x, spectra, labels, output_path, fps=30, step=1, max_frames=None, fig_format='gif',
+                    **plot_options):
+    """
+    把光谱序列写成动图
+    :param spectra: n×帧数 的光谱数组
+    :param output_path: 保存路径，后缀会替换为 fig_format
+    :param step: 每隔几帧取一帧
+    :param max_frames: 最多保留的帧数，None为不限制
+    :param plot_options: 传给 spectrum_frames 的标题、坐标轴范围等
+    :return: 动图路径
+    """
+    spectra = np.asarray(spectra, dtype=float)
+    indices = frame_indices(spectra.shape[1], step, max_frames)
+    frames = spectrum_frames(x, spectra[:, indices], [labels[i] for i in indices], **plot_options)
+    output_path = os.path.splitext(output_path)[0] + f'.{fig_format}'
+    if fig_format == 'gif':
+        return save_gif(frames, output_path, fps)
+    return save_video(frames, output_path, fps, fig_format)
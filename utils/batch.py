@@ -0,0 +1,88 @@
+"""页面中的批量处理：并行进程数等部件，以及把 core.batch 的逐文件结果实时反馈到页面"""
+import os
+import time
+
+import streamlit as st
+
+from core import manifest, profiling
+from core.batch import default_workers, run_batch, summarize
+
+
+def worker_number_input(label='并行进程数'):
+    """并行进程数输入框"""
+    return st.number_input(label, min_value=1, max_value=os.cpu_count() or 1, value=default_workers(),
+                           help='批量转换时同时运行的进程数，设为1则在页面进程中顺序执行')
+
+
+def incremental_checkbox():
+    """增量转换选择框"""
+    return st.checkbox('增量转换：跳过内容与参数均未变化的文件', value=True,
+                       help=f'转换记录保存在每个文件夹的{manifest.MANIFEST_NAME}中')
+
+
+def st_run_batch(func, file_paths, max_workers=None, incremental=False, background=False, **kwargs):
+    """
+    在页面中运行批处理：实时显示每个文件的成功/失败信息，结束后显示汇总表
+    :param incremental: 是否根据文件夹内的转换清单跳过未变化的文件
+    :param background: 是否提交到后台任务队列，由后台工作进程执行，页面只显示进度
+    :return: 汇总表 DataFrame；后台运行时返回任务编号
+    """
+    if background:
+        # 任务队列只在后台运行时需要，在这里导入
+        from utils import jobs
+        return jobs.st_submit_batch(func, file_paths, max_workers, incremental, **kwargs)
+    if not file_paths:
+        st.warning('未找到需要处理的文件，请检查路径与处理模式')
+        return summarize([])
+
+    skipped = []
+    if incremental:
+        file_paths, skipped = manifest.split_changed(func, file_paths, kwargs)
+        if skipped:
+            st.info(f'{len(skipped)}个文件未变化，已跳过')
+
+    total = len(file_paths)
+    progress = st.progress(0.0 if total else 1.0, text=f'0/{total}')
+    start = time.perf_counter()
+    results = []
+    for i, result in enumerate(run_batch(func, file_paths, max_workers=max_workers, with_fingerprint=incremental,
+                                         **kwargs), start=1):
+        results.append(result)
+        if result['Status'] == 'success' and result['Output'] is None:
+            st.info(f"{result['File']} 无需处理")
+        elif result['Status'] == 'success':
+            output = result['Output'] if isinstance(result['Output'], str) else result['File']
+            st.success(f"Saved to {output}")
+        else:
+            st.error(f"{result['File']} 处理失败：{result['Message']}")
+        progress.progress(i / total, text=f'{i}/{total}')
+
+    if incremental:
+        manifest.record_results(func, results, kwargs)
+
+    # ---汇总表---
+    summary = summarize(skipped + results)
+    failed = (summary['Status'] == 'failed').sum()
+    elapsed = time.perf_counter() - start
+    st.info(f'共处理{total}个文件，成功{total - failed}个，失败{failed}个，跳过{len(skipped)}个，'
+            f'用时{elapsed:.1f}s（{total / max(elapsed, 1e-9):.1f} 个/s）')
+    st.dataframe(summary, hide_index=True)
+    st_profile_report(results, func.__name__)
+    return summary
+
+
+def st_profile_report(results, converter=''):
+    """在页面中显示分阶段用时汇总，并提供CSV下载"""
+    table = profiling.profile_table(results)
+    if table.empty:
+        return None
+    summary = profiling.breakdown(table, converter)
+    with st.expander('分阶段用时'):
+        st.bar_chart(summary.set_index('Stage')['Time[s]'], horizontal=True)
+        st.dataframe(summary.drop(columns=['Timestamp', 'Converter']), hide_index=True)
+        col1, col2 = st.columns(2)
+        col1.download_button('下载汇总CSV', summary.to_csv(index=False).encode('utf-8-sig'),
+                             file_name=f'profile_{converter}.csv', mime='text/csv')
+        col2.download_button('下载逐文件CSV', table.to_csv(index=False).encode('utf-8-sig'),
+                             file_name=f'profile_{converter}_files.csv', mime='text/csv')
+    return summary
@@ -0,0 +1,369 @@
+"""
+后台批处理任务队列：页面只把任务（处理函数、文件列表与参数）写入sqlite数据库，由独立的后台工作进程依次执行，
+每个文件的结果与进度也写入数据库，页面通过轮询读取进度；页面刷新、重新运行或关闭都不会中断正在执行的任务
+
+后台工作进程在提交任务时自动启动，空闲一段时间后自动退出，也可以手动运行：python -m utils.jobs
+"""
+import importlib
+import os
+import pickle
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import closing
+
+import pandas as pd
+import streamlit as st
+
+from core import batch, manifest
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOBS_DB = os.path.join(APP_ROOT, '.jobs', 'jobs.sqlite')
+# 工作进程查询新任务的间隔、心跳超时与空闲退出的时间（秒）
+POLL_INTERVAL = 1.0
+HEARTBEAT_TIMEOUT = 15.0
+IDLE_TIMEOUT = 600.0
+# 工作进程输出日志超过该大小（字节）时，下次启动工作进程时清空；无法启动时在页面上显示日志的最后几行
+LOG_MAX_BYTES = 1_000_000
+LOG_TAIL_LINES = 20
+# 页面刷新任务进度的间隔（秒）与显示的最近任务个数
+MONITOR_INTERVAL = 2.0
+MONITOR_JOBS = 5
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    label TEXT,
+    func TEXT,
+    payload BLOB,
+    status TEXT,
+    total INTEGER DEFAULT 0,
+    done INTEGER DEFAULT 0,
+    failed INTEGER DEFAULT 0,
+    skipped INTEGER DEFAULT 0,
+    message TEXT DEFAULT '',
+    worker_pid INTEGER,
+    created REAL,
+    started REAL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    job_id TEXT,
+    file TEXT,
+    status TEXT,
+    output TEXT,
+    message TEXT,
+    elapsed REAL
+);
+CREATE INDEX IF NOT EXISTS results_job ON results (job_id);
+CREATE TABLE IF NOT EXISTS workers (
+    pid INTEGER PRIMARY KEY,
+    heartbeat REAL
+);
+"""
+
+
+# ---数据库---
+def connect(db_path=JOBS_DB):
+    """打开任务数据库（不存在时创建），WAL模式下页面读取进度不会阻塞工作进程写入"""
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    connection = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _function_path(func):
+    """处理函数以 模块:函数名 的形式保存，工作进程中重新导入（与进程池的要求相同，必须是模块顶层函数）"""
+    return f'{func.__module__}:{func.__qualname__}'
+
+
+def _import_function(path):
+    module_name, qualname = path.split(':')
+    func = importlib.import_module(module_name)
+    for name in qualname.split('.'):
+        func = getattr(func, name)
+    return func
+
+
+# ---提交与进度查询---
+def submit_job(func, file_paths, max_workers=None, incremental=False, db_path=JOBS_DB, **kwargs):
+    """
+    提交一个批处理任务
+    :param func: 模块顶层定义的逐文件处理函数
+    :param file_paths: 文件路径列表
+    :param max_workers: 执行任务时的并行进程数
+    :param incremental: 是否根据转换清单跳过未变化的文件
+    :param kwargs: 传给 func 的参数（需要可以被pickle）
+    :return: 任务编号
+    """
+    job_id = uuid.uuid4().hex[:12]
+    payload = pickle.dumps({'file_paths': list(file_paths), 'max_workers': max_workers,
+                            'incremental': incremental, 'kwargs': kwargs})
+    label = f'{func.__name__}（{len(file_paths)}个文件）'
+    with closing(connect(db_path)) as connection:
+        connection.execute('INSERT INTO jobs (id, label, func, payload, status, total, created) '
+                           'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                           (job_id, label, _function_path(func), payload, 'queued', len(file_paths), time.time()))
+    return job_id
+
+
+def _job_dict(row):
+    job = {key: row[key] for key in row.keys() if key != 'payload'}
+    job['processed'] = job['done'] + job['failed'] + job['skipped']
+    job['progress'] = job['processed'] / job['total'] if job['total'] else 1.0
+    return job
+
+
+def job_status(job_id, db_path=JOBS_DB):
+    """任务的状态与进度，任务不存在时返回None"""
+    with closing(connect(db_path)) as connection:
+        row = connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    return _job_dict(row) if row else None
+
+
+def list_jobs(limit=MONITOR_JOBS, db_path=JOBS_DB):
+    """最近提交的任务，按提交时间倒序"""
+    with closing(connect(db_path)) as connection:
+        rows = connection.execute('SELECT * FROM jobs ORDER BY created DESC LIMIT ?', (limit,)).fetchall()
+    return [_job_dict(row) for row in rows]
+
+
+def job_results(job_id, db_path=JOBS_DB):
+    """任务中每个文件的结果，格式与 batch.summarize 的汇总表相同"""
+    with closing(connect(db_path)) as connection:
+        rows = connection.execute('SELECT file, status, output, message, elapsed FROM results WHERE job_id = ? '
+                                  'ORDER BY rowid', (job_id,)).fetchall()
+    return pd.DataFrame([tuple(row) for row in rows], columns=['File', 'Status', 'Output', 'Message', 'Time[s]'])
+
+
+def cancel_job(job_id, db_path=JOBS_DB):
+    """取消排队中或正在执行的任务，正在执行的任务在当前文件完成后停止"""
+    with closing(connect(db_path)) as connection:
+        connection.execute("UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status IN (?, ?)",
+                           (time.time(), job_id, *ACTIVE_STATUSES))
+    return None
+
+
+# ---工作进程---
+def _heartbeat(connection):
+    connection.execute('INSERT OR REPLACE INTO workers (pid, heartbeat) VALUES (?, ?)', (os.getpid(), time.time()))
+
+
+def _heartbeat_thread(db_path, stop):
+    """单个文件处理很久时也按时更新心跳，避免被误判为已经退出"""
+    with closing(connect(db_path)) as connection:
+        while not stop.wait(HEARTBEAT_TIMEOUT / 3):
+            _heartbeat(connection)
+
+
+def worker_alive(db_path=JOBS_DB):
+    """是否有心跳未超时的工作进程"""
+    with closing(connect(db_path)) as connection:
+        row = connection.execute('SELECT MAX(heartbeat) FROM workers').fetchone()
+    return row[0] is not None and time.time() - row[0] < HEARTBEAT_TIMEOUT
+
+
+def worker_log_path(db_path=JOBS_DB):
+    """工作进程的输出日志，与任务数据库在同一个文件夹"""
+    return os.path.join(os.path.dirname(db_path), 'worker.log')
+
+
+def worker_log_tail(db_path=JOBS_DB, lines=LOG_TAIL_LINES):
+    """工作进程输出日志的最后几行，没有日志时返回空字符串"""
+    try:
+        with open(worker_log_path(db_path), encoding='utf-8', errors='replace') as log:
+            return ''.join(log.readlines()[-lines:])
+    except OSError:
+        return ''
+
+
+def ensure_worker(db_path=JOBS_DB):
+    """没有存活的工作进程时，启动一个与streamlit服务独立的后台进程，输出（包括启动失败的错误）追加到日志"""
+    if worker_alive(db_path):
+        return None
+    # 与streamlit服务的进程组分离，停止服务时不会一起终止正在执行的任务
+    if os.name == 'nt':
+        kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        kwargs = {'start_new_session': True}
+    log_path = worker_log_path(db_path)
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    log_mode = 'wb' if os.path.exists(log_path) and os.path.getsize(log_path) > LOG_MAX_BYTES else 'ab'
+    with open(log_path, log_mode) as log:
+        log.write(f"\n---{time.strftime('%Y-%m-%d %H:%M:%S')} 启动工作进程---\n".encode('utf-8'))
+        log.flush()
+        subprocess.Popen([sys.executable, '-m', 'utils.jobs', '--db', db_path], cwd=APP_ROOT,
+                         stdout=log, stderr=subprocess.STDOUT, **kwargs)
+    return None
+
+
+def _claim_job(connection):
+    """原子地领取最早提交的排队任务，多个工作进程不会领取到同一个任务"""
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        row = connection.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+        if row is not None:
+            connection.execute("UPDATE jobs SET status = 'running', started = ?, worker_pid = ? WHERE id = ?",
+                               (time.time(), os.getpid(), row['id']))
+        connection.execute('COMMIT')
+    except Exception:
+        connection.execute('ROLLBACK')
+        raise
+    return row
+
+
+def _recover_interrupted(connection):
+    """工作进程意外退出时遗留的运行中任务标记为失败"""
+    stale = time.time() - HEARTBEAT_TIMEOUT
+    connection.execute("UPDATE jobs SET status = 'failed', finished = ?, message = '工作进程意外退出，任务中断' "
+                       "WHERE status = 'running' AND worker_pid NOT IN (SELECT pid FROM workers WHERE heartbeat > ?)",
+                       (time.time(), stale))
+    connection.execute('DELETE FROM workers WHERE heartbeat <= ?', (stale,))
+
+
+def _record(connection, job_id, result):
+    output = result['Output'] if isinstance(result['Output'], str) else ''
+    connection.execute('INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                       (job_id, result['File'], result['Status'], output, result['Message'], result['Time[s]']))
+    column = {'success': 'done', 'failed': 'failed', 'skipped': 'skipped'}[result['Status']]
+    connection.execute(f'UPDATE jobs SET {column} = {column} + 1 WHERE id = ?', (job_id,))
+
+
+def _is_cancelled(connection, job_id):
+    return connection.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()[0] == 'cancelled'
+
+
+def execute_job(connection, job):
+    """在工作进程中执行一个任务，逐个文件写入结果，任务被取消时停止分发剩余的文件"""
+    job_id = job['id']
+    try:
+        func = _import_function(job['func'])
+        payload = pickle.loads(job['payload'])
+        file_paths, kwargs = payload['file_paths'], payload['kwargs']
+        if payload['incremental']:
+            file_paths, skipped = manifest.split_changed(func, file_paths, kwargs)
+            for result in skipped:
+                _record(connection, job_id, result)
+
+        results = []
+        for result in batch.run_batch(func, file_paths, max_workers=payload['max_workers'],
+                                      with_fingerprint=payload['incremental'], **kwargs):
+            results.append(result)
+            _record(connection, job_id, result)
+            if _is_cancelled(connection, job_id):
+                break
+        if payload['incremental']:
+            manifest.record_results(func, results, kwargs)
+    except Exception as e:
+        connection.execute("UPDATE jobs SET status = 'failed', finished = ?, message = ? WHERE id = ?",
+                           (time.time(), f'{type(e).__name__}: {e}', job_id))
+        return None
+    connection.execute("UPDATE jobs SET status = 'done', finished = ? WHERE id = ? AND status = 'running'",
+                       (time.time(), job_id))
+    return None
+
+
+def worker_loop(db_path=JOBS_DB, idle_timeout=IDLE_TIMEOUT):
+    """工作进程主循环：依次执行排队的任务，空闲超过 idle_timeout 秒后退出"""
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    connection = connect(db_path)
+    _recover_interrupted(connection)
+    _heartbeat(connection)
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat_thread, args=(db_path, stop), daemon=True).start()
+    idle_since = time.time()
+    try:
+        while time.time() - idle_since < idle_timeout:
+            job = _claim_job(connection)
+            if job is None:
+                time.sleep(POLL_INTERVAL)
+                continue
+            execute_job(connection, job)
+            idle_since = time.time()
+    finally:
+        stop.set()
+        connection.execute('DELETE FROM workers WHERE pid = ?', (os.getpid(),))
+        connection.close()
+    return None
+
+
+# ---页面部件---
+def background_checkbox():
+    """后台运行选择框"""
+    return st.checkbox('后台运行：提交到任务队列，刷新或关闭页面不会中断转换', value=False,
+                       help='任务由独立的后台进程依次执行，进度显示在页面下方的任务列表中')
+
+
+def st_submit_batch(func, file_paths, max_workers=None, incremental=False, **kwargs):
+    """提交后台任务并启动工作进程，进度由 job_monitor 显示"""
+    if not file_paths:
+        st.warning('未找到需要处理的文件，请检查路径与处理模式')
+        return None
+    job_id = submit_job(func, file_paths, max_workers, incremental, **kwargs)
+    ensure_worker()
+    st.info(f'已提交后台任务{job_id}：{len(file_paths)}个文件')
+    return job_id
+
+
+def _worker_warning(jobs):
+    """有任务排队超过心跳超时仍没有存活的工作进程时，提示工作进程可能无法启动，并显示日志的最后几行"""
+    waiting = [job for job in jobs if job['status'] == 'queued' and time.time() - job['created'] > HEARTBEAT_TIMEOUT]
+    if not waiting or worker_alive():
+        return None
+    st.warning(f'有{len(waiting)}个任务在排队，但没有运行中的后台工作进程，可能启动失败。'
+               f'日志：{worker_log_path()}，也可以手动运行：python -m utils.jobs')
+    log_tail = worker_log_tail()
+    if log_tail:
+        st.code(log_tail, language=None)
+    return None
+
+
+def _job_list():
+    jobs = list_jobs()
+    _worker_warning(jobs)
+    for job in jobs:
+        col1, col2 = st.columns([0.85, 0.15])
+        text = f"{job['label']} · {job['status']} · {job['processed']}/{job['total']}"
+        if job['failed']:
+            text += f" · 失败{job['failed']}个"
+        col1.progress(job['progress'], text=text)
+        if job['status'] in ACTIVE_STATUSES:
+            col2.button('取消', key=f"cancel_{job['id']}", on_click=cancel_job, args=(job['id'],))
+        elif job['message']:
+            col1.error(job['message'])
+        with col1.expander('逐文件结果'):
+            st.dataframe(job_results(job['id']), hide_index=True)
+
+
+# 有任务排队或运行时定时只刷新任务列表，不重新运行整个页面
+_polling_job_list = st.fragment(run_every=MONITOR_INTERVAL)(_job_list)
+
+
+def job_monitor():
+    """显示最近的后台任务及其进度，没有提交过任务时不显示"""
+    jobs = list_jobs()
+    if not jobs:
+        return None
+    st.subheader('后台任务')
+    if any(job['status'] in ACTIVE_STATUSES for job in jobs):
+        _polling_job_list()
+    else:
+        _job_list()
+    return None
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='后台批处理任务的工作进程')
+    parser.add_argument('--db', default=JOBS_DB, help='任务数据库路径')
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT, help='空闲多少秒后退出')
+    args = parser.parse_args()
+    worker_loop(args.db, args.idle_timeout)
@@ -0,0 +1,82 @@
+"""多条曲线的合并引擎：一次性建立所有曲线x的并集索引，再把y填入预先分配的二维数组"""
+import numpy as np
+import pandas as pd
+
+
+def _nearest(axis, x):
+    """x中每个值在排序后的axis中最近的点：(行号, 距离)"""
+    right = np.clip(np.searchsorted(axis, x), 1, axis.size - 1) if axis.size > 1 else np.zeros(x.size, dtype=int)
+    left = np.maximum(right - 1, 0)
+    use_left = np.abs(x - axis[left]) <= np.abs(axis[right] - x)
+    index = np.where(use_left, left, right)
+    return index, np.abs(x - axis[index])
+
+
+def union_axis(x_arrays, tolerance=0.0):
+    """
+    建立所有曲线x的并集
+    :param x_arrays: 每条曲线的x数组
+    :param tolerance: x对齐容差：以第一条曲线的x为网格，之后每条曲线中与已有网格点相差不超过该值的x对齐到最近的网格点，
+                      其余的x加入网格；同一曲线中不同的x不会因为容差合并，容差不小于x步长时网格也不会塌缩
+    :return: (并集x数组, 每条曲线的点在并集中的行号列表)
+    """
+    x_arrays = [np.asarray(x, dtype=float) for x in x_arrays]
+    if tolerance <= 0:
+        axis = np.unique(np.concatenate(x_arrays))
+        return axis, [np.searchsorted(axis, x) for x in x_arrays]
+
+    axis = np.unique(x_arrays[0])
+    for x in x_arrays[1:]:
+        unique_x = np.unique(x)
+        if axis.size == 0:
+            axis = unique_x
+            continue
+        _, distance = _nearest(axis, unique_x)
+        axis = np.union1d(axis, unique_x[distance > tolerance])
+    # 加入的新网格点只会更近，每个x最近的网格点仍在容差之内
+    rows = [_nearest(axis, x)[0] if axis.size else np.zeros(0, dtype=int) for x in x_arrays]
+    return axis, rows
+
+
+def _occurrence(row):
+    """每个点是该曲线中落在同一行的第几个点（按原始顺序，从0开始）"""
+    order = np.argsort(row, kind='stable')
+    sorted_row = row[order]
+    group_start = np.flatnonzero(np.concatenate(([True], sorted_row[1:] != sorted_row[:-1])))
+    sizes = np.diff(np.append(group_start, row.size))
+    occurrence = np.empty(row.size, dtype=int)
+    occurrence[order] = np.arange(row.size) - np.repeat(group_start, sizes)
+    return occurrence
+
+
+def merge_curves(curves, x_name, tolerance=0.0):
+    """
+    将多条曲线合并为一张宽表，只分配一次内存
+    同一曲线中重复的x（如双向扫描的IV/CV曲线的回扫部分）每出现一次占一行：各曲线第k次出现的点写入该x的第k行，
+    与 pd.merge(..., how='outer') 一样不丢失数据点，但不会在曲线之间产生重复的组合
+    :param curves: [(曲线标签, x数组, y数组), ...]
+    :param x_name: 合并后x列的列名
+    :param tolerance: x对齐容差，同一曲线中对齐到同一个x的多个点同样各占一行
+    :return: 第一列为x、其余每列为一条曲线的 DataFrame，缺失处为NaN
+    """
+    if not curves:
+        return pd.DataFrame()
+    labels = [label for label, _, _ in curves]
+    axis, rows = union_axis([x for _, x, _ in curves], tolerance)
+
+    # 每个x所需的行数为各曲线中该x出现次数的最大值
+    occurrences = [_occurrence(row) for row in rows]
+    multiplicity = np.ones(axis.size, dtype=int)
+    for row in rows:
+        np.maximum(multiplicity, np.bincount(row, minlength=axis.size), out=multiplicity)
+    offsets = np.concatenate(([0], np.cumsum(multiplicity)[:-1]))
+
+    # 预分配二维数组，用一次花式索引把所有y写入对应的行与列
+    values = np.full((int(multiplicity.sum()), len(curves)), np.nan)
+    columns = np.repeat(np.arange(len(curves)), [len(row) for row in rows])
+    target_rows = np.concatenate([offsets[row] + occurrence for row, occurrence in zip(rows, occurrences)])
+    values[target_rows, columns] = np.concatenate([np.asarray(y, dtype=float) for _, _, y in curves])
+
+    merged_df = pd.DataFrame(values, columns=labels)
+    merged_df.insert(0, x_name, np.repeat(axis, multiplicity))
+    return merged_df
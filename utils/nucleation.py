@@ -0,0 +1,144 @@
+"""电化学成核I-t曲线的数组化分析核心，不依赖streamlit，可以在脚本或其他程序中直接调用"""
+import numpy as np
+from scipy.integrate import cumulative_trapezoid
+from scipy.signal import peak_prominences, peak_widths
+from scipy.stats import linregress
+
+
+def local_maxima(current):
+    """严格的局部极大值（比前一个点大且比后一个点大）的索引"""
+    step = np.diff(current)
+    return np.flatnonzero((step[:-1] > 0) & (step[1:] < 0)) + 1
+
+
+def find_peak(current, time, prominence=None, width=None):
+    """
+    找到峰值电流和对应时间
+    :param current: 电流数组
+    :param time: 时间数组
+    :param prominence: 峰的最小突出度[A]，用于过滤噪声形成的小峰；None为不过滤
+    :param width: 峰的最小宽度（数据点数）；None为不过滤
+    :return: (Im, tm, 是否找到峰)，没有找到峰时返回全局最大值
+    """
+    current, time = np.asarray(current, dtype=float), np.asarray(time, dtype=float)
+    peaks = local_maxima(current)
+    if prominence or width:
+        peak_index = _highest_qualified_peak(current, peaks, prominence, width)
+    else:
+        peak_index = peaks[np.argmax(current[peaks])] if peaks.size else None
+
+    if peak_index is None:
+        return current[np.argmax(current)], time[np.argmax(current)], False
+    return current[peak_index], time[peak_index], True
+
+
+def _highest_qualified_peak(current, peaks, prominence=None, width=None, chunk_size=64):
+    """
+    从高到低分批检查局部极大值的突出度与宽度，返回第一个满足条件的峰
+    只需要最高的合格峰，因此不必像 scipy.signal.find_peaks 那样计算所有噪声峰的突出度
+    """
+    order = peaks[np.argsort(current[peaks])[::-1]]
+    for start in range(0, order.size, chunk_size):
+        candidates = order[start:start + chunk_size]
+        keep = np.ones(candidates.size, dtype=bool)
+        prominence_data = peak_prominences(current, candidates)
+        if prominence:
+            keep &= prominence_data[0] >= prominence
+        if width:
+            keep &= peak_widths(current, candidates, prominence_data=prominence_data)[0] >= width
+        if keep.any():
+            # 候选峰已按高度降序排列
+            return candidates[np.argmax(keep)]
+    return None
+
+
+def cumulative_charge(time, current):
+    """用累积梯形积分计算电荷量随时间的变化，第一个点为0"""
+    return cumulative_trapezoid(current, time, initial=0)
+
+
+# ---成核模型（无量纲 I/Im 与 t/tm 的关系）---
+def model_3DI(t_normalized):
+    return ((1.954 / t_normalized) ** 0.5) * (1 - np.exp(-1.2564 * t_normalized))
+
+
+def model_3DP(t_normalized):
+    return ((1.2254 / t_normalized) ** 0.5) * (1 - np.exp(-2.3367 * (t_normalized ** 2)))
+
+
+def model_2DI(t_normalized):
+    return t_normalized * np.exp(0.5 * (1 - t_normalized ** 2))
+
+
+def model_2DP(t_normalized):
+    return (t_normalized ** 2) * np.exp(2 / 3 * (1 - t_normalized ** 3))
+
+
+MODELS = {'3DI': model_3DI, '3DP': model_3DP, '2DI': model_2DI, '2DP': model_2DP}
+
+
+def remove_duplicates(time, current):
+    """去除与前一个点电流相同的点（保留第一个点）"""
+    time, current = np.asarray(time, dtype=float), np.asarray(current, dtype=float)
+    keep = np.concatenate(([True], np.diff(current) != 0))
+    return time[keep], current[keep]
+
+
+def fit_avrami(charge_normalized, time, tm):
+    """
+    计算 ln(-ln(1 - y(t))) 并在 1s < t < tm 的区间线性拟合，点数不足两个时区间扩大为 1s < t < 10s
+    :return: dict，包含 ln_term, slope, intercept, r_squared, t_linear, ln_term_linear, time_valid, widened
+    """
+    mask_valid = (charge_normalized < 1) & (charge_normalized > 0)
+    time_valid = time[mask_valid]
+    ln_term = np.log(-np.log(1 - charge_normalized[mask_valid]))
+
+    widened = False
+    mask_linear = (time_valid > 1) & (time_valid < tm)
+    if np.count_nonzero(mask_linear) < 2:
+        widened = True
+        mask_linear = (time_valid > 1) & (time_valid < 10)
+    if np.count_nonzero(mask_linear) < 2:
+        raise ValueError('没有足够的数据进行Avrami线性拟合')
+
+    t_linear = np.log(time_valid[mask_linear])
+    ln_term_linear = ln_term[mask_linear]
+    fit = linregress(t_linear, ln_term_linear)
+    return {'ln_term': ln_term, 'slope': fit.slope, 'intercept': fit.intercept, 'r_squared': fit.rvalue ** 2,
+            't_linear': t_linear, 'ln_term_linear': ln_term_linear, 'time_valid': time_valid, 'widened': widened}
+
+
+def model_residuals(t_normalized, I_normalized, t_max=5.0):
+    """
+    实验曲线与各成核模型的均方根残差，只比较 0 < t/tm <= t_max 的点
+    :return: {模型名: RMSE}，没有可比较的点时为NaN
+    """
+    mask = (t_normalized > 0) & (t_normalized <= t_max)
+    t, I = t_normalized[mask], I_normalized[mask]
+    if t.size == 0:
+        return {name: np.nan for name in MODELS}
+    return {name: float(np.sqrt(np.mean((I - model(t)) ** 2))) for name, model in MODELS.items()}
+
+
+def analyze_transient(time, current, prominence=None, width=None):
+    """
+    完整的I-t成核分析：去重、找峰、归一化、电荷积分、Avrami拟合与模型残差
+    :return: dict，包含所有中间数组和汇总值（Im, tm, found, slope, intercept, r_squared, residuals）
+    """
+    time, current = np.asarray(time, dtype=float), np.asarray(current, dtype=float)
+    time_unique, current_unique = remove_duplicates(time, current)
+    Im, tm, found = find_peak(current_unique, time_unique, prominence, width)
+    t_normalized, I_normalized = time / tm, current / Im
+
+    charge = cumulative_charge(time, current)
+    charge_range = np.max(charge) - np.min(charge)
+    if charge_range == 0:
+        raise ValueError('电荷量归一化时分母为零，无法归一化')
+    charge_normalized = (charge - np.min(charge)) / charge_range
+
+    result = {'time': time, 'current': current, 'Im': Im, 'tm': tm, 'found': found,
+              't_normalized': t_normalized, 'I_normalized': I_normalized,
+              'charge': charge, 'charge_normalized': charge_normalized,
+              'residuals': model_residuals(t_normalized, I_normalized)}
+    result.update(fit_avrami(charge_normalized, time, tm))
+    return result
@@ -0,0 +1,147 @@
+"""
+交互图的数据抽样：曲线用LTTB或最大/最小值抽样后以WebGL（Scattergl）显示，曲面用金字塔降采样，
+框选或选择区域后只对该区域按原始分辨率重新抽样，避免把全部数据发送到浏览器
+"""
+import warnings
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+DECIMATION_METHODS = ('lttb', 'minmax')
+MAX_POINTS = 2000
+MAX_SURFACE_SIZE = 200
+
+
+# ---曲线抽样---
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets：每个区间保留与前一个保留点、后一个区间均值构成的三角形面积最大的点"""
+    n = x.size
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个区间的均值点，最后一个区间之后为最后一个点
+        next_end = edges[i + 2] if i + 2 < edges.size else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, n_out):
+    """每个区间保留最小值与最大值两个点，保证尖峰不会在抽样后消失"""
+    n = y.size
+    n_buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+    valid = ~np.isnan(blocks).all(axis=1)
+    offsets = np.arange(n_buckets)[valid] * size
+    blocks = blocks[valid]
+    indices = np.concatenate([offsets + np.nanargmin(blocks, axis=1), offsets + np.nanargmax(blocks, axis=1),
+                              [0, n - 1]])
+    return np.unique(indices)
+
+
+def decimate(x, y, max_points=MAX_POINTS, method='lttb', x_range=None):
+    """
+    抽样曲线数据
+    :param x_range: 只保留该横坐标范围内的点（框选放大），None为全部
+    :return: (x, y) 数组，去掉了NaN，点数不超过 max_points（minmax为 max_points+2）
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = ~np.isnan(y)
+    if x_range is not None:
+        mask &= (x >= x_range[0]) & (x <= x_range[1])
+    x, y = x[mask], y[mask]
+    if x.size > max_points:
+        indices = lttb_indices(x, y, max_points) if method == 'lttb' else minmax_indices(y, max_points)
+        x, y = x[indices], y[indices]
+    return x, y
+
+
+def line_trace(x, y, name=None, max_points=MAX_POINTS, method='lttb', x_range=None, **kwargs):
+    """抽样后的WebGL曲线"""
+    x, y = decimate(x, y, max_points, method, x_range)
+    return go.Scattergl(x=x, y=y, mode='lines', name=name, **kwargs)
+
+
+# ---曲面金字塔---
+def downsample_2d(z, factor):
+    """按 factor×factor 的块取平均（忽略NaN），边缘不足一块的部分用NaN补齐"""
+    if factor <= 1:
+        return np.asarray(z, dtype=float)
+    z = np.asarray(z, dtype=float)
+    rows, cols = -(-z.shape[0] // factor), -(-z.shape[1] // factor)
+    padded = np.full((rows * factor, cols * factor), np.nan)
+    padded[:z.shape[0], :z.shape[1]] = z
+    with warnings.catch_warnings():
+        # 全为NaN的块取平均仍为NaN
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return np.nanmean(padded.reshape(rows, factor, cols, factor), axis=(1, 3))
+
+
+def build_pyramid(z, max_size=MAX_SURFACE_SIZE):
+    """逐级2×2降采样，直到最粗的一级不超过 max_size×max_size；第0级为原始数据"""
+    levels = [np.asarray(z, dtype=float)]
+    while max(levels[-1].shape) > max_size:
+        levels.append(downsample_2d(levels[-1], 2))
+    return levels
+
+
+def pyramid_region(levels, row_range=None, col_range=None, max_size=MAX_SURFACE_SIZE):
+    """
+    取出区域内不超过 max_size×max_size 的最精细一级
+    :param row_range: 原始数据的行范围 (start, stop)，None为全部
+    :return: (z, 行坐标, 列坐标)，坐标为原始数据中的序号
+    """
+    rows, cols = levels[0].shape
+    row_start, row_stop = row_range or (0, rows)
+    col_start, col_stop = col_range or (0, cols)
+    for level, z in enumerate(levels):
+        factor = 2 ** level
+        if max(row_stop - row_start, col_stop - col_start) / factor <= max_size or level == len(levels) - 1:
+            break
+    region = z[row_start // factor:-(-row_stop // factor), col_start // factor:-(-col_stop // factor)]
+    row_axis = (np.arange(region.shape[0]) + row_start // factor) * factor
+    col_axis = (np.arange(region.shape[1]) + col_start // factor) * factor
+    return region, row_axis, col_axis
+
+
+# ---页面部件---
+def decimation_options(key):
+    """抽样方法与最大点数的选择部件"""
+    col1, col2 = st.columns(2)
+    method = col1.selectbox('曲线抽样方法', DECIMATION_METHODS, key=f'{key}_method',
+                            help='lttb保留曲线形状，minmax保留每段的最大最小值（尖峰）')
+    max_points = col2.number_input('每条曲线最多显示的点数', min_value=100, value=MAX_POINTS, step=100,
+                                   key=f'{key}_max_points')
+    return max_points, method
+
+
+def selected_x_range(key):
+    """读取图中框选的横坐标范围（上一次交互的结果），没有框选时返回None"""
+    state = st.session_state.get(key)
+    try:
+        box = state['selection']['box'][0]
+        return min(box['x']), max(box['x'])
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def zoomable_chart(fig, key):
+    """显示可以框选放大的图：框选后按原始分辨率重新抽样框选区域，双击空白处恢复全图"""
+    fig.update_layout(dragmode='select', selectdirection='h')
+    if selected_x_range(key) is not None:
+        st.caption('已放大框选区域，双击图中空白处恢复全图')
+    return st.plotly_chart(fig, key=key, on_select='rerun', selection_mode='box')
@@ -0,0 +1,13 @@
+"""页面工具注册表：侧边栏选项 → (模块路径, 入口函数名)，只有被选中的工具才会导入对应模块"""
+import importlib
+
+
+def load_tool(registry, option):
+    """导入选中工具所在的模块并返回入口函数；模块导入后保存在sys.modules中，页面重跑时不会重复导入"""
+    module_path, entry = registry[option]
+    return getattr(importlib.import_module(module_path), entry)
+
+
+def run_tool(registry, option):
+    """运行选中的工具"""
+    return load_tool(registry, option)()
@@ -0,0 +1,12 @@
+"""导出曲线图的streamlit选择部件，渲染器见 core.render"""
+import streamlit as st
+
+from core.render import FIGURE_FORMATS
+
+
+def figure_format_select():
+    """图片分辨率与格式的选择部件，返回可以直接传给 render 的关键字参数"""
+    col1, col2 = st.columns(2)
+    dpi = col1.number_input('图片分辨率dpi', min_value=50, max_value=1200, value=300, step=50)
+    fig_format = col2.selectbox('图片格式', FIGURE_FORMATS, index=0)
+    return {'dpi': dpi, 'fig_format': fig_format}
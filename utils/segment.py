@@ -0,0 +1,83 @@
+"""CV/GCD数据的分段引擎：用numpy一次性找出扫描方向翻转或电流换向的位置，返回每一段的索引范围"""
+import numpy as np
+
+
+def _confirmed_extrema(values, pivots, direction, hysteresis):
+    """
+    在候选极值点中筛选真正的扫描翻转点：只有从当前极值回撤超过hysteresis才确认翻转
+    :param values: 数据数组
+    :param pivots: 候选极值点索引（含首尾）
+    :param direction: 第一段的扫描方向，1为正扫，-1为负扫
+    :return: 确认的极值点索引
+    """
+    pivot_values = values[pivots].tolist()
+    confirmed = []
+    extreme = 0  # 当前扫描段中最极端的候选点
+    # 只在候选极值点上循环，点数远少于原始数据
+    for k in range(1, len(pivots)):
+        if (pivot_values[k] - pivot_values[extreme]) * direction >= 0:
+            extreme = k
+        elif abs(pivot_values[k] - pivot_values[extreme]) > hysteresis:
+            confirmed.append(extreme)
+            direction = -direction
+            extreme = k
+    return pivots[np.asarray(confirmed, dtype=np.int64)]
+
+
+def reversal_starts(values, hysteresis=0.0):
+    """
+    扫描方向翻转后每一段的起始索引（CV按电位分段）
+    :param values: 电位数组
+    :param hysteresis: 噪声滞回阈值，回撤不超过该值的抖动不算翻转
+    :return: 新分段起始点的索引数组（不含0）
+    """
+    values = np.asarray(values, dtype=float)
+    step = np.diff(values)
+    # 忽略电位不变的平台，只比较相邻的非零步长的方向
+    moving = np.flatnonzero(step)
+    if moving.size < 2:
+        return np.empty(0, dtype=np.int64)
+    sign = np.sign(step[moving])
+    # 方向变化处的步长起点即为极值点
+    extrema = moving[np.flatnonzero(sign[1:] != sign[:-1]) + 1]
+
+    if hysteresis > 0 and extrema.size:
+        # 第一段的方向由第一次偏离起点超过阈值的点决定，避免起点的抖动产生一个很短的分段
+        departed = np.flatnonzero(np.abs(values - values[0]) > hysteresis)
+        if departed.size == 0:
+            return np.empty(0, dtype=np.int64)
+        direction = 1 if values[departed[0]] > values[0] else -1
+        pivots = np.concatenate(([0], extrema, [len(values) - 1]))
+        extrema = _confirmed_extrema(values, pivots, direction, hysteresis)
+    # 极值点属于前一段，新分段从极值点的下一个点开始
+    return extrema + 1
+
+
+def sign_change_starts(values, hysteresis=0.0):
+    """
+    电流换向后每一段的起始索引（GCD按电流正负分段）
+    :param values: 电流数组
+    :param hysteresis: 噪声滞回阈值，绝对值不超过该值的点沿用前一个点的正负
+    :return: 新分段起始点的索引数组（不含0）
+    """
+    values = np.asarray(values, dtype=float)
+    state = np.where(values > hysteresis, 1, np.where(values < -hysteresis, -1, 0))
+    # 施密特触发：死区内的点向前填充最近一次的正负状态
+    last = np.where(state != 0, np.arange(len(state)), 0)
+    np.maximum.accumulate(last, out=last)
+    state = state[last]
+    return np.flatnonzero(state[1:] * state[:-1] < 0) + 1
+
+
+def segment_ranges(starts, length):
+    """
+    将分段起始索引转换为索引范围
+    :return: 形状为(n, 2)的数组，每行为 [start, stop)
+    """
+    bounds = np.concatenate(([0], starts, [length])).astype(np.int64)
+    return np.column_stack((bounds[:-1], bounds[1:]))
+
+
+def label_segments(ranges, length):
+    """为每个数据点生成从1开始的分段编号"""
+    return np.repeat(np.arange(1, len(ranges) + 1), np.diff(ranges, axis=1).ravel())[:length]
@@ -0,0 +1,157 @@
+"""
+光谱数据的矩阵运算：扣除背景、除以参比、取对数和插值都对 波长×光谱条数 的二维数组一次完成，
+插值使用由新旧波长网格算出的重采样矩阵，所有光谱共用；同一探测器、同一插值参数的重采样矩阵只计算一次
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+from scipy.interpolate import interp1d
+
+from core.profiling import profiled
+
+# 透过率小于等于0时的替代值，避免取对数出错
+MIN_TRANSMITTANCE = 1e-10
+# 重采样矩阵是稀疏矩阵的插值方法（每个新波长点只用到相邻的原始点）
+SPARSE_KINDS = ('linear', 'slinear', 'nearest', 'zero', 'previous', 'next')
+# 样条重采样矩阵中忽略的权重大小，以及按稀疏矩阵保存的非零元素比例上限
+SPLINE_WEIGHT_TOLERANCE = 1e-13
+SPARSE_DENSITY = 0.1
+# 磁盘缓存的文件夹名（位于数据文件夹内）与内存中最多保留的重采样矩阵个数
+RESAMPLE_CACHE_DIR = '.resample_cache'
+MEMORY_CACHE_SIZE = 16
+
+# 进程内的重采样矩阵缓存：缓存键 → 矩阵，按最近使用排序
+_matrix_cache = OrderedDict()
+
+
+def new_grid(start, end, interval):
+    """插值后的波长网格，与原来的 np.arange(start, end + interval, interval) 一致"""
+    return np.arange(start, end + interval, interval)
+
+
+def _linear_matrix(x, new_x):
+    """线性插值的权重直接由相邻两点算出：每行只有两个非零元素"""
+    order = np.argsort(x, kind='stable')
+    xs = x[order]
+    if new_x.min() < xs[0]:
+        raise ValueError('A value in x_new is below the interpolation range.')
+    if new_x.max() > xs[-1]:
+        raise ValueError('A value in x_new is above the interpolation range.')
+    right = np.clip(np.searchsorted(xs, new_x, side='left'), 1, xs.size - 1)
+    left = right - 1
+    weight = (new_x - xs[left]) / (xs[right] - xs[left])
+    rows = np.repeat(np.arange(new_x.size), 2)
+    cols = np.column_stack([order[left], order[right]]).ravel()
+    values = np.column_stack([1 - weight, weight]).ravel()
+    return sparse.csr_matrix((values, (rows, cols)), shape=(new_x.size, x.size))
+
+
+def resampling_matrix(x, new_x, kind='linear'):
+    """
+    计算重采样矩阵 M，使 M @ spectra 等于对每一列分别做 interp1d(x, column, kind)(new_x)
+    :param x: 原始波长，长度为n
+    :param new_x: 新波长，长度为m
+    :param kind: interp1d 的插值方法
+    :return: m×n 的矩阵，通常为稀疏矩阵，样条权重衰减很慢时为稠密数组
+    """
+    x = np.asarray(x, dtype=float)
+    new_x = np.asarray(new_x, dtype=float)
+    if kind in ('linear', 'slinear'):
+        return _linear_matrix(x, new_x)
+    # 插值对数据是线性的，对单位矩阵插值即得到每个原始点的权重
+    matrix = interp1d(x, np.eye(x.size), kind=kind, axis=0)(new_x)
+    if kind not in SPARSE_KINDS:
+        # 样条的权重随距离指数衰减，去掉可以忽略的远处权重后通常也是稀疏矩阵
+        matrix[np.abs(matrix) < SPLINE_WEIGHT_TOLERANCE] = 0.0
+        if np.count_nonzero(matrix) > SPARSE_DENSITY * matrix.size:
+            return matrix
+    return sparse.csr_matrix(matrix)
+
+
+def grid_fingerprint(x):
+    """波长网格的指纹：同一台探测器导出的文件波长完全相同，指纹也相同"""
+    return hashlib.sha1(np.ascontiguousarray(x, dtype=float).tobytes()).hexdigest()[:16]
+
+
+def _cache_key(x, start, end, interval, kind):
+    parameters = f'{float(start)!r}_{float(end)!r}_{float(interval)!r}_{kind}'
+    return f'{grid_fingerprint(x)}_{hashlib.sha1(parameters.encode()).hexdigest()[:12]}'
+
+
+def _load_matrix(cache_dir, key):
+    """读取磁盘缓存，不存在或损坏时返回None"""
+    for suffix, loader in (('.npz', sparse.load_npz), ('.npy', np.load)):
+        path = os.path.join(cache_dir, key + suffix)
+        if os.path.exists(path):
+            try:
+                return loader(path)
+            except (OSError, ValueError):
+                return None
+    return None
+
+
+def _save_matrix(cache_dir, key, matrix):
+    """先写临时文件再替换，多个进程同时写入同一个矩阵也不会留下损坏的文件"""
+    os.makedirs(cache_dir, exist_ok=True)
+    suffix = '.npz' if sparse.issparse(matrix) else '.npy'
+    temp_path = os.path.join(cache_dir, f'{key}.{os.getpid()}.tmp{suffix}')
+    if sparse.issparse(matrix):
+        sparse.save_npz(temp_path, matrix)
+    else:
+        np.save(temp_path, matrix)
+    os.replace(temp_path, os.path.join(cache_dir, key + suffix))
+
+
+@profiled('math')
+def cached_resampling_matrix(x, start, end, interval, kind='linear', cache_dir=None):
+    """
+    按 波长网格指纹 + 插值参数 缓存重采样矩阵，先查进程内的缓存，再查磁盘缓存，都没有时才计算
+    :param x: 原始波长
+    :param cache_dir: 磁盘缓存的文件夹，None则只使用内存缓存
+    :return: (新波长网格, 重采样矩阵)
+    """
+    x = np.asarray(x, dtype=float)
+    new_x = new_grid(start, end, interval)
+    key = _cache_key(x, start, end, interval, kind)
+    matrix = _matrix_cache.get(key)
+    if matrix is None and cache_dir:
+        matrix = _load_matrix(cache_dir, key)
+    if matrix is None:
+        matrix = resampling_matrix(x, new_x, kind)
+        if cache_dir:
+            _save_matrix(cache_dir, key, matrix)
+    _matrix_cache[key] = matrix
+    _matrix_cache.move_to_end(key)
+    while len(_matrix_cache) > MEMORY_CACHE_SIZE:
+        _matrix_cache.popitem(last=False)
+    return new_x, matrix
+
+
+@profiled('math')
+def resample(matrix, spectra):
+    """用重采样矩阵一次插值所有光谱（n×k → m×k）"""
+    return np.asarray(matrix @ spectra)
+
+
+def subtract_dark(spectra, dark):
+    """每条光谱扣除背景（dark）"""
+    return spectra - dark[:, np.newaxis]
+
+
+@profiled('math')
+def transmittance(samples, dark, reference):
+    """透过率 =（样品 - 背景）/（参比 - 背景）"""
+    # 参比等于背景时与pandas的除法一样得到inf/NaN，不提示警告
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return subtract_dark(samples, dark) / (reference - dark)[:, np.newaxis]
+
+
+@profiled('math')
+def absorbance(transmittance_values):
+    """吸光度 = -log10(透过率)，非正数（以及NaN）替换为 MIN_TRANSMITTANCE，与逐个元素判断的结果一致"""
+    with np.errstate(invalid='ignore'):
+        clamped = np.where(transmittance_values > 0, transmittance_values, MIN_TRANSMITTANCE)
+    return -np.log10(clamped)
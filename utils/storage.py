@@ -0,0 +1,48 @@
+"""页面中的数据记录读写：上传文件的解析缓存与存储格式选择部件，读写本身见 core.storage"""
+import hashlib
+
+import streamlit as st
+
+from core.storage import STORAGE_FORMATS, load_record
+
+# 上传文件的解析结果最多缓存的份数（按最近使用淘汰）
+UPLOAD_CACHE_ENTRIES = 8
+
+
+def upload_digest(uploaded_file):
+    """
+    上传文件内容的sha256；同一次上传（file_id相同）只计算一次，之后页面重跑直接取会话中保存的结果
+    :return: 十六进制哈希字符串，作为解析结果与派生数据的缓存键
+    """
+    digests = st.session_state.setdefault('_upload_digests', {})
+    file_id = getattr(uploaded_file, 'file_id', None)
+    if file_id not in digests:
+        digests.clear()  # 只保留当前上传的文件
+        digests[file_id] = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    return digests[file_id]
+
+
+@st.cache_data(max_entries=UPLOAD_CACHE_ENTRIES, show_spinner='正在读取数据文件...')
+def _load_upload(digest, name, _uploaded_file):
+    """按 内容哈希+文件名 缓存解析结果；_uploaded_file以下划线开头，不参与缓存键的计算"""
+    _uploaded_file.seek(0)
+    return load_record(_uploaded_file)
+
+
+def load_upload(uploaded_file):
+    """
+    读取st.file_uploader上传的数据记录，内容相同的文件只解析一次（与控件状态无关）
+    :return: (数据表, sheet名, 参数字典)
+    """
+    return _load_upload(upload_digest(uploaded_file), uploaded_file.name, uploaded_file)
+
+
+def storage_format_select():
+    """存储格式选择部件，返回可以直接传给转换函数的关键字参数"""
+    col1, col2 = st.columns(2)
+    storage_format = col1.selectbox('输出文件的存储格式', list(STORAGE_FORMATS), index=0,
+                                    help='parquet/feather为列式存储，读写速度远快于excel，参数保存在文件元数据中')
+    excel_copy = False
+    if storage_format != 'excel':
+        excel_copy = col2.checkbox('同时导出一份excel', value=False)
+    return {'storage_format': storage_format, 'excel_copy': excel_copy}
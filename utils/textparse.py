@@ -0,0 +1,32 @@
+"""仪器导出的文本数据的流式解析：只逐行读取表头，数值部分交给pandas的C解析器，可以按块读取以限制内存"""
+from itertools import islice
+
+import pandas as pd
+
+from core.profiling import profiled
+
+# 表头最多读取的行数，仪器文件的表头远少于该行数
+HEADER_LINES = 500
+# 按块读取时每块的行数
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+@profiled('parse', read_arg='file_path')
+def read_head(file_path, n_lines=HEADER_LINES, encoding=None):
+    """只读取文件开头的 n_lines 行（不读取整个文件）"""
+    with open(file_path, 'r', encoding=encoding) as file:
+        return list(islice(file, n_lines))
+
+
+@profiled('parse', read_arg='file_path')
+def read_numeric(file_path, columns, skiprows=0, sep=',', chunksize=None, encoding=None):
+    """
+    用pandas的C解析器读取文件中从 skiprows 行开始的数值部分
+    :param columns: 列名，列数必须与数据一致
+    :param sep: 分隔符，空白分隔的文件用 r'\\s+'
+    :param chunksize: None 返回整个 DataFrame；否则返回每块最多 chunksize 行的 DataFrame 迭代器
+    :param encoding: 文件编码；被跳过的表头中无法解码的字符会被替换，不影响数值部分
+    """
+    return pd.read_csv(file_path, sep=sep, header=None, names=columns, index_col=False, skiprows=skiprows,
+                       dtype=float, skipinitialspace=True, engine='c', chunksize=chunksize, encoding=encoding,
+                       encoding_errors='replace')
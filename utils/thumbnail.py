@@ -0,0 +1,180 @@
+"""
+表格中图片的缩略图：每张原图只缩小一次，按 路径 + 修改时间 + 文件大小 保存在 static/thumbnails 中，
+表格通过Streamlit的静态文件路由（app/static/...）按地址加载缩略图，不再把整张原图以base64写进页面；
+原图只在用户选择查看时才读取。原图修改后旧的缩略图不会再被使用，生成新缩略图时清理长期未使用的缩略图并限制总大小
+"""
+import hashlib
+import os
+import time
+
+import streamlit as st
+from PIL import Image
+
+# 缩略图保存在应用根目录的 static 文件夹中，需要在 .streamlit/config.toml 中开启 enableStaticServing
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THUMBNAIL_DIR = os.path.join(APP_ROOT, 'static', 'thumbnails')
+# 使用以 / 开头的地址，Ag-Grid等在iframe中渲染的组件也能正确加载
+STATIC_URL = '/app/static/thumbnails'
+THUMBNAIL_SIZE = 240
+# 缩略图缓存的清理：超过该天数未使用的缩略图删除，总大小超过上限时从最久未使用的开始删除；
+# 使用缩略图时最多每天更新一次修改时间作为最近使用时间，每个进程最多每隔 PRUNE_INTERVAL 秒清理一次
+THUMBNAIL_MAX_AGE_DAYS = 30
+THUMBNAIL_CACHE_BYTES = 200 * 1024 * 1024
+TOUCH_INTERVAL = 24 * 3600
+PRUNE_INTERVAL = 600
+_last_prune = 0.0
+
+
+def thumbnail_key(image_path, max_size=THUMBNAIL_SIZE, thumbnail_format='webp'):
+    """
+    缩略图的缓存键：原图被替换或修改后修改时间/大小改变，会生成新的缩略图
+    :return: 缓存键，原图不存在时返回None
+    """
+    try:
+        stat = os.stat(image_path)
+    except (OSError, TypeError, ValueError):
+        return None
+    identity = f'{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{max_size}|{thumbnail_format}'
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+def make_thumbnail(image_path, max_size=THUMBNAIL_SIZE, thumbnail_format='webp', thumbnail_dir=THUMBNAIL_DIR):
+    """
+    生成缩略图（已存在则直接返回）
+    :param max_size: 缩略图最长边的像素数，保持原图宽高比
+    :return: 缩略图文件名，原图不存在或无法读取时返回None
+    """
+    key = thumbnail_key(image_path, max_size, thumbnail_format)
+    if key is None:
+        return None
+    file_name = f'{key}.{thumbnail_format}'
+    output_path = os.path.join(thumbnail_dir, file_name)
+    try:
+        modified = os.stat(output_path).st_mtime
+    except OSError:
+        modified = None
+    if modified is not None:
+        if time.time() - modified > TOUCH_INTERVAL:
+            _touch(output_path)
+        return file_name
+    try:
+        with Image.open(image_path) as image:
+            # draft 让JPEG解码时就按比例缩小，其他格式无影响
+            image.draft('RGB', (max_size, max_size))
+            image.thumbnail((max_size, max_size))
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            os.makedirs(thumbnail_dir, exist_ok=True)
+            # 先写临时文件再替换，多个会话同时生成同一张缩略图也不会读到半个文件
+            temp_path = f'{output_path}.{os.getpid()}.tmp'
+            image.save(temp_path, format=thumbnail_format.upper())
+        os.replace(temp_path, output_path)
+    except (OSError, ValueError):
+        return None
+    prune_thumbnails(thumbnail_dir)
+    return file_name
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_thumbnails(thumbnail_dir=THUMBNAIL_DIR, max_age_days=THUMBNAIL_MAX_AGE_DAYS,
+                     max_bytes=THUMBNAIL_CACHE_BYTES, force=False):
+    """
+    清理缩略图缓存：删除超过 max_age_days 天未使用的缩略图与遗留的临时文件，总大小仍超过 max_bytes 时
+    从最久未使用的开始删除
+    :param force: 为False时每个进程最多每隔 PRUNE_INTERVAL 秒清理一次
+    :return: 删除的文件个数
+    """
+    global _last_prune
+    now = time.time()
+    if not force and now - _last_prune < PRUNE_INTERVAL:
+        return 0
+    _last_prune = now
+
+    entries = []
+    try:
+        with os.scandir(thumbnail_dir) as scan:
+            for entry in scan:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.is_file():
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError:
+        return 0
+
+    removed = 0
+    total = sum(size for _, size, _ in entries)
+    # 最久未使用的在前
+    for modified, size, path in sorted(entries):
+        if path.endswith('.tmp'):
+            # 临时文件可能正在写入，只删除一小时以前遗留的
+            remove = now - modified > 3600
+        else:
+            remove = now - modified > max_age_days * 24 * 3600 or total > max_bytes
+        if not remove:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def thumbnail_url(image_path, max_size=THUMBNAIL_SIZE, thumbnail_format='webp'):
+    """原图路径 → 缩略图的静态文件地址，失败时返回空字符串（与原来的 create_image_uri 一致）"""
+    file_name = make_thumbnail(image_path, max_size, thumbnail_format)
+    return f'{STATIC_URL}/{file_name}' if file_name else ''
+
+
+def thumbnail_column(paths, max_size=THUMBNAIL_SIZE, thumbnail_format='webp'):
+    """
+    把一列图片路径转换为缩略图地址，相同的路径只处理一次
+    :param paths: pd.Series，元素为图片路径（可以为空）
+    :return: 与 paths 同索引的 pd.Series
+    """
+    urls = {path: thumbnail_url(path, max_size, thumbnail_format)
+            for path in paths.dropna().unique() if isinstance(path, str)}
+    return paths.map(urls).fillna('')
+
+
+def thumbnail_columns(df, columns, max_size=THUMBNAIL_SIZE, thumbnail_format='webp'):
+    """返回图片列替换为缩略图地址的副本，原始的路径保留在 df 中供查看原图"""
+    df = df.copy()
+    for column in columns:
+        if column in df.columns:
+            df[column] = thumbnail_column(df[column], max_size, thumbnail_format)
+    return df
+
+
+def original_image_viewer(df, label_column, image_columns, key):
+    """
+    按需查看原图：选择一行与一个图片列后才读取该原图
+    :param df: 图片列为原始路径的 DataFrame
+    :param label_column: 用于选择行的列（例如 Chinese Name）
+    """
+    image_columns = [column for column in image_columns if column in df.columns]
+    if not image_columns or label_column not in df.columns:
+        return None
+    with st.expander('查看原图'):
+        col1, col2 = st.columns(2)
+        label = col1.selectbox('选择化学品', df[label_column].dropna().unique(), index=None, key=f'{key}_label')
+        column = col2.selectbox('选择图片类型', image_columns, key=f'{key}_column')
+        if label is None:
+            return None
+        paths = df.loc[df[label_column] == label, column].dropna()
+        path = paths.iloc[0] if not paths.empty else None
+        if isinstance(path, str) and os.path.exists(path):
+            st.image(path, caption=os.path.basename(path))
+        else:
+            st.info('该化学品没有这一类图片')
+    return None
+
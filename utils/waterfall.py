@@ -0,0 +1,85 @@
+"""
+光谱序列的3D瀑布图：所有光谱用NaN隔开后放进同一条Scatter3d曲线，
+一次批量导出所有文件的图片，使导出时间不随光谱条数成倍增长
+"""
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from core.profiling import stage
+from utils.animation import frame_indices
+
+# 与2D光谱图相同的自定义颜色，按光谱序号着色
+CUSTOM_COLORS = ['#F44336', '#E91E63', '#9C27B0', '#673AB7', '#3F51B5', '#2196F3',
+                 '#03A9F4', '#00BCD4', '#009688', '#4CAF50', '#8BC34A', '#CDDC39',
+                 '#FFEB3B', '#FFC107', '#FF9800', '#FF5722', '#795548', '#9E9E9E', '#607D8B']
+
+
+def waterfall_trace(x, spectra, indices):
+    """
+    把多条光谱拼成一条曲线，每条光谱末尾补一个NaN使plotly在光谱之间断开
+    :param x: 横坐标（波长），长度为n
+    :param spectra: n×条数 的光谱数组
+    :param indices: 每条光谱在序列中的序号（作为y坐标与颜色）
+    :return: go.Scatter3d
+    """
+    n_points, n_curves = spectra.shape
+    # 单精度足够画图，传给导出进程的数据量减半
+    x = np.tile(np.append(np.asarray(x, dtype=np.float32), np.nan), n_curves)
+    y = np.repeat(np.asarray(indices, dtype=np.float32), n_points + 1)
+    z = np.vstack([spectra, np.full((1, n_curves), np.nan)]).astype(np.float32).ravel(order='F')
+    return go.Scatter3d(x=x, y=y, z=z, mode='lines', connectgaps=False, showlegend=False,
+                        line=dict(color=y, colorscale=CUSTOM_COLORS, width=2))
+
+
+def waterfall_figure(x, spectra, title='', zaxis_title='', x_scale=None, y_scale=None, max_curves=None):
+    """
+    生成3D瀑布图
+    :param spectra: n×条数 的光谱数组，每一列为一条光谱
+    :param max_curves: 时间轴上最多保留的光谱条数（均匀抽取，保留首尾），None为不限制
+    :return: go.Figure
+    """
+    spectra = np.asarray(spectra, dtype=float)
+    n_curves = spectra.shape[1]
+    indices = frame_indices(n_curves, 1, max_curves)
+    fig = go.Figure(waterfall_trace(x, spectra[:, indices], indices))
+    fig.update_layout(
+        scene=dict(
+            xaxis_title='Wavelength[nm]',
+            yaxis_title='Curve Index',
+            zaxis_title=zaxis_title,
+            xaxis=dict(range=x_scale),
+            yaxis=dict(range=[0, n_curves - 1]),
+            zaxis=dict(range=y_scale)
+        ),
+        title=title,
+        margin=dict(r=20, b=10, l=10, t=10)
+    )
+    return fig
+
+
+def _batch_export_available():
+    """kaleido 1.x 可以在同一个浏览器进程中连续导出多张图"""
+    try:
+        from kaleido import write_fig_from_object_sync  # noqa: F401
+    except ImportError:
+        return False
+    return hasattr(pio, 'write_images')
+
+
+def export_images(figures, output_paths):
+    """
+    导出多张图片，图片格式由后缀决定
+    新版kaleido一次调用导出全部图片，只启动一次浏览器；旧版kaleido本身会在进程中保留一个常驻的导出进程
+    """
+    if not figures:
+        return output_paths
+    with stage('savefig') as record:
+        if _batch_export_available():
+            pio.write_images(figures, output_paths)
+        else:
+            for fig, output_path in zip(figures, output_paths):
+                pio.write_image(fig, output_path)
+        for output_path in output_paths:
+            record.written(output_path)
+    return output_paths